@@ -1,18 +1,29 @@
-from flask import Flask, render_template, request, jsonify, send_file, g
-import os, uuid, json, shutil, time, re, zipfile
+from flask import Flask, Response, render_template, request, jsonify, send_file, g
+import atexit, filecmp, os, uuid, json, shutil, threading, time, re, zipfile
+import xml.etree.ElementTree as ET
+import numpy as np
 from werkzeug.exceptions import RequestEntityTooLarge
 from xlights_seq.config import Config
 from xlights_seq.parsers import (
+    ModelInfo,
     parse_models,
-    parse_tree,
-    flatten_models,
+    load_layout,
     parse_tree_with_index,
-    extract_model_nodes,
 )
 from xlights_seq.recommend import recommend_groups
-from xlights_seq.audio import analyze_beats_plus
-from xlights_seq.xsq_writer import build_xsq, write_xsq
+from xlights_seq.layout_diff import diff_models
+from xlights_seq.networks import channel_map, network_load, parse_networks
+from xlights_seq.audio import (
+    PROFILES,
+    AnalysisCache,
+    analyze_beats_plus,
+    audio_duration,
+    check_window,
+    warm_up,
+)
+from xlights_seq.xsq_writer import splice_xsq, stream_xsq
 from xlights_seq.versioning import build_version
+from xlights_seq.workers import AnalysisTimeout, WorkerCrashed, WorkerPool
 from logger import get_json_logger
 
 OFFLINE = os.environ.get("OFFLINE", "1") == "1"
@@ -28,6 +39,52 @@ os.makedirs(app.config["OUTPUT_FOLDER"], exist_ok=True)
 # Configure JSON logger
 app.logger = get_json_logger(app.config["LOG_FILE"])
 
+analysis_cache = AnalysisCache(
+    app.config.get("ANALYSIS_CACHE_DIR")
+    or os.path.join(app.config["OUTPUT_FOLDER"], "analysis-cache"),
+    max_bytes=app.config["ANALYSIS_CACHE_MAX_MB"] * 1024 * 1024,
+)
+
+# Analysis runs in reusable worker processes so a pathological file cannot
+# pin a request thread (or crash the web process) past ANALYSIS_TIMEOUT.
+_analysis_pool = None
+_analysis_pool_lock = threading.Lock()
+
+
+def get_analysis_pool() -> WorkerPool:
+    """The analysis :class:`WorkerPool`, created (and warmed up) on first use.
+
+    Spawned workers re-import this module as ``__mp_main__`` when it is run
+    as a script, so nothing here may build the pool or start processes at
+    import time.
+    """
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is None:
+            pool = WorkerPool(
+                max_workers=app.config["ANALYSIS_WORKERS"],
+                timeout=app.config["ANALYSIS_TIMEOUT"],
+                initializer=warm_up if app.config["ANALYSIS_WARMUP"] else None,
+            )
+            atexit.register(pool.shutdown)
+            if app.config["ANALYSIS_WARMUP"]:
+                if pool.max_workers > 0:
+                    pool.prestart()
+                else:
+                    threading.Thread(
+                        target=warm_up, name="analysis-warmup", daemon=True
+                    ).start()
+            _analysis_pool = pool
+        return _analysis_pool
+
+
+@app.before_request
+def start_analysis_warmup():
+    # servers that import the app (flask run, gunicorn) skip the __main__
+    # block, so the first request (usually the health check) starts warm-up
+    if app.config["ANALYSIS_WARMUP"] and _analysis_pool is None:
+        get_analysis_pool()
+
 
 @app.before_request
 def log_request_start():
@@ -102,19 +159,20 @@ def inspect_layout():
         return jsonify(ok=False, error="Upload a layout .xml"), 400
     tmp = os.path.join(app.config["UPLOAD_FOLDER"], f"inspect-{uuid.uuid4()}.xml")
     layout.save(tmp)
-    tree = parse_tree(tmp)
-    models = flatten_models(tree)
-
-    def to_dict(n):
-        return {
-            "name": n.name,
-            "type": n.type,
-            "strings": n.strings,
-            "nodes": n.nodes,
-            "children": [to_dict(c) for c in n.children],
-        }
+    index = load_layout(tmp)
+    tree = index.compact_tree()
+    cycles = [list(edge) for edge in index.hierarchy().cycles()]
+
+    def body():
+        # streamed: the tree can be tens of MB of JSON on large layouts
+        yield '{"ok": true, "modelCount": %d, "groupCycles": %s, "tree": ' % (
+            tree.model_count(),
+            json.dumps(cycles),
+        )
+        yield from tree.iter_json()
+        yield "}"
 
-    return jsonify(ok=True, modelCount=len(models), tree=to_dict(tree))
+    return Response(body(), mimetype="application/json")
 
 
 @app.post("/recommend-groups")
@@ -138,7 +196,10 @@ def render_layout():
     layout.save(xml_tmp)
 
     try:
-        model_points = extract_model_nodes(xml_tmp)
+        index = load_layout(xml_tmp)
+        model_points = index.model_positions()
+    except ET.ParseError as e:
+        return jsonify(ok=False, error=f"Failed to parse XML: {e}"), 400
     finally:
         try:
             os.remove(xml_tmp)
@@ -165,27 +226,32 @@ def render_layout():
         return base[i % len(base)]
 
     for i, (name, pts) in enumerate(model_points.items()):
-        if not pts:
+        if not len(pts):
             continue
-        xs = [p[0] for p in pts]
-        ys = [p[1] for p in pts]
-        xmin = min(xmin, min(xs))
-        xmax = max(xmax, max(xs))
-        ymin = min(ymin, min(ys))
-        ymax = max(ymax, max(ys))
+        # float32 -> 3 decimals keeps the JSON short
+        pts = pts.astype(np.float64).round(3)
+        lo, hi = pts.min(axis=0).tolist(), pts.max(axis=0).tolist()
+        xmin, ymin = min(xmin, lo[0]), min(ymin, lo[1])
+        xmax, ymax = max(xmax, hi[0]), max(ymax, hi[1])
         traces.append(
             {
                 "type": "scattergl",
                 "mode": "markers",
                 "name": name,
-                "x": xs,
-                "y": ys,
+                "x": pts[:, 0].tolist(),
+                "y": pts[:, 1].tolist(),
                 "marker": {"size": 4, "color": color_for(i)},
                 "hoverinfo": "name+x+y",
             }
         )
+    warnings = index.geometry_warnings
+    if warnings:
+        app.logger.warning("layout_models_skipped", extra={"warnings": warnings})
     if not traces:
-        return jsonify(ok=False, error="No pixel coordinates found in layout."), 400
+        return (
+            jsonify(ok=False, error="No pixel coordinates found in layout.", warnings=warnings),
+            400,
+        )
 
     fig = {
         "data": traces,
@@ -201,7 +267,101 @@ def render_layout():
         ok=True,
         figure=fig,
         bounds={"xmin": xmin, "xmax": xmax, "ymin": ymin, "ymax": ymax},
+        warnings=warnings,
+    )
+
+def _parse_palette(palette_str):
+    """Comma-separated hex colors -> ["#RRGGBB", ...], or None if none are valid."""
+    palette = []
+    for part in (palette_str or "").strip().split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.startswith("#"):
+            part = "#" + part
+        if re.fullmatch(r"#([0-9a-fA-F]{6})", part):
+            palette.append(part.upper())
+    return palette or None
+
+
+def _parse_window(form):
+    """Optional ``start_s``/``end_s`` preview window, as analysis kwargs."""
+    window = {}
+    for key in ("start_s", "end_s"):
+        value = (form.get(key) or "").strip()
+        if not value:
+            continue
+        try:
+            window[key] = float(value)
+        except ValueError:
+            raise ValueError(f"{key} must be a number of seconds") from None
+    check_window(window.get("start_s"), window.get("end_s"))
+    return window
+
+
+def _fit_window(window, audio_path):
+    """The window ``_parse_window`` returned, checked against the audio length.
+
+    ``end_s`` is clamped to the track (and filled in when omitted) so the
+    window reported back is the one actually analyzed. Raises
+    ``ValueError`` for a window starting past the end of the audio.
+    """
+    if not window:
+        return window
+    try:
+        track_s = audio_duration(audio_path)
+    except RuntimeError:
+        raise ValueError("Could not read the audio length for start_s/end_s") from None
+    offset, duration = check_window(window.get("start_s"), window.get("end_s"), track_s)
+    end = track_s if duration is None else offset + duration
+    return {"start_s": offset, "end_s": round(end, 3)}
+
+
+def _write_sequence(
+    xsq_path,
+    models,
+    beat_times,
+    duration_ms,
+    downbeat_times,
+    section_times,
+    preset,
+    palette=None,
+    previous_path=None,
+    reuse=(),
+):
+    """Stream the xsq; returns (effect stats, reused models, rebuilt models).
+
+    With ``previous_path`` the ``reuse`` models are spliced in from that
+    earlier xsq instead of being generated again.
+    """
+    kwargs = dict(
+        downbeat_times=downbeat_times,
+        section_times=section_times,
+        preset=preset,
+        palette=palette,
+        effect_db=app.config["EFFECT_DB"],
+        workers=app.config["SEQUENCE_WORKERS"],
     )
+    if previous_path:
+        return splice_xsq(
+            xsq_path, previous_path, models, beat_times, duration_ms, reuse=reuse, **kwargs
+        )
+    stats = stream_xsq(xsq_path, models, beat_times, duration_ms, **kwargs)
+    return stats, [], [m.name for m in models]
+
+
+def _write_xsqz(xsqz_path, xsq_path, layout_path, networks_path, audio_path):
+    with zipfile.ZipFile(xsqz_path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.write(xsq_path, arcname=os.path.basename(xsq_path))
+        z.write(layout_path, arcname="xlights_rgbeffects.xml")
+        if networks_path:
+            z.write(networks_path, arcname="xlights_networks.xml")
+        if audio_path and os.path.exists(audio_path):
+            z.write(
+                audio_path,
+                arcname=os.path.join("media", os.path.basename(audio_path)),
+            )
+
 
 @app.post("/generate")
 def generate():
@@ -213,22 +373,16 @@ def generate():
     networks = request.files.get("networks")
     preset = request.form.get("preset", "solid_pulse")
     export_format = request.form.get("export_format", "xsq")
+    analysis_profile = (
+        request.form.get("analysis_profile") or app.config["ANALYSIS_PROFILE"]
+    )
     export_title = (request.form.get("package_title") or "My Sequence").strip()
     safe_title = "".join(ch for ch in export_title if ch not in "\\/:*?\"<>|").strip() or "My Sequence"
-    palette_str = request.form.get("palette", "").strip()
-    palette = None
-    if palette_str:
-        palette = []
-        for part in palette_str.split(","):
-            part = part.strip()
-            if not part:
-                continue
-            if not part.startswith("#"):
-                part = "#" + part
-            if re.fullmatch(r"#([0-9a-fA-F]{6})", part):
-                palette.append(part.upper())
-        if not palette:
-            palette = None
+    palette = _parse_palette(request.form.get("palette", ""))
+    try:
+        window = _parse_window(request.form)
+    except ValueError as e:
+        return jsonify(ok=False, error=str(e)), 400
 
     selected_recs = request.form.get("selected_recommendations")
     try:
@@ -241,6 +395,14 @@ def generate():
             jsonify({"ok": False, "error": "Both layout XML and audio are required."}),
             400,
         )
+    if analysis_profile not in PROFILES:
+        return (
+            jsonify(
+                ok=False,
+                error=f"Analysis profile must be one of: {', '.join(PROFILES)}",
+            ),
+            400,
+        )
 
     ALLOWED_XML = app.config["ALLOWED_XML"]
     ALLOWED_AUDIO = app.config["ALLOWED_AUDIO"]
@@ -297,13 +459,67 @@ def generate():
         networks.save(networks_path)
         extra["networks_bytes"] = os.path.getsize(networks_path)
     app.logger.info("generate_files", extra=extra)
+    try:
+        window = _fit_window(window, audio_path)
+    except ValueError as e:
+        return jsonify(ok=False, error=str(e)), 400
 
     try:
         models = parse_models(xml_path)
     except Exception as e:
         return jsonify({"ok": False, "error": f"Failed to parse XML: {e}"}), 400
 
-    analysis = analyze_beats_plus(audio_path)
+    network_report = None
+    if networks_path:
+        try:
+            controllers = parse_networks(networks_path)
+        except ET.ParseError as e:
+            return jsonify(ok=False, error=f"Failed to parse networks XML: {e}"), 400
+        network_report = network_load(
+            controllers,
+            channel_map(load_layout(xml_path), controllers),
+            frame_ms=app.config["FRAME_MS"],
+            link_mbps=app.config["NETWORK_LINK_MBPS"],
+        )
+        if network_report["warnings"]:
+            app.logger.warning(
+                "network_oversubscribed",
+                extra={"warnings": network_report["warnings"]},
+            )
+
+    analysis_pool = get_analysis_pool()
+    analysis_start = time.time()
+    try:
+        analysis = analysis_pool.run(
+            analyze_beats_plus,
+            audio_path,
+            cache=analysis_cache,
+            profile=analysis_profile,
+            **window,
+        )
+    except AnalysisTimeout as e:
+        app.logger.error(
+            "analysis_timeout",
+            extra={"timeout_s": analysis_pool.timeout, "error": str(e)},
+        )
+        return (
+            jsonify(
+                ok=False,
+                error=f"Audio analysis timed out after {analysis_pool.timeout}s.",
+            ),
+            504,
+        )
+    except WorkerCrashed as e:
+        app.logger.error("analysis_crashed", extra={"error": str(e)})
+        return jsonify(ok=False, error="Audio analysis failed on this file."), 500
+    cache_hit = bool(analysis.get("cache_hit"))
+    app.logger.info(
+        "analysis_complete",
+        extra={
+            "cache_hit": cache_hit,
+            "duration_ms": round((time.time() - analysis_start) * 1000, 2),
+        },
+    )
     duration_ms = int(analysis["duration_s"] * 1000)
     beat_times = analysis["beat_times"]
     downbeat_times = analysis.get("downbeat_times", [])
@@ -317,21 +533,15 @@ def generate():
         {"time": float(t), "label": f"Section {i+1}"}
         for i, t in enumerate(section_times[1:], start=2)
     ]
-    xsq_tree = build_xsq(
-        models,
-        beat_times,
-        duration_ms,
-        downbeat_times=downbeat_times,
-        section_times=section_times,
-        preset=preset,
-    )
     bpm_val = analysis.get("bpm")
 
     job_dir = os.path.join(app.config["OUTPUT_FOLDER"], job)
     os.makedirs(job_dir, exist_ok=True)
 
     xsq_path = os.path.join(job_dir, f"{safe_title}.xsq")
-    write_xsq(xsq_tree, xsq_path)
+    effect_stats, _, _ = _write_sequence(
+        xsq_path, models, beat_times, duration_ms, downbeat_times, section_times, preset, palette
+    )
 
     layout_canonical = os.path.join(job_dir, "xlights_rgbeffects.xml")
     shutil.copyfile(xml_path, layout_canonical)
@@ -342,16 +552,7 @@ def generate():
     download_path = xsq_path
     if export_format == "xsqz":
         xsqz_path = os.path.join(job_dir, f"{safe_title}.xsqz")
-        with zipfile.ZipFile(xsqz_path, "w", zipfile.ZIP_DEFLATED) as z:
-            z.write(xsq_path, arcname=os.path.basename(xsq_path))
-            z.write(layout_canonical, arcname="xlights_rgbeffects.xml")
-            if networks_path:
-                z.write(networks_path, arcname="xlights_networks.xml")
-            if os.path.exists(audio_path):
-                z.write(
-                    audio_path,
-                    arcname=os.path.join("media", os.path.basename(audio_path)),
-                )
+        _write_xsqz(xsqz_path, xsq_path, layout_canonical, networks_path, audio_path)
         download_name, download_path = os.path.basename(xsqz_path), xsqz_path
 
     with open(os.path.join(job_dir, "metadata.json"), "w", encoding="utf-8") as f:
@@ -362,14 +563,20 @@ def generate():
                 "durationMs": duration_ms,
                 "models": [m.__dict__ for m in models],
                 "preset": preset,
+                "palette": palette,
+                "analysis_profile": analysis_profile,
                 "export_format": export_format,
                 "title": export_title,
                 "safe_title": safe_title,
                 "has_networks": bool(networks_path),
                 "has_media": os.path.exists(audio_path),
+                "audio_file": os.path.basename(audio_path),
                 "version": APP_VERSION,
                 "downbeat_times": downbeat_times,
                 "section_times": section_times,
+                "window": window or None,
+                "effect_db": effect_stats,
+                "network_load": network_report,
             },
             f,
             indent=2,
@@ -403,6 +610,12 @@ def generate():
             "selectedModelCount": selected_model_count,
             "totalModelCount": total_model_count,
             "version": APP_VERSION,
+            "analysisProfile": analysis_profile,
+            "analysisCacheHit": cache_hit,
+            "compressionRatio": effect_stats["compression_ratio"] if effect_stats else None,
+            "window": window or None,
+            "networkLoad": network_report,
+            "networkWarnings": network_report["warnings"] if network_report else [],
             "exportFormat": export_format,
             "title": export_title,
             "downloadUrl": f"/download/{job}/{download_name}",
@@ -410,6 +623,150 @@ def generate():
     )
 
 
+@app.post("/regenerate/<job>")
+def regenerate(job):
+    """Re-run effect generation for an existing job with a new preset/palette.
+
+    The parsed models and audio analysis come from the job's metadata.json
+    and preview.json, so nothing is uploaded, parsed or analyzed again.
+    Artifacts are only rewritten when their content changes.
+
+    An optional ``layout`` upload replaces the job's layout. It is diffed
+    against the previous models and, unless the preset or palette changed
+    too, only added and changed models are generated; the rest are copied
+    from the previous sequence.
+    """
+    start = time.time()
+    try:
+        uuid.UUID(job)
+    except ValueError:
+        return jsonify(ok=False, error="Unknown job"), 404
+    job_dir = os.path.join(app.config["OUTPUT_FOLDER"], job)
+    meta_path = os.path.join(job_dir, "metadata.json")
+    preview_path = os.path.join(job_dir, "preview.json")
+    if not (os.path.isfile(meta_path) and os.path.isfile(preview_path)):
+        return jsonify(ok=False, error="Unknown job"), 404
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(preview_path, "r", encoding="utf-8") as f:
+        beat_times = json.load(f).get("beatTimes", [])
+
+    preset = request.form.get("preset") or meta.get("preset", "solid_pulse")
+    if "palette" in request.form:
+        palette = _parse_palette(request.form["palette"])
+    else:
+        palette = meta.get("palette")
+    models = [ModelInfo(**m) for m in meta.get("models", [])]
+    safe_title = meta.get("safe_title", "My Sequence")
+    export_format = meta.get("export_format", "xsq")
+
+    rewritten = []
+    xsq_path = os.path.join(job_dir, f"{safe_title}.xsq")
+    layout_path = os.path.join(job_dir, "xlights_rgbeffects.xml")
+    layout = request.files.get("layout")
+    layout_diff = None
+    if layout and layout.filename:
+        if not layout.filename.lower().endswith(".xml"):
+            return jsonify(ok=False, error="Layout must be .xml"), 400
+        new_layout = f"{layout_path}.{uuid.uuid4().hex}.new"
+        layout.save(new_layout)
+        try:
+            new_models = parse_models(new_layout)
+        except Exception as e:
+            os.remove(new_layout)
+            return jsonify({"ok": False, "error": f"Failed to parse XML: {e}"}), 400
+        layout_diff = diff_models(models, new_models)
+        models = new_models
+        if os.path.isfile(layout_path) and filecmp.cmp(new_layout, layout_path, shallow=False):
+            os.remove(new_layout)
+        else:
+            os.replace(new_layout, layout_path)
+            rewritten.append(os.path.basename(layout_path))
+
+    previous_path = None
+    if (
+        layout_diff is not None
+        and os.path.isfile(xsq_path)
+        and preset == meta.get("preset")
+        and palette == meta.get("palette")
+    ):
+        previous_path = xsq_path
+    new_path = f"{xsq_path}.{uuid.uuid4().hex}.new"
+    effect_stats, reused, rebuilt = _write_sequence(
+        new_path,
+        models,
+        beat_times,
+        meta["durationMs"],
+        meta.get("downbeat_times", []),
+        meta.get("section_times", []),
+        preset,
+        palette,
+        previous_path=previous_path,
+        reuse=layout_diff.unchanged if layout_diff else (),
+    )
+    if os.path.isfile(xsq_path) and filecmp.cmp(new_path, xsq_path, shallow=False):
+        os.remove(new_path)
+    else:
+        os.replace(new_path, xsq_path)
+        rewritten.insert(0, os.path.basename(xsq_path))
+
+    download_name = os.path.basename(xsq_path)
+    if export_format == "xsqz":
+        xsqz_path = os.path.join(job_dir, f"{safe_title}.xsqz")
+        if rewritten or not os.path.isfile(xsqz_path):
+            networks_path = os.path.join(job_dir, "xlights_networks.xml")
+            audio_file = meta.get("audio_file")
+            _write_xsqz(
+                xsqz_path,
+                xsq_path,
+                layout_path,
+                networks_path if meta.get("has_networks") else None,
+                os.path.join(app.config["UPLOAD_FOLDER"], audio_file) if audio_file else None,
+            )
+            rewritten.append(os.path.basename(xsqz_path))
+        download_name = os.path.basename(xsqz_path)
+
+    new_meta = {
+        **meta,
+        "models": [m.__dict__ for m in models],
+        "preset": preset,
+        "palette": palette,
+        "effect_db": effect_stats,
+    }
+    if new_meta != meta:
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(new_meta, f, indent=2)
+        rewritten.append("metadata.json")
+
+    elapsed_ms = round((time.time() - start) * 1000, 2)
+    app.logger.info(
+        "regenerate_complete",
+        extra={"path": request.path, "ip": request.remote_addr, "duration_ms": elapsed_ms},
+    )
+    return jsonify(
+        {
+            "ok": True,
+            "jobId": job,
+            "bpm": meta.get("bpm"),
+            "durationMs": meta["durationMs"],
+            "beatCount": len(beat_times),
+            "modelCount": len(models),
+            "preset": preset,
+            "palette": palette,
+            "version": APP_VERSION,
+            "compressionRatio": effect_stats["compression_ratio"] if effect_stats else None,
+            "exportFormat": export_format,
+            "layoutDiff": layout_diff.to_dict() if layout_diff else None,
+            "reusedModels": reused,
+            "rebuiltModels": rebuilt,
+            "rewritten": rewritten,
+            "unchanged": sorted(set(os.listdir(job_dir)) - set(rewritten)),
+            "elapsedMs": elapsed_ms,
+            "downloadUrl": f"/download/{job}/{download_name}",
+        }
+    )
+
+
 @app.get("/preview.json")
 def preview():
     job = request.args.get("job")
@@ -494,4 +851,5 @@ def download(job):
     return send_file(out_zip, as_attachment=True, download_name=f"xlights_{job}.zip")
 
 if __name__ == "__main__":
+    get_analysis_pool()
     app.run(host="0.0.0.0", port=5000)
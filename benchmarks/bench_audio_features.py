@@ -0,0 +1,82 @@
+"""Compare the legacy per-analyzer pipeline with single-pass extraction.
+
+Synthesizes a click track (default 4 minutes at 44.1 kHz), then times
+
+* ``legacy``: the three analyzers as they were before shared extraction,
+  each decoding the file and running its own onset/beat-tracking passes;
+* ``shared``: one :func:`extract_features` call plus the three views.
+
+Usage: ``python benchmarks/bench_audio_features.py [seconds]``
+"""
+import os, sys, tempfile, time
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.audio import (
+    beats_from_features,
+    beats_plus_from_features,
+    extract_features,
+    retime_intel,
+)
+
+
+def synth_track(path, seconds, sr=44100, bpm=120.0):
+    rng = np.random.default_rng(0)
+    y = 0.05 * rng.standard_normal(int(seconds * sr)).astype(np.float32)
+    click = np.hanning(256).astype(np.float32)
+    for t in np.arange(0.0, seconds, 60.0 / bpm):
+        i = int(t * sr)
+        y[i : i + len(click)] += click[: len(y) - i]
+    sf.write(path, y, sr)
+
+
+def legacy(path):
+    # analyze_beats
+    y, sr = librosa.load(path, mono=True)
+    _, frames = librosa.beat.beat_track(y=y, sr=sr, trim=True)
+    librosa.onset.onset_strength(y=y, sr=sr)
+    # analyze_beats_plus
+    y, sr = librosa.load(path, mono=True)
+    librosa.beat.beat_track(y=y, sr=sr, units="time", trim=True)
+    env = librosa.onset.onset_strength(y=y, sr=sr)
+    librosa.beat.beat_track(onset_envelope=env, sr=sr, trim=True)
+    # analyze_intel
+    y, sr = librosa.load(path, mono=True)
+    librosa.beat.beat_track(y=y, sr=sr, units="time", trim=True)
+
+
+def shared(path):
+    features = extract_features(path)
+    beats_from_features(features)
+    beats_plus_from_features(features)
+    retime_intel(features, {})
+
+
+def best_of(fn, path, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(path)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 240.0
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "track.wav")
+        synth_track(path, seconds)
+        shared(path)  # warm up numba before timing either side
+        t_legacy = best_of(legacy, path)
+        t_shared = best_of(shared, path)
+    print(f"track: {seconds:.0f}s")
+    print(f"legacy (3 analyzers): {t_legacy:.2f}s")
+    print(f"shared (1 extraction + 3 views): {t_shared:.2f}s")
+    print(f"speedup: {t_legacy / t_shared:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
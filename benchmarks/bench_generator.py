@@ -0,0 +1,104 @@
+"""Time build_rgbeffects as layouts and songs grow.
+
+For each ``models x beats`` size this reports
+
+* ``legacy``: the per-model, per-beat downbeat/section scan the generator
+  used before the beat schedule was shared (classification only, no XML);
+* ``schedule``: one :func:`beat_schedule` call covering every model;
+* ``build``: the full :func:`build_rgbeffects` tree, XML included;
+* ``stream``: :func:`stream_rgbeffects` writing the same document to a
+  temporary file without building the tree.
+
+* ``parallel``: :func:`stream_rgbeffects` with ``--workers N`` processes
+  (only when ``N > 1``); the output is checked against the serial file.
+
+The legacy scan is O(models x beats x downbeats) and is skipped once it would
+take minutes; pass ``--legacy`` to run it at every size anyway.
+
+Usage: ``python benchmarks/bench_generator.py [--legacy] [--workers N]``
+"""
+import os, shutil, sys, tempfile, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.generator import (
+    DOWNBEAT_INTERVAL,
+    beat_schedule,
+    build_rgbeffects,
+    stream_rgbeffects,
+)
+from xlights_seq.parsers import ModelInfo
+
+SIZES = [(100, 500), (300, 500), (300, 1000), (1000, 2000)]
+LEGACY_MAX_WORK = 1e9  # models * beats * downbeats
+
+
+def song(n_beats, bpm=120.0):
+    beat_times = [i * 60.0 / bpm for i in range(n_beats)]
+    downbeat_times = beat_times[::4]
+    section_times = beat_times[:: max(1, n_beats // 8)]
+    duration_ms = int((beat_times[-1] + 60.0 / bpm) * 1000)
+    return beat_times, downbeat_times, section_times, duration_ms
+
+
+def legacy_classify(n_models, beat_times, duration_ms, downbeat_times, section_times):
+    downbeat_ms = [int(dt * 1000) for dt in downbeat_times]
+    section_indices = []
+    for st in section_times:
+        for idx, bt in enumerate(beat_times):
+            if bt + 1e-3 >= st:
+                section_indices.append(idx)
+                break
+    for _ in range(n_models):
+        for i, bt in enumerate(beat_times):
+            start = int(bt * 1000)
+            end = int(beat_times[i + 1] * 1000) if i + 1 < len(beat_times) else duration_ms
+            any(start <= db < end for db in downbeat_ms)
+            any(si <= i < si + DOWNBEAT_INTERVAL for si in section_indices)
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def main():
+    argv = sys.argv[1:]
+    run_legacy = "--legacy" in argv
+    workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else 1
+    tmp = tempfile.mkdtemp()
+    out_path = os.path.join(tmp, "xlights_rgbeffects.xml")
+    parallel_path = os.path.join(tmp, "parallel.xml")
+    print(
+        f"{'models':>7} {'beats':>6} {'legacy':>9} {'schedule':>9}"
+        f" {'build':>8} {'stream':>8} {'parallel':>9} {'per effect':>11}"
+    )
+    for n_models, n_beats in SIZES:
+        beat_times, downbeat_times, section_times, duration_ms = song(n_beats)
+        models = [ModelInfo(name=f"Model {i}", nodes=50, strings=8) for i in range(n_models)]
+
+        if run_legacy or n_models * n_beats * len(downbeat_times) <= LEGACY_MAX_WORK:
+            legacy = f"{timed(legacy_classify, n_models, beat_times, duration_ms, downbeat_times, section_times):8.2f}s"
+        else:
+            legacy = "skipped"
+        schedule = timed(beat_schedule, beat_times, duration_ms, 4, downbeat_times, section_times)
+        args = (models, beat_times, duration_ms, "solid_pulse")
+        kwargs = dict(downbeat_times=downbeat_times, section_times=section_times)
+        build = timed(build_rgbeffects, *args, **kwargs)
+        stream = timed(stream_rgbeffects, out_path, *args, **kwargs)
+        parallel = "-"
+        if workers > 1:
+            t = timed(stream_rgbeffects, parallel_path, *args, workers=workers, **kwargs)
+            with open(out_path, "rb") as a, open(parallel_path, "rb") as b:
+                assert a.read() == b.read(), "parallel output differs"
+            parallel = f"{t:8.2f}s"
+        per_effect_us = stream / (n_models * n_beats) * 1e6
+        print(
+            f"{n_models:>7} {n_beats:>6} {legacy:>9} {schedule * 1000:>7.2f}ms"
+            f" {build:>7.2f}s {stream:>7.2f}s {parallel:>9} {per_effect_us:>9.2f}us"
+        )
+    shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
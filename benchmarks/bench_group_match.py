@@ -0,0 +1,81 @@
+"""Time style-group to layout-group mapping against large layouts.
+
+Synthesizes ``G`` layout group names (default 5000) from prop words,
+sides and numbers, and a plan of 500 style group labels (mostly repeats of
+a few dozen, as cue lists are). Then times
+
+* ``legacy``: the previous ``map_style_groups_to_layout``, a substring
+  scan of every normalized layout name per candidate (first hit wins);
+* ``build``: building a :class:`GroupMatcher` (once per layout);
+* ``map``: :meth:`GroupMatcher.map` of the plan on a fresh matcher;
+* ``cached``: the same plan again (labels memoized).
+
+``agree`` is how many labels both map to the same group; they differ
+where a better scored match exists or the trigram fallback finds one.
+
+Usage: ``python benchmarks/bench_group_match.py [G ...]``
+"""
+import os, random, re, sys, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.group_match import GroupMatcher, _norm
+
+PROPS = ["Arch", "Tree", "Mega Tree", "Star", "Spinner", "Window", "Roof", "Matrix", "Bush", "Candy Cane", "Snowflake", "Garage", "Porch", "Eave"]
+SIDES = ["Left", "Right", "Front", "Back", "Upper", "Lower", "All"]
+LABELS = [
+    "Focal_Tree", "Metronome_Outlines", "Focal_Spinners", "Arches/Tree", "Roof - Eaves",
+    "Garage/Porch", "Windows", "Candy_Canes", "Mega Trees", "Matrix Panel", "Snowflakes",
+    "Bushes - Left", "Stars", "Outline", "Porch Rail", "Spinner 3", "Tree 12",
+]
+
+
+def legacy(style_group_names, layout_groups):
+    norm_layout = {_norm(g): g for g in layout_groups}
+    out = {}
+    for sg in style_group_names:
+        candidates = [p.strip() for p in re.split(r"[,/•–-]", sg) if p.strip()]
+        best = None
+        for c in candidates:
+            n = _norm(c)
+            for k, orig in norm_layout.items():
+                if n and n in k:
+                    best = orig
+                    break
+            if best:
+                break
+        if best:
+            out[sg] = best
+    return out
+
+
+def synth(n_groups, n_labels=500, seed=0):
+    rnd = random.Random(seed)
+    groups = [f"{rnd.choice(PROPS)} {rnd.choice(SIDES)} {i}" for i in range(n_groups)]
+    labels = [rnd.choice(LABELS) + ("" if rnd.random() < 0.8 else f" {rnd.randrange(50)}") for _ in range(n_labels)]
+    return groups, labels
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [5000]
+    print(f"{'groups':>7} {'labels':>6} {'legacy':>9} {'build':>9} {'map':>9} {'cached':>9} {'agree':>6}")
+    for n in sizes:
+        groups, labels = synth(n)
+        t_legacy, old = timed(legacy, labels, groups)
+        t_build, matcher = timed(GroupMatcher, groups)
+        t_map, new = timed(matcher.map, labels)
+        t_cached, _ = timed(matcher.map, labels)
+        agree = sum(old.get(label) == new.get(label) for label in set(labels))
+        print(
+            f"{n:>7} {len(labels):>6} {t_legacy * 1000:>7.1f}ms {t_build * 1000:>7.1f}ms"
+            f" {t_map * 1000:>7.1f}ms {t_cached * 1000:>7.2f}ms {agree:>3}/{len(set(labels))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
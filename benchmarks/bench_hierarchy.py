@@ -0,0 +1,97 @@
+"""Time layout hierarchy construction on large, deeply nested layouts.
+
+Synthesizes a layout of ``N`` models (default 6000) in groups of 50, with
+every group nested in a chain ``Level 0 > Level 1 > ...`` (one level per
+group, so 120 deep for 6000 models) and an ``Everything`` group listing
+all models. Then times, on an already loaded :class:`LayoutIndex`,
+
+* ``legacy tree``: the previous ``parse_tree`` construction, which checked
+  ``child not in children`` against a list for every CSV member
+  (quadratic in group size, and comparing dataclasses field by field);
+* ``tree`` / ``tree_with_index``: the current views, which also nest the
+  groups;
+* ``expand``: :class:`GroupHierarchy` closure of every group (what
+  ``compile_intents`` needs), from scratch.
+
+Usage: ``python benchmarks/bench_hierarchy.py [N ...]`` (default 6000)
+"""
+import os, sys, tempfile, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.hierarchy import GroupHierarchy
+from xlights_seq.parsers import LayoutIndex, NodeInfo, _digits
+
+GROUP_SIZE = 50
+
+
+def synth_layout(path, n_models):
+    n_groups = n_models // GROUP_SIZE
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<xrgb><models>\n")
+        for i in range(n_models):
+            f.write(f'<model name="Prop {i}" StringCount="{1 + i % 4}" Nodes="{50 + i % 100}"/>\n')
+        f.write("</models><groups>\n")
+        for g in range(n_groups):
+            members = [f"Prop {m}" for m in range(g * GROUP_SIZE, (g + 1) * GROUP_SIZE)]
+            if g + 1 < n_groups:
+                members.append(f"Level {g + 1}")
+            f.write(f'<group name="Level {g}" members="{",".join(members)}"/>\n')
+        everything = ",".join(f"Prop {m}" for m in range(n_models))
+        f.write(f'<group name="Everything" members="{everything}"/>\n')
+        f.write("</groups></xrgb>\n")
+    return n_groups
+
+
+def legacy_tree(index):
+    models_index = {}
+    top = NodeInfo(name="ROOT", type="group")
+    for rec in index.models:
+        if rec.name:
+            models_index[rec.name] = NodeInfo(
+                name=rec.name, type="model", strings=_digits(rec.strings), nodes=_digits(rec.nodes)
+            )
+    groups = []
+    for g in index.groups:
+        if not g.name:
+            continue
+        node = NodeInfo(name=g.name, type="group")
+        for ref, _ in g.members:
+            if ref and ref in models_index:
+                node.children.append(models_index[ref])
+        for ref in [x.strip() for x in g.members_csv.split(",") if x.strip()]:
+            if ref in models_index and models_index[ref] not in node.children:
+                node.children.append(models_index[ref])
+        groups.append(node)
+    grouped_names = {c.name for gg in groups for c in gg.children}
+    for m in list(models_index.values()):
+        if m.name not in grouped_names:
+            top.children.append(m)
+    top.children.extend(groups)
+    return top
+
+
+def expand(index):
+    h = GroupHierarchy(index.groups_and_models()[2])
+    return sum(len(h.models_under(g)) for g in h.members)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [6000]
+    print(f"{'models':>7} {'depth':>6} {'legacy tree':>12} {'tree':>8} {'with_index':>11} {'expand':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "layout.xml")
+            depth = synth_layout(path, n)
+            index = LayoutIndex.from_file(path)
+        times = [timed(f, index) for f in (legacy_tree, LayoutIndex.tree, LayoutIndex.tree_with_index, expand)]
+        print(f"{n:>7} {depth:>6} {times[0]:>11.2f}s {times[1]:>7.3f}s {times[2]:>10.3f}s {times[3]:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Time build_xsq_from_intents as the number of intents grows.
+
+Synthesizes a plan of ``N`` intents spread over 50 layout groups of 8 models
+each (overlapping membership), then times
+
+* ``legacy``: the previous builder, which looked up each member model and
+  layer with ``root.find`` for every intent (quadratic, so
+  skipped above 2k intents);
+* ``compiled``: the dict-indexed :func:`build_xsq_from_intents`, including
+  layer allocation for overlapping intents;
+* ``merged``: the same with ``merge=True`` (adjacent identical effects
+  joined first);
+* ``stream``: :func:`stream_xsq_from_intents` to a temporary file.
+
+``layers`` is the most effect layers any model needed.
+
+Usage: ``python benchmarks/bench_intents.py [N ...]`` (default 2000 10000 100000)
+"""
+import os, random, sys, tempfile, time
+import xml.etree.ElementTree as ET
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.intel_engine import Intent
+from xlights_seq.xsq_writer import build_xsq_from_intents, stream_xsq_from_intents
+
+LEGACY_MAX_INTENTS = 2000
+EFFECTS = ["On", "Spirals", "Shockwave", "Bars", "SingleStrand"]
+
+
+def synth_plan(n_intents, n_groups=50, group_size=8, seed=0):
+    rnd = random.Random(seed)
+    models = [f"Model {i}" for i in range(n_groups * group_size // 2)]
+    models_by_group = {f"Group {g}": rnd.sample(models, group_size) for g in range(n_groups)}
+    intents = []
+    for _ in range(n_intents):
+        start = round(rnd.uniform(0, 240), 3)
+        intents.append(
+            Intent(
+                "SG",
+                f"Group {rnd.randrange(n_groups)}",
+                rnd.choice(EFFECTS),
+                start,
+                start + rnd.uniform(0.1, 2.0),
+                {"color": rnd.choice(["#FF0000", "#00FF00", "#FFFFFF"])},
+            )
+        )
+    timing = {"beats": [i * 0.5 for i in range(480)], "downbeats": [], "bars": [], "sections": []}
+    return models_by_group, timing, intents
+
+
+def legacy_build(models_by_group, timing, intents, duration_s):
+    root = ET.Element("xseq", version="2024.05")
+    for intent in intents:
+        for model_name in models_by_group.get(intent.layout_group, []):
+            mdl = root.find(f".//model[@name='{model_name}']")
+            if mdl is None:
+                mdl = ET.SubElement(root, "model", name=model_name)
+            layer = mdl.find(".//effectLayer[@name='Layer 1']")
+            if layer is None:
+                layer = ET.SubElement(mdl, "effectLayer", name="Layer 1")
+            e = ET.SubElement(
+                layer,
+                "effect",
+                startMS=str(int(intent.start_s * 1000)),
+                endMS=str(int(intent.end_s * 1000)),
+                type=intent.effect,
+            )
+            for k, v in (intent.params or {}).items():
+                ET.SubElement(e, "param", name=str(k), value=str(v))
+    return ET.ElementTree(root)
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [2000, 10000, 100000]
+    out_path = os.path.join(tempfile.mkdtemp(), "intents.xsq")
+    print(
+        f"{'intents':>8} {'effects':>8} {'legacy':>9} {'compiled':>9}"
+        f" {'merged':>8} {'stream':>8} {'layers':>7}"
+    )
+    for n in sizes:
+        models_by_group, timing, intents = synth_plan(n)
+        args = (models_by_group, timing, intents, 240.0)
+        n_effects = sum(len(models_by_group[i.layout_group]) for i in intents)
+        legacy = f"{timed(legacy_build, *args):8.2f}s" if n <= LEGACY_MAX_INTENTS else "skipped"
+        compiled = timed(build_xsq_from_intents, *args)
+        merged = timed(build_xsq_from_intents, *args, merge=True)
+        stream = timed(stream_xsq_from_intents, out_path, *args)
+        layers = max(
+            len(m.findall("effectLayer")) for m in ET.parse(out_path).getroot().iter("model")
+        )
+        print(
+            f"{n:>8} {n_effects:>8} {legacy:>9} {compiled:>8.2f}s"
+            f" {merged:>7.2f}s {stream:>7.2f}s {layers:>7}"
+        )
+    os.remove(out_path)
+
+
+if __name__ == "__main__":
+    main()
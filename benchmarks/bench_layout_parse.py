@@ -0,0 +1,105 @@
+"""Compare peak memory and time of DOM and streaming layout parsing.
+
+Writes a synthetic ``xlights_rgbeffects.xml`` of about ``MB`` megabytes
+(default 200) whose models carry what real layouts do: a large
+``CustomModel`` grid, submodels, faces and states. Then, each in a fresh
+process so peak RSS is its own, it times
+
+* ``dom``: the previous parsers, ``ET.parse`` of the whole file for
+  ``parse_models`` and again for ``extract_model_nodes`` (as /generate and
+  /render-layout did);
+* ``stream``: :func:`load_layout` (``ET.iterparse``, elements dropped as
+  they end) and the same two views of the index.
+
+``rss`` is the process's peak resident set size, interpreter included.
+
+Usage: ``python benchmarks/bench_layout_parse.py [MB]``
+"""
+import os, resource, subprocess, sys, tempfile, time
+import xml.etree.ElementTree as ET
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.parsers import _attr, load_layout
+
+GRID = ",".join([";".join(str(i) for i in range(40))] * 25)  # ~2.7 KB CustomModel
+
+
+def synth_layout(path, megabytes):
+    target = megabytes * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<xrgb><models>\n')
+        i = 0
+        while f.tell() < target:
+            f.write(
+                f'<model name="Prop {i}" DisplayAs="Custom" StringCount="{1 + i % 8}" '
+                f'Nodes="{50 + i % 500}" WorldPosX="{i % 1000}.5" WorldPosY="{i // 1000}.25" '
+                f'ScaleX="1.0" ScaleY="1.0" CustomModel="{GRID}">'
+                + "".join(f'<subModel name="Sub {s}" line0="{s * 10 + 1}-{s * 10 + 10}"/>' for s in range(6))
+                + '<faceInfo Name="Singing" Type="NodeRange" FaceOutline="1-20" Mouth-AI="21-30"/>'
+                + '<stateInfo Name="Colors" Type="SingleNode" s1="1-5" s1-Color="#FF0000"/>'
+                + (f'<node x="{i}" y="0"/><node x="{i}" y="1"/>' if i % 10 == 0 else "")
+                + "</model>\n"
+            )
+            i += 1
+        f.write("</models><modelGroups>\n")
+        for g in range(0, i, 100):
+            members = ",".join(f"Prop {m}" for m in range(g, min(i, g + 100)))
+            f.write(f'<modelGroup name="Group {g // 100}" models="{members}"/>\n')
+        f.write("</modelGroups></xrgb>\n")
+    return i
+
+
+def dom(path):
+    # parse_models and extract_model_nodes as they were: one ET.parse each
+    models = []
+    for m in ET.parse(path).getroot().findall(".//model"):
+        name = m.get("name") or m.get("Model") or m.get("Name")
+        if name:
+            models.append((name, m.get("StringCount") or m.get("strings"), m.get("Nodes") or m.get("nodes")))
+    points = {}
+    for m in ET.parse(path).getroot().findall(".//model"):
+        name = m.get("name") or m.get("Model") or m.get("Name")
+        if name:
+            points[name] = [
+                (float(_attr(n, "x")), float(_attr(n, "y"))) for n in m.findall(".//node")
+            ]
+    return len(models), sum(len(p) for p in points.values())
+
+
+def stream(path):
+    index = load_layout(path)
+    return len(index.model_infos()), sum(len(p) for p in index.model_nodes().values())
+
+
+def run_child(mode, path):
+    t0 = time.perf_counter()
+    counts = {"dom": dom, "stream": stream}[mode](path)
+    elapsed = time.perf_counter() - t0
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {rss_mb:.1f} {counts[0]} {counts[1]}")
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "xlights_rgbeffects.xml")
+        n_models = synth_layout(path, megabytes)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"layout: {size_mb:.0f} MB, {n_models} models")
+        print(f"{'parser':>8} {'time':>9} {'rss':>10} {'models':>8} {'nodes':>7}")
+        for mode in ("dom", "stream"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, path],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            elapsed, rss, models, nodes = float(out[0]), float(out[1]), out[2], out[3]
+            print(f"{mode:>8} {elapsed:>8.2f}s {rss:>7.0f} MB {models:>8} {nodes:>7}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        run_child(sys.argv[2], sys.argv[3])
+    else:
+        main()
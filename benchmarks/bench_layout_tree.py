@@ -0,0 +1,90 @@
+"""Compare NodeInfo and array-backed layout trees for /inspect-layout.
+
+Synthesizes a layout of ``N`` models (default 50000) in groups of 50, the
+groups nested ten to a parent, and a loaded :class:`LayoutIndex` of it.
+Then times and measures (``tracemalloc`` peak, so allocations of this
+step only) producing the ``/inspect-layout`` JSON:
+
+* ``nodeinfo``: ``index.tree()``, a recursive ``to_dict`` and
+  ``json.dumps`` of the result, as the endpoint did;
+* ``compact``: ``index.compact_tree()`` and its chunks from
+  ``iter_json`` (consumed one at a time, as a streamed response is);
+* ``cached``: the same again on an index whose tree is already built
+  (a repeat upload of the layout).
+
+Times are measured without tracing; ``peak`` comes from a second run.
+
+Usage: ``python benchmarks/bench_layout_tree.py [N ...]`` (default 50000)
+"""
+import json, os, sys, tempfile, time, tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlights_seq.parsers import LayoutIndex
+
+GROUP_SIZE = 50
+FAN_OUT = 10
+
+
+def synth_layout(path, n_models):
+    n_groups = n_models // GROUP_SIZE
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<xrgb><models>\n")
+        for i in range(n_models):
+            f.write(f'<model name="Prop {i}" StringCount="{1 + i % 4}" Nodes="{50 + i % 100}"/>\n')
+        f.write("</models><groups>\n")
+        for g in range(n_groups):
+            members = [f"Prop {m}" for m in range(g * GROUP_SIZE, (g + 1) * GROUP_SIZE)]
+            members += [f"Group {c}" for c in range(g * FAN_OUT + 1, min(n_groups, (g + 1) * FAN_OUT + 1))]
+            f.write(f'<group name="Group {g}" members="{",".join(members)}"/>\n')
+        f.write("</groups></xrgb>\n")
+
+
+def nodeinfo(index):
+    def to_dict(n):
+        return {
+            "name": n.name,
+            "type": n.type,
+            "strings": n.strings,
+            "nodes": n.nodes,
+            "children": [to_dict(c) for c in n.children],
+        }
+
+    return len(json.dumps(to_dict(index.tree())))
+
+
+def compact(index):
+    return sum(len(chunk) for chunk in index.compact_tree().iter_json())
+
+
+def measure(fn, index):
+    t0 = time.perf_counter()
+    size = fn(index)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn(LayoutIndex(index.models, index.groups))  # fresh, nothing cached
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, size
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [50000]
+    print(f"{'models':>7} {'nodes':>7} {'tree':>9} {'time':>8} {'peak':>9} {'json':>9}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "layout.xml")
+            synth_layout(path, n)
+            index = LayoutIndex.from_file(path)
+        n_nodes = len(index.compact_tree())
+        for fn in (nodeinfo, compact):
+            elapsed, peak, size = measure(fn, LayoutIndex(index.models, index.groups))
+            print(
+                f"{n:>7} {n_nodes:>7} {fn.__name__:>9} {elapsed:>7.2f}s {peak:>6.1f} MB"
+                f" {size / 1024 / 1024:>6.1f} MB"
+            )
+        elapsed, _, _ = measure(compact, index)
+        print(f"{n:>7} {n_nodes:>7} {'cached':>9} {elapsed:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Accuracy-vs-time comparison of the analysis profiles.
+
+Synthesizes a click track with known beat positions (default 4 minutes at
+44.1 kHz, 120 BPM), runs :func:`extract_features` with each profile and
+reports wall time, tempo error and beat F-measure (±70 ms tolerance).
+
+Usage: ``python benchmarks/bench_profiles.py [seconds]``
+"""
+import os, sys, tempfile, time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_audio_features import synth_track
+from xlights_seq.audio import PROFILES, extract_features
+
+BPM = 120.0
+TOLERANCE_S = 0.07
+
+
+def f_measure(estimated, reference, tol=TOLERANCE_S):
+    if not len(estimated) or not len(reference):
+        return 0.0
+    idx = np.clip(np.searchsorted(reference, estimated), 1, len(reference) - 1)
+    nearest = np.minimum(
+        np.abs(estimated - reference[idx - 1]), np.abs(estimated - reference[idx])
+    )
+    hits = int(np.count_nonzero(nearest <= tol))
+    precision = hits / len(estimated)
+    recall = min(hits, len(reference)) / len(reference)
+    return 0.0 if hits == 0 else 2 * precision * recall / (precision + recall)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 240.0
+    reference = np.arange(0.0, seconds, 60.0 / BPM)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "track.wav")
+        synth_track(path, seconds, bpm=BPM)
+        print(f"track: {seconds:.0f}s @ {BPM:.0f} BPM")
+        print(f"{'profile':<10} {'time':>7} {'tempo':>8} {'F':>6}")
+        for name in PROFILES:
+            extract_features(path, profile=name)  # warm up JIT for this hop/sr
+            t0 = time.perf_counter()
+            features = extract_features(path, profile=name)
+            elapsed = time.perf_counter() - t0
+            score = f_measure(features.beat_times, reference)
+            print(f"{name:<10} {elapsed:>6.2f}s {features.tempo:>8.2f} {score:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
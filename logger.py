@@ -26,6 +26,9 @@ class JsonFormatter(logging.Formatter):
                 "layout_bytes",
                 "audio_bytes",
                 "bpm",
+                "cache_hit",
+                "timeout_s",
+                "warnings",
             }:
                 log[key] = value
         return json.dumps(log)
@@ -2,14 +2,15 @@ import numpy as np
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import librosa
-from xlights_seq.audio import analyze_beats, analyze_beats_plus, analyze_intel
+import pytest
+from xlights_seq.audio import PROFILES, analyze_beats, analyze_beats_plus, analyze_intel
 
 
 def test_analyze_beats_mocked(monkeypatch):
-    monkeypatch.setattr(librosa, "load", lambda path, mono: (np.zeros(4), 22050))
-    monkeypatch.setattr(librosa.beat, "beat_track", lambda y, sr, trim: (120.0, np.array([0,1,2,3])))
-    monkeypatch.setattr(librosa, "frames_to_time", lambda frames, sr: np.array([0.0,0.5,1.0,1.5]))
-    monkeypatch.setattr(librosa.onset, "onset_strength", lambda y, sr: np.array([0.1,0.2,0.8,0.4]))
+    monkeypatch.setattr(librosa, "load", lambda path, **kwargs: (np.zeros(4), 22050))
+    monkeypatch.setattr(librosa.beat, "beat_track", lambda **kwargs: (120.0, np.array([0,1,2,3])))
+    monkeypatch.setattr(librosa, "frames_to_time", lambda frames, **kwargs: np.array([0.0,0.5,1.0,1.5]))
+    monkeypatch.setattr(librosa.onset, "onset_strength", lambda **kwargs: np.array([0.1,0.2,0.8,0.4]))
     monkeypatch.setattr(librosa, "get_duration", lambda y, sr: 2.0)
 
     result = analyze_beats("dummy.wav")
@@ -21,19 +22,20 @@ def test_analyze_beats_mocked(monkeypatch):
 
 
 def test_analyze_beats_plus_mocked(monkeypatch):
-    monkeypatch.setattr(librosa, "load", lambda path, mono: (np.zeros(4), 22050))
+    monkeypatch.setattr(librosa, "load", lambda path, **kwargs: (np.zeros(4), 22050))
+
+    calls = []
 
     def fake_beat_track(*args, **kwargs):
-        if kwargs.get("units") == "time":
-            return 120.0, np.array([0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5])
+        calls.append(kwargs)
         return 120.0, np.array([0, 1, 2, 3, 4, 5, 6, 7])
 
     monkeypatch.setattr(librosa.beat, "beat_track", fake_beat_track)
     monkeypatch.setattr(
-        librosa.onset, "onset_strength", lambda y, sr: np.array([0.1, 0.2, 0.8, 0.4])
+        librosa.onset, "onset_strength", lambda **kwargs: np.array([0.1, 0.2, 0.8, 0.4])
     )
     monkeypatch.setattr(
-        librosa, "frames_to_time", lambda frames, sr: np.array([0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5])
+        librosa, "frames_to_time", lambda frames, **kwargs: np.array([0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5])
     )
     monkeypatch.setattr(librosa, "get_duration", lambda y, sr: 30.0)
 
@@ -43,17 +45,21 @@ def test_analyze_beats_plus_mocked(monkeypatch):
     assert result["downbeat_times"] == [0.0, 2.0]
     assert result["section_times"][0] == 0.0
     assert result["duration_s"] == 30.0
+    # a single beat-tracking pass over the shared onset envelope
+    assert len(calls) == 1
+    assert "onset_envelope" in calls[0]
 
 
 def test_analyze_intel_quant_swing(monkeypatch):
-    monkeypatch.setattr(librosa, "load", lambda path, mono: (np.zeros(4), 22050))
+    monkeypatch.setattr(librosa, "load", lambda path, **kwargs: (np.zeros(4), 22050))
 
     beats = np.array([0.01, 0.26, 0.51, 0.76, 1.01, 1.26, 1.51, 1.76])
 
     def fake_beat_track(*args, **kwargs):
-        return 100.0, beats
+        return 100.0, np.arange(len(beats))
 
     monkeypatch.setattr(librosa.beat, "beat_track", fake_beat_track)
+    monkeypatch.setattr(librosa, "frames_to_time", lambda frames, **kwargs: beats[frames])
     monkeypatch.setattr(librosa, "get_duration", lambda y, sr: 30.0)
 
     plan = {"meta": {"tempo_bpm_estimate": 120}, "global": {"swing_percent": 50}}
@@ -65,3 +71,131 @@ def test_analyze_intel_quant_swing(monkeypatch):
     assert np.allclose(result["downbeats"], [0.0, 1.0])
     assert result["bars"] == result["downbeats"]
     assert result["sections"] == [0.0, 15.0]
+
+
+def test_analysis_profile_parameters(monkeypatch):
+    loads, tracks = [], []
+
+    def fake_load(path, **kwargs):
+        loads.append(kwargs)
+        return np.zeros(4), kwargs["sr"]
+
+    def fake_beat_track(**kwargs):
+        tracks.append(kwargs)
+        return 120.0, np.array([0, 1])
+
+    monkeypatch.setattr(librosa, "load", fake_load)
+    monkeypatch.setattr(librosa.beat, "beat_track", fake_beat_track)
+    monkeypatch.setattr(librosa.onset, "onset_strength", lambda **kwargs: np.ones(4))
+
+    fast = PROFILES["fast"]
+    result = analyze_beats_plus("dummy.wav", profile="fast")
+    assert loads[-1]["sr"] == fast.sr and loads[-1]["res_type"] == fast.res_type
+    assert tracks[-1]["hop_length"] == fast.hop_length
+    assert tracks[-1]["tightness"] == fast.tightness
+    expected = librosa.frames_to_time([0, 1], sr=fast.sr, hop_length=fast.hop_length)
+    assert np.allclose(result["beat_times"], expected)
+
+    analyze_beats_plus("dummy.wav", profile="accurate")
+    assert tracks[-1]["hop_length"] == PROFILES["accurate"].hop_length
+
+    with pytest.raises(ValueError):
+        analyze_beats_plus("dummy.wav", profile="nope")
+
+
+def _fake_ffmpeg(tmp_path, monkeypatch, body, name="ffmpeg"):
+    """Put an ``ffmpeg`` (or ``name``) stand-in on PATH that runs ``body`` as Python."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / name
+    script.write_text(f"#!{sys.executable}\nimport sys\nimport numpy as np\n{body}\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_ffmpeg_fallback_decodes_from_pipe(tmp_path, monkeypatch):
+    from xlights_seq import audio
+
+    # 40s at the requested rate: larger than the decoder's initial buffer
+    _fake_ffmpeg(
+        tmp_path,
+        monkeypatch,
+        "args = sys.argv\n"
+        "assert args[args.index('-ac') + 1] == '1'\n"
+        "assert args[-1] == 'pipe:1'\n"
+        "sr = int(args[args.index('-ar') + 1])\n"
+        "y = (np.arange(sr * 40) % 100).astype('<f4') / 100\n"
+        "sys.stdout.buffer.write(y.tobytes())",
+    )
+    y = audio._ffmpeg_decode("song.m4a", 1000)
+    assert y.dtype == np.float32
+    assert len(y) == 40000
+    assert np.array_equal(y, (np.arange(40000) % 100).astype(np.float32) / 100)
+
+    def unreadable(path, **kwargs):
+        raise RuntimeError("no backend")
+
+    monkeypatch.setattr(librosa, "load", unreadable)
+    result = analyze_intel("song.m4a", {}, profile="fast")
+    assert result["sections"] == [0.0, 15.0, 30.0]
+
+
+def test_ffmpeg_fallback_reports_errors(tmp_path, monkeypatch):
+    from xlights_seq import audio
+
+    _fake_ffmpeg(
+        tmp_path,
+        monkeypatch,
+        "sys.stderr.write('Invalid data found')\nsys.exit(1)",
+    )
+    with pytest.raises(RuntimeError, match="Invalid data found"):
+        audio._ffmpeg_decode("broken.m4a", 22050)
+
+
+def test_window_is_checked_against_audio_length(tmp_path, monkeypatch):
+    import soundfile as sf
+    from xlights_seq.audio import audio_duration, check_window
+
+    wav = tmp_path / "song.wav"
+    sf.write(str(wav), np.zeros(22050 * 10, dtype=np.float32), 22050)
+    assert audio_duration(str(wav)) == pytest.approx(10.0)
+    _fake_ffmpeg(tmp_path, monkeypatch, "print('12.5')", name="ffprobe")
+    assert audio_duration(str(tmp_path / "song.m4a")) == 12.5
+
+    assert check_window(2.0, 30.0, 10.0) == (2.0, 8.0)
+    assert check_window(2.0, None, 10.0) == (2.0, None)
+    with pytest.raises(ValueError, match="end of the audio"):
+        check_window(20.0, None, 10.0)
+    for window in ((float("nan"), None), (0.0, float("nan")), (float("inf"), None), (1.0, float("inf"))):
+        with pytest.raises(ValueError, match="finite"):
+            check_window(*window, 100.0)
+
+
+def test_analyze_intel_retimes_cached_features(tmp_path, monkeypatch):
+    from xlights_seq.audio import AnalysisCache
+
+    audio = tmp_path / "song.wav"
+    audio.write_bytes(b"fake audio")
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    beats = np.array([0.01, 0.26, 0.51, 0.76, 1.01, 1.26, 1.51, 1.76])
+
+    monkeypatch.setattr(librosa, "load", lambda path, **kwargs: (np.zeros(4), 22050))
+    monkeypatch.setattr(librosa.beat, "beat_track", lambda **kwargs: (120.0, np.arange(8)))
+    monkeypatch.setattr(librosa, "frames_to_time", lambda frames, **kwargs: beats[frames])
+    monkeypatch.setattr(librosa, "get_duration", lambda y, sr: 30.0)
+
+    first = analyze_intel(str(audio), {}, cache=cache)
+    assert np.allclose(first["beats"], [0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("audio re-analyzed for a plan-only change")
+
+    monkeypatch.setattr(librosa, "load", fail)
+    plan = {
+        "meta": {"tempo_bpm_estimate": 120},
+        "global": {"swing_percent": 50},
+        "sections": [{"start": 14.0}, {"start": 0.0}, {"start": -1}, {"name": "x"}],
+    }
+    second = analyze_intel(str(audio), plan, cache=cache)
+    assert np.allclose(second["beats"], [0.0, 0.375, 0.5, 0.875, 1.0, 1.375, 1.5, 1.875])
+    assert second["sections"] == [0.0, 14.0]
@@ -0,0 +1,96 @@
+import os, sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import librosa
+import pytest
+from xlights_seq.audio import AnalysisCache, analyze_beats_plus
+
+
+def test_cache_roundtrip_and_key(tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"abc")
+    cache = AnalysisCache(str(tmp_path / "cache"))
+
+    key = cache.key(str(audio), sr=22050, hop_length=512)
+    assert cache.get(key) is None
+    cache.put(key, {"bpm": 120.0, "beat_times": [0.0, 0.5]})
+    hit = cache.get(key)
+    assert hit["bpm"] == 120.0
+    assert hit["beat_times"].tolist() == [0.0, 0.5]
+
+    # same bytes under another name share the entry; params do not
+    other = tmp_path / "b.mp3"
+    other.write_bytes(b"abc")
+    assert cache.key(str(other), sr=22050, hop_length=512) == key
+    assert cache.key(str(audio), sr=22050, hop_length=256) != key
+    other.write_bytes(b"abd")
+    assert cache.key(str(other), sr=22050, hop_length=512) != key
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"), max_bytes=10**9)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, {"beat_times": np.random.rand(2000).tolist()})
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    # reading "a" makes it the most recently used entry
+    assert cache.get("a") is not None
+
+    cache.max_bytes = os.path.getsize(cache._path("a")) * 2 + 100
+    cache.evict()
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_analyze_beats_plus_uses_cache(tmp_path, monkeypatch):
+    audio = tmp_path / "song.wav"
+    audio.write_bytes(b"fake audio")
+    cache = AnalysisCache(str(tmp_path / "cache"))
+
+    monkeypatch.setattr(librosa, "load", lambda path, **kwargs: (np.zeros(4), 22050))
+    monkeypatch.setattr(
+        librosa.beat, "beat_track", lambda *a, **k: (120.0, np.array([0, 1, 2, 3]))
+    )
+    monkeypatch.setattr(librosa.onset, "onset_strength", lambda **kwargs: np.ones(4))
+    monkeypatch.setattr(librosa, "get_duration", lambda y, sr: 2.0)
+
+    first = analyze_beats_plus(str(audio), cache=cache)
+    assert first["cache_hit"] is False
+
+    def fail(*args, **kwargs):
+        raise AssertionError("audio decoded on cache hit")
+
+    monkeypatch.setattr(librosa, "load", fail)
+    second = analyze_beats_plus(str(audio), cache=cache)
+    assert second["cache_hit"] is True
+    assert second["bpm"] == first["bpm"]
+    assert second["beat_times"] == first["beat_times"]
+    assert second["downbeat_times"] == first["downbeat_times"]
+    assert second["duration_s"] == first["duration_s"]
+
+
+def test_windows_get_their_own_cache_entries(tmp_path, monkeypatch):
+    audio = tmp_path / "song.wav"
+    audio.write_bytes(b"fake audio")
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    loads = []
+
+    def fake_load(path, **kwargs):
+        loads.append((kwargs.get("offset"), kwargs.get("duration")))
+        return np.zeros(4), 22050
+
+    monkeypatch.setattr(librosa, "load", fake_load)
+    monkeypatch.setattr(
+        librosa.beat, "beat_track", lambda *a, **k: (120.0, np.array([0, 1, 2, 3]))
+    )
+    monkeypatch.setattr(librosa.onset, "onset_strength", lambda **kwargs: np.ones(4))
+    monkeypatch.setattr(librosa, "get_duration", lambda y, sr: 2.0)
+
+    analyze_beats_plus(str(audio), cache=cache)
+    analyze_beats_plus(str(audio), cache=cache, start_s=30.0, end_s=45.0)
+    assert analyze_beats_plus(str(audio), cache=cache, start_s=30.0, end_s=45.0)["cache_hit"]
+    analyze_beats_plus(str(audio), cache=cache, start_s=30.0)
+    assert loads == [(None, None), (30.0, 15.0), (30.0, None)]
+    with pytest.raises(ValueError):
+        analyze_beats_plus(str(audio), start_s=10.0, end_s=5.0)
@@ -0,0 +1,76 @@
+import os, sys, tracemalloc
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.audio import extract_features
+
+SR = 22050
+BPM = 120.0
+
+# Streaming keeps one block of audio and spectrogram in memory at a time; the
+# in-memory path needs several hundred MB for a 4-minute song.
+MEMORY_CEILING_BYTES = 32 * 1024 * 1024
+
+
+def _click_track(path, seconds):
+    rng = np.random.default_rng(0)
+    y = 0.05 * rng.standard_normal(int(seconds * SR)).astype(np.float32)
+    click = np.hanning(128).astype(np.float32)
+    for t in np.arange(0.0, seconds, 60.0 / BPM):
+        i = int(t * SR)
+        y[i : i + len(click)] += click[: len(y) - i]
+    sf.write(path, y, SR, subtype="PCM_16")
+
+
+def _peak_bytes(path):
+    tracemalloc.start()
+    try:
+        features = extract_features(path, stream=True)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return features, peak
+
+
+def test_stream_matches_in_memory_analysis(tmp_path):
+    path = str(tmp_path / "short.wav")
+    _click_track(path, 30)
+    streamed = extract_features(path, stream=True)
+    loaded = extract_features(path, stream=False)
+    assert abs(streamed.tempo - loaded.tempo) < 1.0
+    assert abs(streamed.duration_s - loaded.duration_s) < 0.05
+    assert len(streamed.onset_env) == len(loaded.onset_env)
+    common = np.intersect1d(streamed.beat_frames, loaded.beat_frames)
+    assert len(common) >= 0.9 * len(loaded.beat_frames)
+
+
+def test_stream_memory_is_independent_of_length(tmp_path):
+    short_path = str(tmp_path / "short.wav")
+    long_path = str(tmp_path / "long.wav")
+    _click_track(short_path, 60)
+    _click_track(long_path, 240)
+    extract_features(short_path, stream=True)  # warm up JIT and filter caches
+
+    _, short_peak = _peak_bytes(short_path)
+    features, long_peak = _peak_bytes(long_path)
+
+    assert abs(features.duration_s - 240) < 0.1
+    assert abs(features.tempo - BPM) < 5
+    assert long_peak < MEMORY_CEILING_BYTES
+    # only the onset envelopes (a few bytes per frame) grow with the track
+    assert long_peak - short_peak < 2 * 1024 * 1024
+
+
+def test_window_analyzes_only_the_requested_span(tmp_path):
+    path = str(tmp_path / "song.wav")
+    _click_track(path, 40)
+    full = extract_features(path, stream=False)
+    window = extract_features(path, start_s=20.0, end_s=30.0)
+    assert abs(window.duration_s - 10.0) < 0.05
+    assert len(window.onset_env) < 0.3 * len(full.onset_env)
+    assert abs(window.tempo - BPM) < 5.0  # a 10s window gives a rougher estimate
+    # beats are relative to the window start and line up with the full track's
+    full_in_window = full.beat_times[(full.beat_times >= 21.0) & (full.beat_times < 29.0)] - 20.0
+    for t in full_in_window:
+        assert np.min(np.abs(window.beat_times - t)) < 0.05
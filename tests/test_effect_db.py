@@ -0,0 +1,75 @@
+import os, sys
+import xml.etree.ElementTree as ET
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.generator import build_rgbeffects, stream_rgbeffects
+from xlights_seq.parsers import ModelInfo
+from xlights_seq.xsq_writer import build_xsq, stream_xsq
+
+MODELS = [
+    ModelInfo(name="Mega Tree", nodes=500, strings=16),
+    ModelInfo(name="Arch & <1>", nodes=10),
+    ModelInfo(name="Matrix", strings=30),
+]
+BEATS = [i * 0.5 for i in range(32)]
+
+
+def _expand(root):
+    """Resolve effect refs back into (type, params) for comparison."""
+    defs = {
+        d.get("id"): (d.get("type"), [(p.get("name"), p.get("value")) for p in d])
+        for d in root.findall("./effectDB/effectDef")
+    }
+    out = []
+    for eff in root.iter("effect"):
+        if "ref" in eff.attrib:
+            eff_type, params = defs[eff.get("ref")]
+        else:
+            eff_type, params = eff.get("type"), [(p.get("name"), p.get("value")) for p in eff]
+        out.append((eff.get("startMS"), eff.get("endMS"), eff_type, params))
+    return out
+
+
+def test_effect_db_references_same_effects():
+    kwargs = dict(section_times=[4.0], palette=["#111111", "#222222"])
+    verbose = build_rgbeffects(MODELS, BEATS, 16000, "bars", **kwargs).getroot()
+    compact = build_rgbeffects(MODELS, BEATS, 16000, "bars", effect_db=True, **kwargs).getroot()
+    assert verbose.find("effectDB") is None
+    assert compact.find("effectDB") is not None
+    assert compact.find(".//effect/param") is None
+    assert _expand(compact) == _expand(verbose)
+
+    verbose = build_xsq(MODELS, BEATS, 16000).getroot()
+    compact = build_xsq(MODELS, BEATS, 16000, effect_db=True).getroot()
+    # tree/matrix/arch each alternate between a downbeat and a regular variant
+    assert len(compact.findall("./effectDB/effectDef")) == 6
+    assert _expand(compact) == _expand(verbose)
+
+
+def test_stats_match_written_sizes(tmp_path):
+    verbose_path = tmp_path / "verbose.xsq"
+    compact_path = tmp_path / "compact.xsq"
+    assert stream_xsq(str(verbose_path), MODELS, BEATS, 16000) is None
+    stats = stream_xsq(str(compact_path), MODELS, BEATS, 16000, effect_db=True)
+    assert stats["effects"] == len(MODELS) * len(BEATS)
+    assert stats["definitions"] == 6
+    assert stats["bytes"] == compact_path.stat().st_size
+    assert stats["verbose_bytes"] == verbose_path.stat().st_size
+    assert stats["compression_ratio"] > 1.5
+
+    rgb_verbose = tmp_path / "rgb_verbose.xml"
+    rgb_compact = tmp_path / "rgb_compact.xml"
+    stream_rgbeffects(str(rgb_verbose), MODELS, BEATS, 16000, "meteor")
+    stats = stream_rgbeffects(str(rgb_compact), MODELS, BEATS, 16000, "meteor", effect_db=True)
+    assert stats["verbose_bytes"] == rgb_verbose.stat().st_size
+    assert stats["bytes"] == rgb_compact.stat().st_size
+
+    # a document without effects still gets an (empty) table
+    empty = tmp_path / "empty.xsq"
+    stats = stream_xsq(str(empty), [], [], 0, effect_db=True)
+    assert stats["verbose_bytes"] == len(
+        b"<?xml version='1.0' encoding='utf-8'?>\n"
+        b'<xseq version="2024.05"><timing name="Beats" /><timing name="Downbeats" />'
+        b'<timing name="Sections" /></xseq>'
+    )
+    assert ET.parse(empty).getroot().find("effectDB") is not None
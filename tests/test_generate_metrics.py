@@ -1,4 +1,5 @@
 import importlib
+import json
 import os, sys
 import pytest
 
@@ -11,6 +12,7 @@ def client(tmp_path, monkeypatch):
     importlib.reload(config)
     config.Config.UPLOAD_FOLDER = str(tmp_path / "uploads")
     config.Config.OUTPUT_FOLDER = str(tmp_path / "generated")
+    config.Config.ANALYSIS_WORKERS = 0
     log_file = tmp_path / "app.log"
     monkeypatch.setenv("LOG_FILE", str(log_file))
     import app
@@ -24,7 +26,7 @@ def test_generate_returns_counts(client, tmp_path, monkeypatch):
     monkeypatch.setattr(
         app_module,
         "analyze_beats_plus",
-        lambda path: {
+        lambda path, **kwargs: {
             "bpm": 120.0,
             "duration_s": 2.0,
             "beat_times": [0.0, 0.5, 1.0, 1.5],
@@ -50,4 +52,164 @@ def test_generate_returns_counts(client, tmp_path, monkeypatch):
     assert j["sectionCount"] == 2
     assert j["selectedModelCount"] == 1
     assert j["totalModelCount"] == 1
+    assert j["analysisCacheHit"] is False
 
+
+def _post(test_client, tmp_path, **form):
+    layout_path = tmp_path / "layout.xml"
+    layout_path.write_text("<layout><model name='Tree' StringCount='1'/></layout>")
+    audio_path = tmp_path / "audio.mp3"
+    audio_path.write_bytes(b"fake")
+    with layout_path.open("rb") as lf, audio_path.open("rb") as af:
+        data = {"layout": (lf, "layout.xml"), "audio": (af, "audio.mp3"), **form}
+        return test_client.post(
+            "/generate", data=data, content_type="multipart/form-data"
+        )
+
+
+def test_generate_analysis_profile(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    seen = []
+
+    def fake_analyze(path, **kwargs):
+        seen.append(kwargs.get("profile"))
+        return {"bpm": 120.0, "duration_s": 1.0, "beat_times": [0.0, 0.5]}
+
+    monkeypatch.setattr(app_module, "analyze_beats_plus", fake_analyze)
+
+    resp = _post(test_client, tmp_path)
+    assert resp.status_code == 200
+    assert resp.get_json()["analysisProfile"] == app_module.app.config["ANALYSIS_PROFILE"]
+
+    resp = _post(test_client, tmp_path, analysis_profile="fast")
+    assert resp.status_code == 200
+    assert resp.get_json()["analysisProfile"] == "fast"
+    assert seen == [app_module.app.config["ANALYSIS_PROFILE"], "fast"]
+
+    resp = _post(test_client, tmp_path, analysis_profile="ludicrous")
+    assert resp.status_code == 400
+    assert resp.get_json()["ok"] is False
+
+
+def test_generate_reports_effect_db_compression(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(
+        app_module,
+        "analyze_beats_plus",
+        lambda path, **kwargs: {
+            "bpm": 120.0,
+            "duration_s": 8.0,
+            "beat_times": [i * 0.5 for i in range(16)],
+        },
+    )
+    resp = _post(test_client, tmp_path)
+    j = resp.get_json()
+    assert j["compressionRatio"] > 1
+    meta_path = tmp_path / "generated" / j["jobId"] / "metadata.json"
+    meta = json.loads(meta_path.read_text())
+    assert meta["effect_db"]["effects"] == 16
+    assert meta["effect_db"]["compression_ratio"] == j["compressionRatio"]
+
+    app_module.app.config["EFFECT_DB"] = False
+    j = _post(test_client, tmp_path).get_json()
+    assert j["compressionRatio"] is None
+    meta_path = tmp_path / "generated" / j["jobId"] / "metadata.json"
+    assert json.loads(meta_path.read_text())["effect_db"] is None
+
+
+def test_generate_time_window(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    seen = []
+
+    def fake_analyze(path, **kwargs):
+        seen.append((kwargs.get("start_s"), kwargs.get("end_s")))
+        return {"bpm": 120.0, "duration_s": 10.0, "beat_times": [i * 0.5 for i in range(20)]}
+
+    monkeypatch.setattr(app_module, "analyze_beats_plus", fake_analyze)
+    monkeypatch.setattr(app_module, "audio_duration", lambda path: 180.0)
+    resp = _post(test_client, tmp_path, start_s="60", end_s="70")
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert seen == [(60.0, 70.0)]
+    assert j["durationMs"] == 10000 and j["beatCount"] == 20
+    assert j["window"] == {"start_s": 60.0, "end_s": 70.0}
+    meta_path = tmp_path / "generated" / j["jobId"] / "metadata.json"
+    assert json.loads(meta_path.read_text())["window"] == j["window"]
+
+    assert _post(test_client, tmp_path).get_json()["window"] is None
+    assert seen[-1] == (None, None)
+    for form in (
+        {"start_s": "-1"},
+        {"start_s": "30", "end_s": "20"},
+        {"end_s": "soon"},
+        {"start_s": "nan"},
+        {"end_s": "NaN"},
+        {"end_s": "inf"},
+    ):
+        resp = _post(test_client, tmp_path, **form)
+        assert resp.status_code == 400
+    assert len(seen) == 2
+
+    # windows are fitted to the track: end_s is clamped (or filled in), and
+    # a start past the end is rejected before any analysis runs
+    j = _post(test_client, tmp_path, start_s="170", end_s="200").get_json()
+    assert j["window"] == {"start_s": 170.0, "end_s": 180.0}
+    assert seen[-1] == (170.0, 180.0)
+    assert _post(test_client, tmp_path, start_s="30").get_json()["window"] == {
+        "start_s": 30.0,
+        "end_s": 180.0,
+    }
+    resp = _post(test_client, tmp_path, start_s="180")
+    assert resp.status_code == 400
+    assert "end of the audio" in resp.get_json()["error"]
+    assert len(seen) == 4
+
+
+def test_generate_reports_network_load(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(
+        app_module,
+        "analyze_beats_plus",
+        lambda path, **kwargs: {"bpm": 120.0, "duration_s": 1.0, "beat_times": [0.0, 0.5]},
+    )
+    layout_path = tmp_path / "layout.xml"
+    layout_path.write_text(
+        "<layout><model name='Tree' StartChannel='1' Nodes='300'/>"
+        "<model name='Star' StartChannel='#1:1' Nodes='10'/></layout>"
+    )
+    networks_path = tmp_path / "xlights_networks.xml"
+    networks_path.write_text(
+        "<Networks><Controller Name='Main' Protocol='E131' IP='10.0.0.2'>"
+        "<network NetworkType='E131' BaudRate='1' MaxChannels='512'/></Controller></Networks>"
+    )
+    audio_path = tmp_path / "audio.mp3"
+    audio_path.write_bytes(b"fake")
+    with layout_path.open("rb") as lf, audio_path.open("rb") as af, networks_path.open("rb") as nf:
+        data = {
+            "layout": (lf, "layout.xml"),
+            "audio": (af, "audio.mp3"),
+            "networks": (nf, "xlights_networks.xml"),
+        }
+        resp = test_client.post("/generate", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert j["networkLoad"]["fps"] == 20
+    assert j["networkLoad"]["universes"][0]["used"] == 512
+    assert j["networkWarnings"] == [
+        "Main universe 1: models ask for 542 of 512 channels (overlapping start channels)",
+        "Tree ends at channel 900, past the last configured channel 512",
+    ]
+    meta_path = os.path.join(app_module.app.config["OUTPUT_FOLDER"], j["jobId"], "metadata.json")
+    with open(meta_path, encoding="utf-8") as f:
+        assert json.load(f)["network_load"]["controllers"][0]["name"] == "Main"
+
+    networks_path.write_text("<Networks><Controller")
+    with layout_path.open("rb") as lf, audio_path.open("rb") as af, networks_path.open("rb") as nf:
+        data = {
+            "layout": (lf, "layout.xml"),
+            "audio": (af, "audio.mp3"),
+            "networks": (nf, "xlights_networks.xml"),
+        }
+        resp = test_client.post("/generate", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 400
+    assert "networks" in resp.get_json()["error"]
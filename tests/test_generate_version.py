@@ -10,6 +10,7 @@ def client(tmp_path, monkeypatch):
     importlib.reload(config)
     config.Config.UPLOAD_FOLDER = str(tmp_path / "uploads")
     config.Config.OUTPUT_FOLDER = str(tmp_path / "generated")
+    config.Config.ANALYSIS_WORKERS = 0
     log_file = tmp_path / "app.log"
     monkeypatch.setenv("LOG_FILE", str(log_file))
     import app
@@ -23,7 +24,7 @@ def test_generate_includes_version(client, tmp_path, monkeypatch):
     monkeypatch.setattr(
         app_module,
         "analyze_beats_plus",
-        lambda path: {
+        lambda path, **kwargs: {
             "bpm": 120.0,
             "duration_s": 1.0,
             "beat_times": [0.0, 0.5],
@@ -2,7 +2,7 @@ import os, sys
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from xlights_seq.generator import build_rgbeffects
+from xlights_seq.generator import DOWNBEAT_COLOR, beat_schedule, build_rgbeffects
 from xlights_seq.parsers import ModelInfo
 
 
@@ -61,3 +61,39 @@ def test_section_boundary_changes_effect():
     assert types[:4] == ["On"] * 4
     assert types[4:] == ["Shockwave"] * 4
 
+
+def test_beat_schedule_classifies_each_beat_once():
+    beat_times = [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0]
+    starts, ends, color_idx, in_section = beat_schedule(
+        beat_times,
+        3600,
+        palette_size=3,
+        downbeat_times=[0.7, 2.0],
+        section_times=[1.4, 9.0],
+    )
+    assert starts.tolist() == [0, 500, 1000, 1500, 2000, 2500, 3000]
+    # downbeats fall inside the 0.5s and 2.0s windows, which stretch by 50ms
+    assert ends.tolist() == [500, 1050, 1500, 2000, 2550, 3000, 3600]
+    assert color_idx.tolist() == [0, 3, 2, 0, 3, 2, 0]
+    # a boundary starts a measure at the first beat on or after it
+    assert in_section.tolist() == [False, False, False, True, True, True, True]
+
+
+def test_effect_variants_are_shared_across_models():
+    models = [ModelInfo(name="arch 1"), ModelInfo(name="matrix", strings=30)]
+    beat_times = [0.0, 1.0, 2.0, 3.0, 4.0]
+    tree = build_rgbeffects(
+        models, beat_times, 5000, preset="bars", section_times=[4.0]
+    )
+    arch, matrix = tree.getroot().findall("./model")
+
+    def summary(mdl):
+        return [
+            (e.get("type"), {p.get("name"): p.get("value") for p in e})
+            for e in mdl.iter("effect")
+        ]
+
+    assert summary(arch)[0] == ("Waves", {"Color1": DOWNBEAT_COLOR})
+    assert summary(arch)[4] == ("Shockwave", {"Color1": DOWNBEAT_COLOR})
+    assert summary(matrix)[1] == ("Bars", {"Bars": "24", "Color1": "#00FF00"})
+    assert summary(matrix)[4] == ("Shockwave", {"Color1": DOWNBEAT_COLOR})
@@ -0,0 +1,155 @@
+import os, sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import pytest
+
+from xlights_seq import parsers
+from xlights_seq.geometry import (
+    MAX_CELL_CHARS,
+    MAX_MODEL_NODES,
+    MAX_STAR_POINTS,
+    custom,
+    model_geometry,
+    node_count,
+)
+from xlights_seq.parsers import load_layout, model_positions
+
+
+def test_node_counts_per_model_type():
+    cases = {
+        "Horiz Matrix": 2 * 30,
+        "Vert Matrix": 2 * 30,
+        "Tree 360": 2 * 30,
+        "Tree Flat": 2 * 30,
+        "Single Line": 2 * 30,
+        "Arches": 2 * 30,
+        "Circle": 2 * 30,
+        "Star": 2 * 30,
+    }
+    for kind, n in cases.items():
+        xy = model_geometry({"DisplayAs": kind, "parm1": "2", "parm2": "30", "X2": "10"})
+        assert xy.shape == (n, 2) and xy.dtype == np.float32, kind
+        assert np.isfinite(xy).all(), kind
+    assert model_geometry({"DisplayAs": "Candy Canes"}) is None
+    assert model_geometry({}) is None
+
+
+def test_boxed_models_are_placed_scaled_and_rotated():
+    attrs = {"DisplayAs": "Horiz Matrix", "parm1": "3", "parm2": "5", "WorldPosX": "100", "WorldPosY": "40"}
+    xy = model_geometry(attrs)
+    assert np.allclose(xy.min(axis=0), [98, -41]) and np.allclose(xy.max(axis=0), [102, -39])
+
+    scaled = model_geometry({**attrs, "ScaleX": "2", "ScaleY": "3"})
+    assert np.allclose(scaled.max(axis=0) - scaled.min(axis=0), [8, 6])
+
+    turned = model_geometry({**attrs, "RotateZ": "90"})
+    assert np.allclose(turned.max(axis=0) - turned.min(axis=0), [2, 4], atol=1e-4)
+
+
+def test_two_point_models_run_between_their_ends():
+    xy = model_geometry(
+        {"DisplayAs": "Single Line", "parm1": "1", "parm2": "4", "WorldPosX": "10", "WorldPosY": "5", "X2": "8", "Y2": "0"}
+    )
+    assert np.allclose(xy, [[11, -5], [13, -5], [15, -5], [17, -5]])
+
+    arches = model_geometry({"DisplayAs": "Arches", "parm1": "2", "parm2": "9", "X2": "20"})
+    assert 0 < arches[:, 0].min() and arches[:, 0].max() < 20
+    # arches rise above the line, i.e. towards smaller (screen) y
+    assert arches[4, 1] == arches[:, 1].min() and np.isclose(arches[4, 1], -5)
+
+
+def test_custom_grid_orders_cells_by_node_number():
+    xy = custom("3,,1;,2,")
+    assert np.allclose(xy, [[1, 0.5], [0, -0.5], [-1, 0.5]])
+    assert len(custom("1,2|3,4")) == 4
+    assert len(custom("")) == 0 and len(custom("a,b")) == 0
+
+
+def test_model_positions_prefers_explicit_nodes(tmp_path):
+    path = tmp_path / "layout.xml"
+    path.write_text(
+        "<xrgb><models>"
+        "<model name='Mat' DisplayAs='Horiz Matrix' parm1='4' parm2='10'/>"
+        "<model name='Pts' DisplayAs='Horiz Matrix' parm1='4' parm2='10'><node x='1' y='2'/></model>"
+        "<model name='Odd' DisplayAs='Sphere' parm1='4' parm2='10'/>"
+        "</models></xrgb>"
+    )
+    pos = model_positions(str(path))
+    assert pos["Mat"].shape == (40, 2)
+    assert pos["Pts"].tolist() == [[1.0, 2.0]]
+    assert pos["Odd"].shape == (0, 2)
+
+
+def test_node_count_matches_geometry_without_allocating():
+    for attrs in (
+        {"DisplayAs": "Horiz Matrix", "parm1": "3", "parm2": "50", "parm3": "2"},
+        {"DisplayAs": "Tree 180", "parm1": "4", "parm2": "7", "parm3": "3"},
+        {"DisplayAs": "Circle", "circleSizes": "20,12,6"},
+        {"DisplayAs": "Star", "parm1": "2", "parm2": "25"},
+        {"DisplayAs": "Arches", "parm1": "3", "parm2": "9"},
+    ):
+        assert node_count(attrs) == len(model_geometry(attrs)), attrs["DisplayAs"]
+    # custom grids count every cell, filled or not
+    assert node_count({"DisplayAs": "Custom", "CustomModel": "1,,2;3,4,|5,6,7;,,"}) == 12
+    assert node_count({"DisplayAs": "Sphere"}) is None
+    huge = {"DisplayAs": "Horiz Matrix", "parm1": "100000", "parm2": "100000"}
+    assert node_count(huge) == 10**10
+    with pytest.raises(ValueError, match="per model"):
+        model_geometry(huge)
+    assert len(model_geometry({"DisplayAs": "Single Line", "parm1": "inf", "parm2": "nan"})) == 1
+
+
+def test_oversized_models_are_skipped_with_a_warning(tmp_path, monkeypatch):
+    path = tmp_path / "layout.xml"
+    path.write_text(
+        "<xrgb><models>"
+        "<model name='Huge' DisplayAs='Horiz Matrix' parm1='100000' parm2='100000'/>"
+        "<model name='A' DisplayAs='Single Line' parm1='1' parm2='60'/>"
+        "<model name='B' DisplayAs='Single Line' parm1='1' parm2='60'/>"
+        "</models></xrgb>"
+    )
+    monkeypatch.setattr(parsers, "MAX_LAYOUT_NODES", 100)
+    index = load_layout(str(path))
+    pos = index.model_positions()
+    assert [len(pos[m]) for m in ("Huge", "A", "B")] == [0, 60, 0]
+    assert len(index.geometry_warnings) == 2
+    assert index.geometry_warnings[0].startswith("Huge: 10000000000 nodes")
+    assert str(MAX_MODEL_NODES) in index.geometry_warnings[0]
+    assert index.geometry_warnings[1].startswith("B: layout is over the limit of 100 nodes")
+
+
+def test_star_points_and_long_cells_are_rejected():
+    with pytest.raises(ValueError, match=f"limit of {MAX_STAR_POINTS}"):
+        model_geometry({"DisplayAs": "Star", "parm1": "1", "parm2": "10", "parm3": "10000000"})
+    with pytest.raises(ValueError, match=f"over {MAX_CELL_CHARS} characters"):
+        custom("1," + "9" * (MAX_CELL_CHARS + 1))
+    assert len(custom("1," + "9" * MAX_CELL_CHARS)) == 2
+
+
+def test_custom_grids_are_read_back_for_positions(tmp_path):
+    path = tmp_path / "layout.xml"
+    path.write_text(
+        "<xrgb><models>"
+        "<model name='Grid' DisplayAs='Custom' CustomModel='1,2;3,'/>"
+        "<model name='Long' DisplayAs='Custom' CustomModel='1,{}'/>"
+        "<model name='Pointy' DisplayAs='Star' parm1='1' parm2='10' parm3='100000'/>"
+        "<model name='Tail' DisplayAs='Custom' CustomModel='2,1'/>"
+        "</models></xrgb>".format("x" * 5000)
+    )
+    index = load_layout(str(path))
+    assert "CustomModel" not in index.models[0].attrs
+    assert index.models[0].grid_cells == 4
+    pos = index.model_positions()
+    assert [len(pos[m]) for m in ("Grid", "Long", "Pointy", "Tail")] == [3, 0, 0, 2]
+    assert pos["Tail"].tolist() == [[0.5, 0.0], [-0.5, 0.0]]
+    assert [w.split(":")[0] for w in index.geometry_warnings] == ["Long", "Pointy"]
+    assert "characters; not drawn" in index.geometry_warnings[0]
+
+    # a cached index reads grids from the latest copy of the file
+    copy = tmp_path / "copy.xml"
+    copy.write_bytes(path.read_bytes())
+    path.unlink()
+    index = load_layout(str(copy))
+    index._positions = None
+    assert len(index.model_positions()["Grid"]) == 3
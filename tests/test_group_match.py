@@ -0,0 +1,41 @@
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.group_match import GroupMatcher
+from xlights_seq.parsers import load_layout, map_style_groups_to_layout
+
+
+def test_best_match_beats_first_match():
+    m = GroupMatcher(["Mega Tree Left", "Focal Tree", "Tree", "Arches"])
+    assert m.match("Tree") == "Tree"
+    assert m.match("Focal_Tree") == "Focal Tree"
+    # "arch" is in "Arches" only; "tree" matches "Tree" exactly
+    assert m.match("Arch/Tree") == "Tree"
+    assert m.match("Arch") == "Arches"
+    assert m.match("Nothing - Here") is None
+
+
+def test_ties_and_duplicates_are_deterministic():
+    m = GroupMatcher(["Roof A", "roof_a", "Roof B"])
+    assert m.names == ["Roof A", "Roof B"]
+    assert m.match("Roof") == "Roof A"
+    assert m.match("B") == "Roof B"
+    assert m.match("") is None
+    assert GroupMatcher(["Roof B", "Roof A"]).match("Roof") == "Roof B"
+
+
+def test_trigram_fallback():
+    m = GroupMatcher(["Focal Tree", "Garage Windows", "Spinners"])
+    assert m.match("Focal_Trees") == "Focal Tree"
+    assert m.match("Garage Window Frames") == "Garage Windows"
+    assert m.match("Spiners") == "Spinners"
+    assert m.match("Snowflakes") is None
+    assert m.map(["Spinner", "Windows", "Other"]) == {"Spinner": "Spinners", "Windows": "Garage Windows"}
+
+
+def test_matcher_is_cached_per_layout(tmp_path):
+    path = tmp_path / "layout.xml"
+    path.write_text("<layout><group name=' Porch '/><group name='Garage'/></layout>")
+    index = load_layout(str(path))
+    assert index.group_matcher() is index.group_matcher()
+    assert index.group_matcher().map(["Garage/Porch", "porch"]) == {"Garage/Porch": "Garage", "porch": "Porch"}
+    assert map_style_groups_to_layout(["porch"], ["Porch"]) == {"porch": "Porch"}
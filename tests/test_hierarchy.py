@@ -0,0 +1,65 @@
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.hierarchy import GroupHierarchy, back_edges
+from xlights_seq.parsers import flatten_models, load_layout, parse_tree, parse_tree_with_index
+
+
+def test_models_under_expands_nesting_once():
+    h = GroupHierarchy({
+        "All": ["Front", "Roof", "Star"],
+        "Front": ["Arches", "Bush"],
+        "Arches": ["Arch 1", "Arch 2"],
+        "Roof": ["Arches", "Eave"],
+        "Tree": ["Tree"],
+    })
+    assert h.models_under("All") == ["Arch 1", "Arch 2", "Bush", "Eave", "Star"]
+    assert h.models_under("All") is h.models_under("All")
+    assert h.models_under("Tree") == ["Tree"]
+    assert h.models_under("Missing") == []
+    assert h.cycles() == []
+
+
+def test_cycles_are_reported_and_expansion_terminates():
+    h = GroupHierarchy({"A": ["B", "m1"], "B": ["C"], "C": ["A", "m2"]})
+    assert h.cycles() == [("C", "A")]
+    assert h.models_under("A") == ["m2", "m1"]
+    assert h.models_under("C") == ["m1", "m2"]
+    assert back_edges({1: [2], 2: [3], 3: [1, 4], 4: []}) == {(3, 1)}
+
+
+def _write(path, groups, models):
+    body = "".join(f"<model name='{m}' StringCount='1'/>" for m in models)
+    body += "".join(f"<group name='{g}' members='{','.join(ms)}'/>" for g, ms in groups)
+    path.write_text(f"<layout>{body}</layout>")
+    return str(path)
+
+
+def test_trees_nest_groups(tmp_path):
+    path = _write(
+        tmp_path / "layout.xml",
+        [("Yard", ["Arches", "Star"]), ("Arches", ["Arch 1", "Arch 2"]),
+         ("X", ["Y"]), ("Y", ["X", "Star"])],
+        ["Arch 1", "Arch 2", "Star", "Loose"],
+    )
+    tree = parse_tree(path)
+    assert [c.name for c in tree.children] == ["Loose", "Yard", "X"]
+    yard = tree.children[1]
+    assert [c.name for c in yard.children] == ["Star", "Arches"]
+    assert [c.name for c in tree.children[2].children] == ["Y"]
+
+    root, index = parse_tree_with_index(path)
+    assert [c.name for c in root.children] == ["Loose", "Yard", "X"]
+    assert index["Arch 1"].parent.parent.name == "Yard"
+    assert load_layout(path).hierarchy().cycles() == [("Y", "X")]
+
+
+def test_deep_nesting(tmp_path):
+    depth = 3000
+    groups = [(f"G{i}", [f"G{i + 1}", f"M{i}"]) for i in range(depth - 1)]
+    groups.append((f"G{depth - 1}", [f"M{depth - 1}"]))
+    path = _write(tmp_path / "deep.xml", groups, [f"M{i}" for i in range(depth)])
+    models = flatten_models(parse_tree(path))
+    assert [m.name for m in models] == [f"M{i}" for i in range(depth)]
+    h = load_layout(path).hierarchy()
+    assert len(h.models_under("G0")) == depth
+    assert h.models_under("G0")[0] == f"M{depth - 1}"
@@ -40,3 +40,22 @@ def test_inspect_layout_bad_file(client, tmp_path):
     assert resp.status_code == 400
     j = resp.get_json()
     assert j["ok"] is False
+
+
+def test_inspect_layout_nested_groups(client, tmp_path):
+    depth = 200
+    body = "".join(f"<model name='M{i}'/>" for i in range(depth))
+    body += "".join(f"<group name='G{i}' members='G{i + 1},M{i}'/>" for i in range(depth - 1))
+    body += f"<group name='G{depth - 1}' members='M{depth - 1},G0'/>"
+    path = tmp_path / "layout.xml"
+    path.write_text(f"<layout>{body}</layout>")
+    with path.open('rb') as f:
+        data = {"layout": (f, "layout.xml")}
+        resp = client.post("/inspect-layout", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert j["modelCount"] == depth
+    assert j["groupCycles"] == [[f"G{depth - 1}", "G0"]]
+    node = j["tree"]["children"][0]
+    assert node["name"] == "G0"
+    assert [c["name"] for c in node["children"]] == ["M0", "G1"]
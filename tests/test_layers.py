@@ -0,0 +1,60 @@
+import os, random, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.layers import allocate_layers, merge_adjacent
+
+
+def _max_depth(effects):
+    events = sorted([(s, 1) for s, *_ in effects] + [(e, -1) for _, e, *_ in effects])
+    depth = best = 0
+    for _, delta in events:  # ends sort before starts at the same time
+        depth += delta
+        best = max(best, depth)
+    return best
+
+
+def test_allocation_is_minimal_and_overlap_free():
+    rnd = random.Random(0)
+    for _ in range(50):
+        effects = []
+        for _ in range(rnd.randint(1, 200)):
+            start = rnd.randrange(0, 10000, 50)
+            effects.append((start, start + rnd.randrange(50, 2000, 50), "On", ()))
+        effects.sort(key=lambda e: e[0])
+
+        layers = allocate_layers(effects)
+        assert sorted(e for layer in layers for e in layer) == sorted(effects)
+        assert len(layers) == _max_depth(effects)
+        for layer in layers:
+            assert all(a[1] <= b[0] for a, b in zip(layer, layer[1:]))
+
+
+def test_allocation_reuses_lowest_free_layer():
+    effects = [
+        (0, 1000, "Spirals", ()),
+        (0, 300, "Shockwave", ()),
+        (500, 800, "Shockwave", ()),
+        (1000, 2000, "Spirals", ()),
+    ]
+    assert allocate_layers(effects) == [
+        [(0, 1000, "Spirals", ()), (1000, 2000, "Spirals", ())],
+        [(0, 300, "Shockwave", ()), (500, 800, "Shockwave", ())],
+    ]
+
+
+def test_merge_adjacent_identical_effects():
+    red = (("color", "#FF0000"),)
+    effects = [
+        (0, 500, "On", red),
+        (0, 2000, "Spirals", ()),
+        (500, 1000, "On", red),
+        (1000, 1500, "On", (("color", "#00FF00"),)),
+        (1200, 1500, "On", red),
+        (2000, 2500, "Spirals", ()),
+    ]
+    assert merge_adjacent(effects) == [
+        (0, 1000, "On", red),
+        (0, 2500, "Spirals", ()),
+        (1000, 1500, "On", (("color", "#00FF00"),)),
+        (1200, 1500, "On", red),
+    ]
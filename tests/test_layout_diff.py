@@ -0,0 +1,72 @@
+import os, random, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.layout_diff import diff_layouts, diff_models
+from xlights_seq.parsers import ModelInfo
+from xlights_seq.xsq_writer import splice_xsq, stream_xsq
+
+
+def test_diff_models_detects_added_removed_and_changed():
+    old = [ModelInfo("Arch 1", 1, 50), ModelInfo("Arch 2", 1, 50), ModelInfo("Tree", 16, 500)]
+    new = [
+        {"name": "Star", "strings": 1, "nodes": 20},
+        {"name": "Tree", "strings": 16, "nodes": 600},
+        {"name": "Arch 1", "strings": 1, "nodes": 50},
+    ]
+    diff = diff_models(old, new)
+    assert diff.added == ["Star"]
+    assert diff.removed == ["Arch 2"]
+    assert diff.changed == ["Tree"]
+    assert diff.unchanged == ["Arch 1"]
+    assert diff.rebuild == ["Star", "Tree"]
+
+
+def test_diff_layouts_counts_group_membership(tmp_path):
+    old = tmp_path / "old.xml"
+    old.write_text(
+        "<layout><model name='A' StringCount='1'/><model name='B' StringCount='1'/>"
+        "<model name='C' StringCount='1'/><group name='Arches' members='A,B'/></layout>"
+    )
+    new = tmp_path / "new.xml"
+    new.write_text(
+        "<layout><model name='A' StringCount='1'/><model name='B' StringCount='1'/>"
+        "<model name='C' StringCount='2'/><group name='Arches' members='A'/></layout>"
+    )
+    diff = diff_layouts(str(old), str(new))
+    assert diff.changed == ["B", "C"]
+    assert diff.unchanged == ["A"]
+    assert diff_models([ModelInfo("B", 1)], [ModelInfo("B", 1)]).unchanged == ["B"]
+
+
+def test_splice_matches_full_render(tmp_path):
+    rnd = random.Random(3)
+    kinds = ["Tree", "Matrix", "Arch", 'Bush "B" & <C>']
+    beats = sorted(rnd.uniform(0, 30) for _ in range(40))
+    old = [ModelInfo(f"{rnd.choice(kinds)} {i}", rnd.choice([None, 8, 30]), 50) for i in range(30)]
+    new = [ModelInfo(m.name, 12 if i % 7 == 0 else m.strings, m.nodes) for i, m in enumerate(old) if i % 5]
+    new[3:3] = [ModelInfo("Matrix new", 20), ModelInfo("Tree new", 4)]
+    diff = diff_models(old, new)
+
+    for effect_db in (False, True):
+        kwargs = dict(downbeat_times=beats[::4], section_times=[0.0, 15.0], effect_db=effect_db)
+        stream_xsq(str(tmp_path / "old.xsq"), old, beats, 30000, **kwargs)
+        stream_xsq(str(tmp_path / "full.xsq"), new, beats, 30000, **kwargs)
+        stats, reused, rebuilt = splice_xsq(
+            str(tmp_path / "spliced.xsq"),
+            str(tmp_path / "old.xsq"),
+            new,
+            beats,
+            30000,
+            reuse=diff.unchanged,
+            **kwargs,
+        )
+        assert (tmp_path / "spliced.xsq").read_bytes() == (tmp_path / "full.xsq").read_bytes()
+        assert reused == diff.unchanged
+        assert rebuilt == [m.name for m in new if m.name in diff.rebuild]
+        assert (stats is not None) == effect_db
+
+    # an old file in the other effect_db mode cannot be spliced
+    _, reused, rebuilt = splice_xsq(
+        str(tmp_path / "spliced.xsq"), str(tmp_path / "old.xsq"), new, beats, 30000, reuse=diff.unchanged
+    )
+    assert reused == [] and len(rebuilt) == len(new)
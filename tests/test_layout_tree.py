@@ -0,0 +1,50 @@
+import json, os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.layout_tree import GROUP, MODEL
+from xlights_seq.parsers import load_layout
+
+
+def to_dict(n):
+    return {
+        "name": n.name,
+        "type": n.type,
+        "strings": n.strings,
+        "nodes": n.nodes,
+        "children": [to_dict(c) for c in n.children],
+    }
+
+
+def test_compact_tree_matches_node_tree(tmp_path):
+    path = tmp_path / "layout.xml"
+    path.write_text(
+        "<layout><model name='Arch 1' StringCount='1' Nodes='50'/><model name='Arch 2'/>"
+        "<model name='Star &quot;B&quot;' Nodes='x'/><model name='Loose'/>"
+        "<group name='Yard' members='Arches,Star &quot;B&quot;'><member name='Arch 1'/></group>"
+        "<group name='Arches' members='Arch 1,Arch 2'/></layout>"
+    )
+    index = load_layout(str(path))
+    tree = index.compact_tree()
+    assert "".join(tree.iter_json(chunk_size=1)) == json.dumps(to_dict(index.tree()))
+    assert tree.model_count() == 5
+    root = tree.children(0)
+    assert [tree.name(i) for i in root] == ["Loose", "Yard"]
+    yard = root[1]
+    assert [tree.name(i) for i in tree.children(yard)] == ["Arch 1", 'Star "B"', "Arches"]
+    arches = tree.children(yard)[2]
+    assert tree.kind[arches] == GROUP and tree.parent[arches] == yard
+    assert [tree.kind[i] for i in tree.children(arches)] == [MODEL, MODEL]
+    assert tree.strings[tree.children(arches)[0]] == 1
+    assert tree.nodes[tree.children(arches)[1]] == -1
+
+
+def test_iter_json_has_no_depth_limit(tmp_path):
+    depth = 5000
+    body = "".join(f"<model name='M{i}'/>" for i in range(depth))
+    body += "".join(f"<group name='G{i}' members='G{i + 1},M{i}'/>" for i in range(depth))
+    path = tmp_path / "deep.xml"
+    path.write_text(f"<layout>{body}</layout>")
+    tree = load_layout(str(path)).compact_tree()
+    text = "".join(tree.iter_json())
+    assert len(tree) == 2 * depth + 1
+    assert text.count('"type": "group"') == depth + 1
+    assert text.endswith('"name": "M4999", "type": "model", "strings": null, "nodes": null, "children": []}' + "]}" * (depth + 1))
@@ -0,0 +1,125 @@
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.networks import channel_map, network_load, parse_networks
+from xlights_seq.parsers import load_layout
+
+NETWORKS = """<Networks computer="show">
+  <Controller Name="Porch" Type="Ethernet" Protocol="E131" IP="10.0.0.50">
+    <network NetworkType="E131" BaudRate="1" MaxChannels="510"/>
+    <network NetworkType="E131" BaudRate="2" MaxChannels="510"/>
+  </Controller>
+  <Controller Name="Yard" Type="Ethernet" Protocol="DDP" IP="10.0.0.51">
+    <network NetworkType="DDP" MaxChannels="3000"/>
+  </Controller>
+  <network NetworkType="E131" ComPort="10.0.0.52" BaudRate="10" NumUniverses="2" MaxChannels="512" Description="Matrix"/>
+</Networks>"""
+
+
+def _files(tmp_path, models):
+    networks = tmp_path / "xlights_networks.xml"
+    networks.write_text(NETWORKS)
+    layout = tmp_path / "layout.xml"
+    layout.write_text("<xrgb><models>" + models + "</models></xrgb>")
+    return parse_networks(str(networks)), load_layout(str(layout))
+
+
+def test_parse_networks_numbers_channels(tmp_path):
+    controllers, _ = _files(tmp_path, "")
+    assert [c.name for c in controllers] == ["Porch", "Yard", "Matrix"]
+    porch, yard, matrix = controllers
+    assert [(u.universe, u.start, u.end) for u in porch.universes] == [(1, 1, 510), (2, 511, 1020)]
+    assert yard.universes[0].universe is None and yard.universes[0].start == 1021
+    assert [(u.universe, u.start) for u in matrix.universes] == [(10, 4021), (11, 4533)]
+    assert matrix.ip == "10.0.0.52" and matrix.channels == 1024
+
+
+def test_channel_map_resolves_start_channels(tmp_path):
+    controllers, index = _files(
+        tmp_path,
+        "<model name='Arch 1' StartChannel='1' Nodes='50'/>"
+        "<model name='Arch 2' StartChannel='&gt;Arch 1:1' Nodes='50' StringType='RGBW Nodes'/>"
+        "<model name='Flood' StartChannel='@Arch 2:5' Nodes='2' StringType='Single Color Red'/>"
+        "<model name='Tree' StartChannel='#2:11' DisplayAs='Tree 360' parm1='4' parm2='10'/>"
+        "<model name='Mega' StartChannel='!Yard:1' Nodes='100'/>"
+        "<model name='Panel' StartChannel='#10.0.0.52:11:1' Nodes='10'/>"
+        "<model name='Lost' StartChannel='&gt;Nobody:1' Nodes='1'/>"
+        "<model name='Loop A' StartChannel='&gt;Loop B:1' Nodes='1'/>"
+        "<model name='Loop B' StartChannel='&gt;Loop A:1' Nodes='1'/>"
+        "<model name='Unset' Nodes='1'/>",
+    )
+    cm = channel_map(index, controllers)
+    assert (cm["Arch 1"].start, cm["Arch 1"].end) == (1, 150)
+    assert (cm["Arch 2"].start, cm["Arch 2"].channels) == (151, 200)
+    assert (cm["Flood"].start, cm["Flood"].channels) == (155, 2)
+    assert (cm["Tree"].start, cm["Tree"].channels) == (521, 120)
+    assert cm["Mega"].start == 1021
+    assert cm["Panel"].start == 4533
+    assert cm["Lost"].start is None
+    assert cm["Loop A"].start is None and cm["Loop B"].start is None
+    assert cm["Unset"].start is None and cm["Unset"].spec is None
+
+
+def test_network_load_and_warnings(tmp_path):
+    controllers, index = _files(
+        tmp_path,
+        "<model name='Roof' StartChannel='1' Nodes='200'/>"  # 600 channels: into universe 2
+        "<model name='Window' StartChannel='#1:301' Nodes='100'/>"  # overlaps Roof
+        "<model name='Spill' StartChannel='#2:500' Nodes='10'/>"  # runs into Yard
+        "<model name='Huge' StartChannel='4900' Nodes='100'/>"  # past the last channel
+        "<model name='Bad' StartChannel='#99:1' Nodes='1'/>",
+    )
+    report = network_load(controllers, channel_map(index, controllers), frame_ms=25, link_mbps=1)
+    assert report["fps"] == 40
+    u1, u2, ddp = report["universes"][:3]
+    assert (u1["used"], u1["demand"]) == (510, 720)
+    assert u2["used"] == 90 + 11 and u1["packetsPerSec"] == 40
+    assert ddp["packetsPerSec"] == 3 * 40
+    porch = report["controllers"][0]
+    assert porch["used"] == 611 and porch["channels"] == 1020
+    assert porch["mbps"] == round(2 * (510 + 126 + 42) * 40 * 8 / 1e6, 3)
+    warnings = "\n".join(report["warnings"])
+    assert "Porch universe 1: models ask for 720 of 510 channels" in warnings
+    assert "Spill runs past controller Porch into Yard" in warnings
+    assert "Huge ends at channel 5199, past the last configured channel 5044" in warnings
+    assert "Bad: cannot resolve StartChannel '#99:1'" in warnings
+    assert "Yard needs 1.0 Mbit/s at 40 fps, over its 1 Mbit/s link" in warnings
+    assert "Porch needs" not in warnings
+
+
+def test_model_warnings_are_capped(tmp_path):
+    from xlights_seq.networks import MAX_MODEL_WARNINGS
+
+    models = "".join(f"<model name='P{i}' StartChannel='6000' Nodes='1'/>" for i in range(MAX_MODEL_WARNINGS + 5))
+    controllers, index = _files(tmp_path, models)
+    report = network_load(controllers, channel_map(index, controllers), link_mbps=0.1)
+    assert report["warnings"][0].startswith("Porch needs")
+    assert len(report["warnings"]) == 3 + MAX_MODEL_WARNINGS + 1
+    assert report["warnings"][-1] == "... and 5 more model warnings"
+
+
+def test_oversized_networks_are_clamped(tmp_path):
+    from xlights_seq.networks import MAX_NETWORK_CHANNELS, MAX_UNIVERSES
+
+    networks = tmp_path / "xlights_networks.xml"
+    networks.write_text(
+        "<Networks>"
+        "<network NetworkType='DDP' MaxChannels='2000000000' Description='Big'/>"
+        "<network NetworkType='E131' BaudRate='1' NumUniverses='999999999' Description='Many'/>"
+        "<network NetworkType='E131' BaudRate='9' Description='Late'/>"
+        "</Networks>"
+    )
+    controllers = parse_networks(str(networks))
+    big, many = controllers
+    assert big.channels == MAX_NETWORK_CHANNELS
+    assert big.warnings == [f"Big: MaxChannels 2000000000 is over the limit of {MAX_NETWORK_CHANNELS}; clamped"]
+    assert len(many.universes) == MAX_UNIVERSES - 1
+    assert many.warnings[0].startswith("Many: NumUniverses 999999999 goes past the limit")
+    assert many.warnings[-1].startswith("networks past the limit")
+
+    # a model spanning billions of channels needs no per-channel storage
+    layout = tmp_path / "layout.xml"
+    layout.write_text("<xrgb><models><model name='Wall' StartChannel='1' Nodes='3000000000'/></models></xrgb>")
+    report = network_load(controllers, channel_map(load_layout(str(layout)), controllers))
+    assert report["controllers"][0]["used"] == MAX_NETWORK_CHANNELS
+    assert sum(u["used"] for u in report["universes"]) == report["universes"][-1]["startChannel"] + 511
+    assert big.warnings[0] in report["warnings"]
@@ -0,0 +1,51 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.generator import stream_rgbeffects
+from xlights_seq.parsers import ModelInfo
+from xlights_seq.xsq_writer import stream_xsq
+
+# later shards introduce effects in a different order than earlier ones, so
+# their local effectDB ids have to be renumbered when merged
+MODELS = (
+    [ModelInfo(name=f"Roof {i}", strings=4) for i in range(3)]
+    + [ModelInfo(name=f"Matrix {i}", strings=20 + i) for i in range(4)]
+    + [ModelInfo(name=f"Arch {i}", nodes=10) for i in range(3)]
+    + [ModelInfo(name="Mega Tree", nodes=800, strings=16)]
+)
+BEATS = [i * 0.5 for i in range(24)]
+
+
+def test_parallel_xsq_is_identical(tmp_path):
+    for effect_db in (False, True):
+        serial = tmp_path / f"serial-{effect_db}.xsq"
+        parallel = tmp_path / f"parallel-{effect_db}.xsq"
+        stats = stream_xsq(str(serial), MODELS, BEATS, 12000, effect_db=effect_db)
+        assert stream_xsq(
+            str(parallel), MODELS, BEATS, 12000, effect_db=effect_db, workers=2
+        ) == stats
+        assert parallel.read_bytes() == serial.read_bytes()
+
+
+def test_parallel_rgbeffects_is_identical(tmp_path):
+    kwargs = dict(section_times=[3.0], preferred_groups=["arch 2"], effect_db=True)
+    serial = tmp_path / "serial.xml"
+    parallel = tmp_path / "parallel.xml"
+    stats = stream_rgbeffects(str(serial), MODELS, BEATS, 12000, "meteor", **kwargs)
+    assert stream_rgbeffects(
+        str(parallel), MODELS, BEATS, 12000, "meteor", workers=3, **kwargs
+    ) == stats
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+def test_render_pool_is_reused_across_calls(tmp_path):
+    from xlights_seq import parallel
+
+    first = tmp_path / "first.xsq"
+    second = tmp_path / "second.xsq"
+    stream_xsq(str(first), MODELS, BEATS, 12000, workers=2)
+    pool = parallel._executor
+    assert pool is not None
+    stream_xsq(str(second), MODELS, BEATS, 12000, workers=2)
+    assert parallel._executor is pool
+    assert second.read_bytes() == first.read_bytes()
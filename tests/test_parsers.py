@@ -77,3 +77,85 @@ def test_extract_model_nodes(tmp_path):
     coords = extract_model_nodes(str(tmp_path / "coords.xml"))
     assert coords["Tree"] == [(1.0, 2.0), (3.0, 4.0)]
     assert coords["Star"] == [(5.0, 6.0), (7.0, 8.0)]
+
+
+def test_entry_points_share_one_cached_parse(tmp_path, monkeypatch):
+    import xlights_seq.parsers as parsers
+
+    xml = (
+        "<xrgb><models><model name='Tree' StringCount='4'><node x='1' y='2'/></model>"
+        "<model name='Arch' Nodes='50'/></models>"
+        "<modelGroups><group name='All' members='Tree,Arch'/></modelGroups></xrgb>"
+    )
+    first, second = tmp_path / "a.xml", tmp_path / "b.xml"
+    first.write_text(xml)
+    second.write_text(xml)
+    parses = []
+    real_iterparse = parsers.ET.iterparse
+    monkeypatch.setattr(
+        parsers.ET, "iterparse", lambda *a, **k: parses.append(1) or real_iterparse(*a, **k)
+    )
+
+    assert [m.name for m in parse_models(str(first))] == ["Tree", "Arch"]
+    assert parse_layout_groups_and_models(str(second))[2] == {"All": ["Tree", "Arch"]}
+    assert extract_model_nodes(str(first)) == {"Tree": [(1.0, 2.0)], "Arch": []}
+    tree = parsers.parse_tree(str(second))
+    other, index = parse_tree_with_index(str(first))
+    assert len(parses) == 1
+    assert parsers.load_layout(str(first)) is parsers.load_layout(str(second))
+
+    # trees are built fresh, so callers may modify them
+    assert tree.children[0].name == "All"
+    tree.children.clear()
+    assert parsers.parse_tree(str(first)).children[0].name == "All"
+    assert index["Tree"].parent.name == "All"
+
+    first.write_text(xml.replace("Arch", "Star"))
+    assert [m.name for m in parse_models(str(first))] == ["Tree", "Star"]
+    assert len(parses) == 2
+
+
+def _peak_index_bytes(path):
+    import tracemalloc
+    from xlights_seq.parsers import LayoutIndex
+
+    tracemalloc.start()
+    try:
+        index = LayoutIndex.from_file(str(path))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return index, peak
+
+
+def _write_props(path, grid):
+    with path.open("w") as f:
+        f.write("<xrgb><models>")
+        for i in range(2000):
+            f.write(
+                f"<model name='Prop {i}' StringCount='2' CustomModel='{grid}'>"
+                + "".join(f"<subModel name='S{s}' line0='{grid}'/>" for s in range(4))
+                + "<faceInfo Name='Face'/><node x='1' y='2'/></model>"
+            )
+        f.write("</models></xrgb>")
+
+
+def test_layout_index_streams_large_files(tmp_path):
+    import pytest
+
+    # same models, ~40x the bytes in submodels and custom grids
+    light, heavy = tmp_path / "light.xml", tmp_path / "heavy.xml"
+    _write_props(light, "1;2")
+    _write_props(heavy, ";".join(str(i) for i in range(400)))
+    assert heavy.stat().st_size > 20 * light.stat().st_size
+
+    _, light_peak = _peak_index_bytes(light)
+    index, heavy_peak = _peak_index_bytes(heavy)
+    assert len(index.model_infos()) == 2000
+    assert index.model_nodes()["Prop 7"] == [(1.0, 2.0)]
+    assert heavy_peak < 1.5 * light_peak
+    assert heavy_peak < heavy.stat().st_size / 4
+
+    heavy.write_text("<xrgb><model name='a'></xrgb>")
+    with pytest.raises(ET.ParseError):
+        parse_models(str(heavy))
@@ -0,0 +1,179 @@
+import importlib
+import json
+import os, sys
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import xlights_seq.config as config
+    importlib.reload(config)
+    config.Config.UPLOAD_FOLDER = str(tmp_path / "uploads")
+    config.Config.OUTPUT_FOLDER = str(tmp_path / "generated")
+    config.Config.ANALYSIS_WORKERS = 0
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "app.log"))
+    import app
+    importlib.reload(app)
+    with app.app.test_client() as client:
+        yield client, app
+
+
+def _generate(test_client, tmp_path, prefix="Arch", **form):
+    models = "".join(
+        f"<model name='{prefix} {i}' StringCount='1' NodeCount='50'/>" for i in range(50)
+    )
+    layout_path = tmp_path / "layout.xml"
+    layout_path.write_text(f"<layout>{models}</layout>")
+    audio_path = tmp_path / "audio.mp3"
+    audio_path.write_bytes(b"fake")
+    with layout_path.open("rb") as lf, audio_path.open("rb") as af:
+        data = {"layout": (lf, "layout.xml"), "audio": (af, "audio.mp3"), **form}
+        resp = test_client.post(
+            "/generate", data=data, content_type="multipart/form-data"
+        )
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def _fake_analysis(path, **kwargs):
+    beats = [i * 0.5 for i in range(480)]
+    return {
+        "bpm": 120.0,
+        "duration_s": 240.0,
+        "beat_times": beats,
+        "downbeat_times": beats[::4],
+        "section_times": [0.0, 60.0],
+    }
+
+
+def _no_analysis(*args, **kwargs):
+    raise AssertionError("regenerate must reuse the job's analysis")
+
+
+def test_regenerate_reuses_analysis_and_skips_unchanged_files(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _fake_analysis)
+    job = _generate(test_client, tmp_path, palette="#FF0000")["jobId"]
+    job_dir = tmp_path / "generated" / job
+    xsq = job_dir / "My Sequence.xsq"
+    before = xsq.read_bytes()
+    os.utime(xsq, (1000, 1000))
+
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _no_analysis)
+    resp = test_client.post(f"/regenerate/{job}", data={"preset": "bars"})
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert j["preset"] == "bars"
+    assert j["palette"] == ["#FF0000"]
+    assert j["beatCount"] == 480 and j["modelCount"] == 50
+    assert j["rewritten"] == ["metadata.json"]
+    assert "My Sequence.xsq" in j["unchanged"] and "preview.json" in j["unchanged"]
+    assert os.path.getmtime(xsq) == 1000
+    assert xsq.read_bytes() == before
+    meta = json.loads((job_dir / "metadata.json").read_text())
+    assert meta["preset"] == "bars"
+
+    # nothing changed the second time round
+    j = test_client.post(f"/regenerate/{job}", data={"preset": "bars"}).get_json()
+    assert j["rewritten"] == []
+    assert not any(name.endswith(".new") for name in os.listdir(job_dir))
+
+
+def test_regenerate_rewrites_changed_sequence_and_package(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _fake_analysis)
+    job = _generate(test_client, tmp_path, export_format="xsqz")["jobId"]
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _no_analysis)
+
+    app_module.app.config["EFFECT_DB"] = False
+    j = test_client.post(f"/regenerate/{job}", data={"palette": ""}).get_json()
+    assert j["rewritten"] == ["My Sequence.xsq", "My Sequence.xsqz", "metadata.json"]
+    assert j["compressionRatio"] is None
+    assert j["palette"] is None
+    assert j["downloadUrl"] == f"/download/{job}/My Sequence.xsqz"
+
+
+def test_regenerate_applies_preset_and_palette_to_the_sequence(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _fake_analysis)
+    job = _generate(test_client, tmp_path, prefix="Prop")["jobId"]
+    xsq = tmp_path / "generated" / job / "My Sequence.xsq"
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _no_analysis)
+    assert b"Meteor" not in xsq.read_bytes()
+
+    j = test_client.post(f"/regenerate/{job}", data={"preset": "meteor"}).get_json()
+    assert "My Sequence.xsq" in j["rewritten"]
+    assert b"Meteor" in xsq.read_bytes()
+
+    j = test_client.post(f"/regenerate/{job}", data={"palette": "#123456"}).get_json()
+    assert "My Sequence.xsq" in j["rewritten"]
+    assert b"#123456" in xsq.read_bytes()
+
+
+def test_regenerate_unknown_job(client):
+    test_client, _ = client
+    assert test_client.post("/regenerate/not-a-job").status_code == 404
+    assert test_client.post("/regenerate/..").status_code == 404
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert test_client.post(f"/regenerate/{missing}").status_code == 404
+
+
+def test_regenerate_with_new_layout_rebuilds_only_changed_models(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _fake_analysis)
+    job = _generate(test_client, tmp_path, export_format="xsqz")["jobId"]
+    job_dir = tmp_path / "generated" / job
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _no_analysis)
+
+    models = "".join(
+        f"<model name='Arch {i}' StringCount='{3 if i == 7 else 1}' NodeCount='50'/>"
+        for i in range(50)
+        if i != 10
+    )
+    layout_path = tmp_path / "layout2.xml"
+    layout_path.write_text(f"<layout>{models}<model name='Mega Tree' StringCount='16'/></layout>")
+    with layout_path.open("rb") as lf:
+        resp = test_client.post(
+            f"/regenerate/{job}",
+            data={"layout": (lf, "layout2.xml")},
+            content_type="multipart/form-data",
+        )
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert j["layoutDiff"]["added"] == ["Mega Tree"]
+    assert j["layoutDiff"]["removed"] == ["Arch 10"]
+    assert j["layoutDiff"]["changed"] == ["Arch 7"]
+    assert j["rebuiltModels"] == ["Arch 7", "Mega Tree"]
+    assert len(j["reusedModels"]) == 48 and j["modelCount"] == 50
+    assert j["rewritten"] == [
+        "My Sequence.xsq",
+        "xlights_rgbeffects.xml",
+        "My Sequence.xsqz",
+        "metadata.json",
+    ]
+    assert (job_dir / "xlights_rgbeffects.xml").read_bytes() == layout_path.read_bytes()
+
+    # the spliced sequence is what a full regeneration writes
+    spliced = (job_dir / "My Sequence.xsq").read_bytes()
+    j = test_client.post(f"/regenerate/{job}", data={"preset": "bars"}).get_json()
+    assert j["rebuiltModels"][-1] == "Mega Tree" and j["reusedModels"] == []
+    assert "My Sequence.xsq" not in j["rewritten"]
+    assert (job_dir / "My Sequence.xsq").read_bytes() == spliced
+
+
+def test_regenerate_rejects_bad_layout(client, tmp_path, monkeypatch):
+    test_client, app_module = client
+    monkeypatch.setattr(app_module, "analyze_beats_plus", _fake_analysis)
+    job = _generate(test_client, tmp_path)["jobId"]
+    bad = tmp_path / "bad.xml"
+    bad.write_text("<layout>")
+    with bad.open("rb") as lf:
+        resp = test_client.post(
+            f"/regenerate/{job}",
+            data={"layout": (lf, "bad.xml")},
+            content_type="multipart/form-data",
+        )
+    assert resp.status_code == 400
+    assert not any(n.endswith(".new") for n in os.listdir(tmp_path / "generated" / job))
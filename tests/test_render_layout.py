@@ -43,3 +43,37 @@ def test_render_layout_bad_file(client, tmp_path):
     assert resp.status_code == 400
     j = resp.get_json()
     assert j["ok"] is False
+
+
+def test_render_layout_computes_model_geometry(client, tmp_path):
+    xml = (
+        "<xrgb><models>"
+        "<model name='Matrix' DisplayAs='Horiz Matrix' parm1='4' parm2='20' WorldPosX='50' WorldPosY='30'/>"
+        "<model name='Roof' DisplayAs='Single Line' parm1='1' parm2='50' WorldPosX='0' WorldPosY='80' X2='100' Y2='0'/>"
+        "</models></xrgb>"
+    )
+    path = tmp_path / "layout.xml"
+    path.write_text(xml)
+    with path.open('rb') as f:
+        resp = client.post("/render-layout", data={"layout": (f, "layout.xml")}, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert [len(t["x"]) for t in j["figure"]["data"]] == [80, 50]
+    assert j["bounds"] == {"xmin": 1.0, "xmax": 99.0, "ymin": -80.0, "ymax": -28.5}
+
+
+def test_render_layout_skips_oversized_models(client, tmp_path):
+    xml = (
+        "<xrgb><models>"
+        "<model name='Huge' DisplayAs='Horiz Matrix' parm1='100000' parm2='100000'/>"
+        "<model name='Roof' DisplayAs='Single Line' parm1='1' parm2='50' X2='100' Y2='0'/>"
+        "</models></xrgb>"
+    )
+    path = tmp_path / "layout.xml"
+    path.write_text(xml)
+    with path.open('rb') as f:
+        resp = client.post("/render-layout", data={"layout": (f, "layout.xml")}, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    j = resp.get_json()
+    assert [t["name"] for t in j["figure"]["data"]] == ["Roof"]
+    assert len(j["warnings"]) == 1 and j["warnings"][0].startswith("Huge:")
@@ -0,0 +1,90 @@
+import json
+import os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold `import app` must not pull in librosa's beat tracker (numba JIT) or
+# scipy; those load when analysis first runs or in the background warm-up.
+IMPORT_BUDGET_S = 2.0
+HEAVY_MODULES = ("numba", "scipy", "librosa.beat", "sklearn")
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+elapsed = time.perf_counter() - t0
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def test_import_app_is_fast_and_lazy(tmp_path):
+    env = dict(
+        os.environ,
+        LOG_FILE=str(tmp_path / "app.log"),
+        ANALYSIS_CACHE_DIR=str(tmp_path / "cache"),
+        ANALYSIS_WARMUP="0",
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["loaded"] == []
+    assert result["elapsed"] < IMPORT_BUDGET_S
+
+
+# Run app.py the way the Docker image does (as __main__, with warm-up on) but
+# with the server stubbed out, then push one real analysis through the pool.
+# Spawned workers re-import app.py as __mp_main__, so the import must not
+# start processes of its own.
+MAIN_PROBE = """
+import json, runpy, sys
+import numpy as np, soundfile as sf
+import flask
+
+sys.path.insert(0, %r)
+flask.Flask.run = lambda self, *a, **k: None
+ns = runpy.run_path(%r, run_name="__main__")
+pool = ns["get_analysis_pool"]()
+y = np.zeros(22050 * 4, dtype=np.float32)
+y[::11025] = 1.0
+sf.write("song.wav", y, 22050)
+with open("layout.xml", "w") as f:
+    f.write("<layout><model name='Tree'/></layout>")
+with ns["app"].test_client() as client, open("layout.xml", "rb") as lf, open("song.wav", "rb") as af:
+    resp = client.post(
+        "/generate",
+        data={"layout": (lf, "layout.xml"), "audio": (af, "song.wav")},
+        content_type="multipart/form-data",
+    )
+print(json.dumps({"status": resp.status_code, "started": pool._started}))
+pool.shutdown()
+"""
+
+
+def test_run_as_main_with_warmup_serves_analysis(tmp_path):
+    env = dict(
+        os.environ,
+        LOG_FILE=str(tmp_path / "app.log"),
+        ANALYSIS_CACHE_DIR=str(tmp_path / "cache"),
+        ANALYSIS_WARMUP="1",
+        ANALYSIS_WORKERS="1",
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", MAIN_PROBE % (ROOT, os.path.join(ROOT, "app.py"))],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result == {"status": 200, "started": 1}
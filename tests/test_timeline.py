@@ -0,0 +1,67 @@
+import os, sys
+import xml.etree.ElementTree as ET
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.generator import DOWNBEAT_COLOR, build_rgbeffects, rgbeffects_timeline
+from xlights_seq.parsers import ModelInfo
+from xlights_seq.timeline import EffectTimeline, emit_timeline
+from xlights_seq.xml_stream import XmlFragmentWriter
+from xlights_seq.xsq_writer import build_xsq, xsq_timeline
+
+MODELS = [ModelInfo(name="roof"), ModelInfo(name="Matrix", strings=30)]
+BEATS = [0.0, 0.5, 1.0, 1.5, 2.0]
+
+
+def test_rgbeffects_timeline_columns():
+    tl = rgbeffects_timeline(MODELS, BEATS, 2500, "bars", section_times=[2.0])
+    tl.validate()
+    assert len(tl) == 10
+    assert tl.model_idx.tolist() == [0] * 5 + [1] * 5
+    assert tl.start_ms.tolist() == [0, 500, 1000, 1500, 2000] * 2
+    assert tl.end_ms.tolist() == [550, 1000, 1500, 2000, 2500] * 2
+    assert [tl.types[t] for t in tl.type_id[:5]] == ["Bars"] * 4 + ["Shockwave"]
+    # each (type, params) combination is stored once
+    assert len(tl.param_sets) == len(set(tl.param_sets))
+    assert tl.param_sets[tl.param_id[0]] == (
+        ("Color1", DOWNBEAT_COLOR),
+        ("Bars", "8"),
+        ("Direction", "LeftRight"),
+    )
+    assert tl.model_bounds().tolist() == [0, 5, 10]
+    # the downbeat stretch runs 50ms into the next beat
+    assert np.flatnonzero(tl.overlaps()).tolist() == [1, 6]
+
+
+def test_emit_timeline_matches_documents():
+    for tl, tree in [
+        (rgbeffects_timeline(MODELS, BEATS, 2500, "meteor"), build_rgbeffects(MODELS, BEATS, 2500, "meteor")),
+        (xsq_timeline(MODELS, BEATS, 2500), build_xsq(MODELS, BEATS, 2500)),
+    ]:
+        frag = XmlFragmentWriter()
+        emit_timeline(frag, tl)
+        expected = "".join(
+            ET.tostring(m, encoding="unicode") for m in tree.getroot().findall("model")
+        )
+        assert frag.getvalue() == expected
+
+
+def test_validate_rejects_bad_columns():
+    tl = xsq_timeline(MODELS, BEATS, 2500)
+    tl.validate()
+    bad = EffectTimeline(
+        tl.model_names, tl.model_idx, tl.end_ms, tl.start_ms, tl.type_id, tl.param_id, tl.types, tl.param_sets
+    )
+    with pytest.raises(ValueError, match="ends before"):
+        bad.validate()
+    bad = EffectTimeline(
+        tl.model_names, tl.model_idx[::-1], tl.start_ms, tl.end_ms, tl.type_id, tl.param_id, tl.types, tl.param_sets
+    )
+    with pytest.raises(ValueError, match="grouped by model"):
+        bad.validate()
+    bad = EffectTimeline(
+        tl.model_names, tl.model_idx, tl.start_ms, tl.end_ms, tl.type_id, tl.param_id, tl.types[:1], tl.param_sets
+    )
+    with pytest.raises(ValueError, match="type id"):
+        bad.validate()
@@ -0,0 +1,119 @@
+import importlib
+import os, sys, time
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.workers import AnalysisTimeout, WorkerCrashed, WorkerPool
+
+
+def _pid():
+    return os.getpid()
+
+
+def _sleep(seconds, **kwargs):
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail():
+    raise ValueError("bad audio")
+
+
+def _crash():
+    os._exit(3)
+
+
+def _slow_analysis(path, **kwargs):
+    time.sleep(30)
+
+
+_warm = False
+
+
+def _warm_up():
+    global _warm
+    _warm = True
+
+
+def _is_warm():
+    return _warm
+
+
+@pytest.fixture
+def pool():
+    p = WorkerPool(max_workers=1, timeout=5)
+    yield p
+    p.shutdown()
+
+
+def test_workers_are_reused(pool):
+    first = pool.run(_pid)
+    assert first != os.getpid()
+    assert pool.run(_pid) == first
+    assert pool.run(_sleep, 0, unused=True) == 0
+
+
+def test_timeout_kills_and_replaces_worker(pool):
+    killed = pool.run(_pid)
+    pool.timeout = 0.5
+    t0 = time.time()
+    with pytest.raises(AnalysisTimeout):
+        pool.run(_sleep, 30)
+    assert time.time() - t0 < 5
+    pool.timeout = 5
+    replacement = pool.run(_pid)
+    assert replacement != killed
+
+
+def test_errors_and_crashes(pool):
+    with pytest.raises(ValueError, match="bad audio"):
+        pool.run(_fail)
+    with pytest.raises(WorkerCrashed):
+        pool.run(_crash)
+    assert pool.run(_sleep, 0) == 0
+
+
+def test_prestart_runs_initializer_before_first_job():
+    pool = WorkerPool(max_workers=2, timeout=5, initializer=_warm_up)
+    try:
+        pool.prestart()
+        assert pool._started == 2
+        assert pool.run(_is_warm) is True
+        assert pool._started == 2
+    finally:
+        pool.shutdown()
+
+
+def test_inline_mode_runs_in_process():
+    assert WorkerPool(max_workers=0, timeout=1).run(_pid) == os.getpid()
+
+
+def test_generate_returns_504_on_timeout(tmp_path, monkeypatch):
+    import xlights_seq.config as config
+    importlib.reload(config)
+    config.Config.UPLOAD_FOLDER = str(tmp_path / "uploads")
+    config.Config.OUTPUT_FOLDER = str(tmp_path / "generated")
+    config.Config.ANALYSIS_WORKERS = 1
+    config.Config.ANALYSIS_TIMEOUT = 1
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "app.log"))
+    import app
+    importlib.reload(app)
+    monkeypatch.setattr(app, "analyze_beats_plus", _slow_analysis)
+
+    layout_path = tmp_path / "layout.xml"
+    layout_path.write_text("<layout><model name='Tree'/></layout>")
+    audio_path = tmp_path / "audio.mp3"
+    audio_path.write_bytes(b"fake")
+    try:
+        with app.app.test_client() as client:
+            with layout_path.open("rb") as lf, audio_path.open("rb") as af:
+                data = {"layout": (lf, "layout.xml"), "audio": (af, "audio.mp3")}
+                resp = client.post(
+                    "/generate", data=data, content_type="multipart/form-data"
+                )
+    finally:
+        app.get_analysis_pool().shutdown()
+    assert resp.status_code == 504
+    j = resp.get_json()
+    assert j["ok"] is False
+    assert "timed out" in j["error"]
@@ -0,0 +1,78 @@
+import gzip
+import os, sys, tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from xlights_seq.generator import build_rgbeffects, stream_rgbeffects, write_rgbeffects
+from xlights_seq.parsers import ModelInfo
+from xlights_seq.xml_stream import XmlStreamWriter
+from xlights_seq.xsq_writer import build_xsq, stream_xsq, write_xsq
+
+MODELS = [
+    ModelInfo(name="Mega Tree", nodes=500, strings=16),
+    ModelInfo(name='Arch "A" & <B>\n\tleft', nodes=10, strings=1),
+    ModelInfo(name="Matrix", strings=30),
+    ModelInfo(name="Ünïcode star ★"),
+]
+BEATS = [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+
+
+def test_stream_rgbeffects_matches_tree(tmp_path):
+    kwargs = dict(
+        downbeat_times=[0.0, 2.0],
+        section_times=[1.0],
+        palette=["#111111", "#222222"],
+        preferred_groups=["arch"],
+    )
+    tree_path = tmp_path / "tree.xml"
+    write_rgbeffects(build_rgbeffects(MODELS, BEATS, 3000, "meteor", **kwargs), str(tree_path))
+    stream_path = tmp_path / "stream.xml"
+    stream_rgbeffects(str(stream_path), MODELS, BEATS, 3000, "meteor", **kwargs)
+    assert stream_path.read_bytes() == tree_path.read_bytes()
+
+
+def test_stream_xsq_matches_tree_and_gzips(tmp_path):
+    # no downbeats or sections gives empty, self-closing timing tracks
+    tree_path = tmp_path / "tree.xsq"
+    write_xsq(build_xsq(MODELS, BEATS, 3000), str(tree_path))
+    stream_path = tmp_path / "stream.xsq"
+    stream_xsq(str(stream_path), MODELS, BEATS, 3000)
+    assert stream_path.read_bytes() == tree_path.read_bytes()
+
+    gz_path = tmp_path / "stream.xsq.gz"
+    stream_xsq(str(gz_path), MODELS, BEATS, 3000, compress=True)
+    assert gzip.decompress(gz_path.read_bytes()) == tree_path.read_bytes()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "stream.xsq",
+        "stream.xsq.gz",
+        "tree.xsq",
+    ]
+
+
+def test_failed_stream_leaves_no_file(tmp_path):
+    out = tmp_path / "out.xml"
+    try:
+        with XmlStreamWriter(str(out)) as w:
+            w.start("root", {})
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def _peak_bytes(path, n_models):
+    models = [ModelInfo(name=f"Model {i}", strings=8) for i in range(n_models)]
+    beats = [i * 0.5 for i in range(500)]
+    tracemalloc.start()
+    try:
+        stream_rgbeffects(path, models, beats, 250000, "bars")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def test_stream_memory_is_flat_in_model_count(tmp_path):
+    small = _peak_bytes(str(tmp_path / "small.xml"), 20)
+    large = _peak_bytes(str(tmp_path / "large.xml"), 200)
+    # 200 models x 500 beats is ~1.3M elements as a tree
+    assert large - small < 512 * 1024
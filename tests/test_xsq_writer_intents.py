@@ -24,3 +24,69 @@ def test_build_xsq_from_intents_basic():
     beats_track = root.find("timing[@name='Beats']")
     assert beats_track is not None
     assert beats_track.find("marker").get("timeMS") == "0"
+
+
+def test_intents_are_grouped_per_model_and_sorted():
+    models_by_group = {
+        "Arches": ["Arch 'L'", 'Arch "R"'],
+        "Tree": ["Tree"],
+        "Everything": ["Tree", "Arch 'L'"],
+    }
+    timing = {"beats": [], "downbeats": [], "bars": [], "sections": []}
+    intents = [
+        Intent("SG", "Tree", "Spirals", 2.0, 4.0, {"arms": 3}),
+        Intent("SG", "Arches", "On", 1.0, 1.5, {}),
+        Intent("SG", "Everything", "Shockwave", 0.5, 0.8, {"brightness": 0.9}),
+        Intent("SG", "Missing", "On", 0.0, 1.0, {}),
+        Intent("SG", "Arches", "Bars", 0.0, 0.25, {}),
+    ]
+    root = build_xsq_from_intents(models_by_group, timing, intents, 5.0).getroot()
+
+    models = root.findall("model")
+    assert [m.get("name") for m in models] == ["Tree", "Arch 'L'", 'Arch "R"']
+    spans = {
+        m.get("name"): [
+            (e.get("type"), e.get("startMS"))
+            for e in m.find("effectLayer[@name='Layer 1']").findall("effect")
+        ]
+        for m in models
+    }
+    assert spans == {
+        "Tree": [("Shockwave", "500"), ("Spirals", "2000")],
+        "Arch 'L'": [("Bars", "0"), ("Shockwave", "500"), ("On", "1000")],
+        'Arch "R"': [("Bars", "0"), ("On", "1000")],
+    }
+    assert models[0].find(".//param[@name='brightness']").get("value") == "0.9"
+
+
+def test_overlapping_intents_get_separate_layers():
+    models_by_group = {"Spinners": ["Spinner"]}
+    timing = {"beats": [], "downbeats": [], "bars": [], "sections": []}
+    intents = [
+        Intent("SG", "Spinners", "Spirals", 0.0, 2.0, {}),
+        Intent("SG", "Spinners", "Shockwave", 0.0, 0.35, {}),
+        Intent("SG", "Spinners", "Shockwave", 1.0, 1.35, {}),
+        Intent("SG", "Spinners", "Spirals", 2.0, 4.0, {}),
+    ]
+    root = build_xsq_from_intents(models_by_group, timing, intents, 4.0).getroot()
+    layers = root.findall("./model/effectLayer")
+    assert [layer.get("name") for layer in layers] == ["Layer 1", "Layer 2"]
+    assert [e.get("type") for e in layers[0]] == ["Spirals", "Spirals"]
+    assert [e.get("startMS") for e in layers[1]] == ["0", "1000"]
+
+    merged = build_xsq_from_intents(models_by_group, timing, intents, 4.0, merge=True)
+    layers = merged.getroot().findall("./model/effectLayer")
+    assert [(e.get("startMS"), e.get("endMS")) for e in layers[0]] == [("0", "4000")]
+
+
+def test_intents_expand_nested_groups():
+    models_by_group = {
+        "Yard": ["Arches", "Star", "Loop"],
+        "Arches": ["Arch 1", "Arch 2"],
+        "Loop": ["Yard", "Arch 2", "Bush"],
+    }
+    timing = {"beats": [], "downbeats": [], "bars": [], "sections": []}
+    intents = [Intent("SG", "Yard", "On", 0.0, 1.0, {})]
+    root = build_xsq_from_intents(models_by_group, timing, intents, 2.0).getroot()
+    names = [m.get("name") for m in root.findall("model")]
+    assert names == ["Arch 1", "Arch 2", "Star", "Bush"]
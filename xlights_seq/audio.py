@@ -1,70 +1,559 @@
+# librosa (0.10+) defers its submodules until first attribute access, so
+# importing this module stays cheap; librosa.beat and its numba kernels are
+# only compiled when analysis first runs (see warm_up).
 import librosa
 import numpy as np
+import soundfile as sf
+from dataclasses import dataclass, field
+import hashlib
+import json
+import math
 import os
 import subprocess
-import tempfile
+import time
+import zipfile
 
+# Bump whenever a change to the analysis code alters its results so stale
+# cache entries are not served.
+ANALYZER_VERSION = "2"
 
-def analyze_beats(audio_path: str):
-    """Analyze an audio file for beat times and musical sections.
+# librosa defaults; the "balanced" profile below reproduces them
+DEFAULT_SR = 22050
+DEFAULT_HOP_LENGTH = 512
+DEFAULT_N_FFT = 2048
 
-    Besides tempo and beat locations this function also computes an
-    onset-strength envelope and performs a very coarse segmentation by
-    looking for large increases in that envelope.  Each detected jump
-    marks the beginning of a new "Section".  The results are suitable for
-    driving a secondary timing track in xLights.
+# Tracks longer than this are analyzed block by block (see _stream_features)
+STREAM_MIN_DURATION_S = 600.0
 
-    Returns a dictionary with the following keys:
+# Spectrogram frames per streamed block (~12s at the default hop length)
+STREAM_BLOCK_FRAMES = 512
 
-    ``bpm``
-        Estimated tempo in beats-per-minute.
-    ``beat_times``
-        List of beat locations (seconds).
-    ``onset_strength``
-        Beat-synchronous onset strength values.
-    ``duration_s``
-        Total duration of the audio in seconds.
-    ``sections``
-        List of ``{"time": float, "label": str}`` entries marking when a
-        new section starts.
+
+@dataclass(frozen=True)
+class AnalysisProfile:
+    """Speed/accuracy trade-off for feature extraction.
+
+    ``sr`` and ``res_type`` control decoding, ``hop_length`` the frame rate
+    of the onset envelope (the FFT size scales with ``sr``) and
+    ``tightness`` how strictly the beat tracker sticks to the tempo estimate.
     """
 
-    # Load mono for speed
+    name: str
+    sr: int
+    res_type: str
+    hop_length: int
+    tightness: float
+
+    @property
+    def n_fft(self) -> int:
+        return int(2 ** round(np.log2(DEFAULT_N_FFT * self.sr / DEFAULT_SR)))
+
+
+PROFILES = {
+    # interactive previews: half the sample rate, cheapest resampler
+    "fast": AnalysisProfile("fast", 11025, "soxr_lq", 512, 100),
+    # librosa defaults
+    "balanced": AnalysisProfile("balanced", DEFAULT_SR, "soxr_hq", DEFAULT_HOP_LENGTH, 100),
+    # final exports: finer beat placement and a steadier grid
+    "accurate": AnalysisProfile("accurate", DEFAULT_SR, "soxr_vhq", 256, 400),
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(profile: "str | AnalysisProfile") -> AnalysisProfile:
+    """Resolve a profile name; raises ``ValueError`` for unknown names."""
+    if isinstance(profile, AnalysisProfile):
+        return profile
     try:
-        y, sr = librosa.load(audio_path, mono=True)
-    except Exception:
-        # Attempt to convert the input to a temporary 44.1kHz mono wav
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp_path = tmp.name
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown analysis profile {profile!r} (choose from {', '.join(PROFILES)})"
+        ) from None
+
+
+def audio_digest(audio_path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of the file at ``audio_path``."""
+    h = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """Content-addressed on-disk cache for analysis results.
+
+    Entries are ``.npz`` files named after a hash of the audio bytes and the
+    analysis parameters, so renamed or re-uploaded copies of the same song
+    share an entry. Reading an entry bumps its mtime; once the directory grows
+    past ``max_bytes`` the least recently used entries are evicted.
+
+    Only numeric results are supported: scalars come back as Python numbers
+    and everything else as NumPy arrays with their original dtype.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, audio_path: str, **params) -> str:
+        params = {"analyzer_version": ANALYZER_VERSION, **params}
+        h = hashlib.sha256(audio_digest(audio_path).encode("ascii"))
+        h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: str):
+        path = self._path(key)
         try:
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    audio_path,
-                    "-ac",
-                    "1",
-                    "-ar",
-                    "44100",
-                    tmp_path,
-                ],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            y, sr = librosa.load(tmp_path, mono=True)
-        finally:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-
-    # Beat tracking gives us the tempo and beat frame indices
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr, trim=True)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-
-    # Compute onset strength and sample it at the beat locations
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-    beat_env = onset_env[beat_frames]
+            with np.load(path, allow_pickle=False) as data:
+                result = {
+                    k: data[k].item() if data[k].ndim == 0 else data[k]
+                    for k in data.files
+                }
+            os.utime(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        arrays = {k: np.asarray(v) for k, v in result.items()}
+        tmp = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+
+@dataclass
+class AudioFeatures:
+    """Features shared by every analyzer, extracted in a single pass.
+
+    ``onset_env`` is librosa's default (mean-aggregated) onset strength and
+    ``beat_frames`` index into it. ``cache_hit`` records whether the features
+    came from an :class:`AnalysisCache` and is not persisted.
+    """
+
+    sr: int
+    hop_length: int
+    duration_s: float
+    tempo: float
+    beat_frames: np.ndarray
+    onset_env: np.ndarray
+    cache_hit: bool = field(default=False, compare=False)
+
+    @property
+    def beat_times(self) -> np.ndarray:
+        return librosa.frames_to_time(
+            self.beat_frames, sr=self.sr, hop_length=self.hop_length
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "sr": self.sr,
+            "hop_length": self.hop_length,
+            "duration_s": self.duration_s,
+            "tempo": self.tempo,
+            "beat_frames": np.asarray(self.beat_frames, dtype=np.int64),
+            "onset_env": np.asarray(self.onset_env),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict, cache_hit: bool = False) -> "AudioFeatures":
+        return cls(
+            sr=int(d["sr"]),
+            hop_length=int(d["hop_length"]),
+            duration_s=float(d["duration_s"]),
+            tempo=float(d["tempo"]),
+            beat_frames=np.asarray(d["beat_frames"], dtype=np.int64),
+            onset_env=np.asarray(d["onset_env"]),
+            cache_hit=cache_hit,
+        )
+
+
+def _ffmpeg_decode(
+    audio_path: str,
+    sr: int,
+    chunk_bytes: int = 1 << 20,
+    offset: float = 0.0,
+    duration: float | None = None,
+) -> np.ndarray:
+    """Decode ``audio_path`` with ffmpeg straight into a float32 mono buffer.
+
+    ffmpeg downmixes and resamples to ``sr`` and writes raw little-endian
+    float32 PCM to stdout, which is read directly into a growing NumPy array;
+    nothing touches the disk. ``offset``/``duration`` (seconds) decode only
+    that window; ffmpeg seeks in the input rather than decoding up to it.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    if offset:
+        cmd += ["-ss", f"{offset:.3f}"]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += [
+        "-i",
+        audio_path,
+        "-f",
+        "f32le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sr),
+        "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        buf = np.empty(int(sr * min(30.0, duration or 30.0)) + 1, dtype=np.float32)
+        raw = memoryview(buf).cast("B")
+        filled = 0
+        while True:
+            if filled == len(raw):
+                grown = np.empty(2 * len(buf), dtype=np.float32)
+                grown[: len(buf)] = buf
+                buf, raw = grown, memoryview(grown).cast("B")
+            n = proc.stdout.readinto(raw[filled : filled + chunk_bytes])
+            if not n:
+                break
+            filled += n
+        stderr = proc.stderr.read()
+    finally:
+        proc.stdout.close()
+        proc.stderr.close()
+        proc.wait()
+    if proc.returncode != 0:
+        msg = stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"ffmpeg could not decode {audio_path}: {msg}")
+    return buf[: filled // 4]
+
+
+def _load_audio(
+    audio_path: str,
+    profile: AnalysisProfile,
+    offset: float = 0.0,
+    duration: float | None = None,
+):
+    """Decode ``audio_path`` to mono, falling back to ffmpeg for odd formats.
+
+    ``offset``/``duration`` (seconds) limit decoding to a window of the file.
+    """
+    window = {}
+    if offset:
+        window["offset"] = offset
+    if duration is not None:
+        window["duration"] = duration
+    try:
+        return librosa.load(
+            audio_path, sr=profile.sr, mono=True, res_type=profile.res_type, **window
+        )
+    except Exception:
+        return _ffmpeg_decode(audio_path, profile.sr, **window), profile.sr
+
+
+def audio_duration(audio_path: str) -> float:
+    """Length of ``audio_path`` in seconds, read from its header.
+
+    libsndfile handles WAV/FLAC/MP3; other formats (m4a/aac) fall back to
+    ``ffprobe``. Raises ``RuntimeError`` when neither can read the file.
+    """
+    try:
+        return float(sf.info(audio_path).duration)
+    except Exception:
+        pass
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        audio_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        return float(out.stdout.strip())
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        raise RuntimeError(f"could not read the duration of {audio_path}") from None
+
+
+def check_window(
+    start_s: float | None,
+    end_s: float | None,
+    track_s: float | None = None,
+):
+    """Validate a ``start_s``/``end_s`` window; returns ``(offset, duration)``.
+
+    With the track length ``track_s`` the window must start inside the
+    track, and ``end_s`` is clamped to it.
+    """
+    for key, value in (("start_s", start_s), ("end_s", end_s)):
+        if value is not None and not math.isfinite(float(value)):
+            raise ValueError(f"{key} must be a finite number of seconds")
+    offset = float(start_s or 0.0)
+    if offset < 0:
+        raise ValueError("start_s must not be negative")
+    if track_s is not None and offset >= track_s:
+        raise ValueError(f"start_s must be before the end of the audio ({track_s:.2f}s)")
+    if end_s is None:
+        return offset, None
+    if float(end_s) <= offset:
+        raise ValueError("end_s must be after start_s")
+    end = float(end_s) if track_s is None else min(float(end_s), track_s)
+    return offset, end - offset
+
+
+def _should_stream(audio_path: str) -> bool:
+    """Stream only long files that libsndfile can read block by block."""
+    try:
+        return sf.info(audio_path).duration > STREAM_MIN_DURATION_S
+    except Exception:
+        return False
+
+
+def _chunked_tempo(onset_env: np.ndarray, sr: int, hop: int, chunk: int) -> float:
+    """Global tempo estimate equal to librosa's, computed ``chunk`` frames at a time.
+
+    :func:`librosa.feature.tempo` averages a tempogram that holds one
+    autocorrelation window per envelope frame, which is by far the largest
+    allocation for long tracks. Summing the tempogram columns chunk by chunk
+    gives the same mean while keeping memory bounded.
+    """
+    if not onset_env.any():
+        return 0.0
+    win_length = librosa.time_to_frames(8.0, sr=sr, hop_length=hop).item()
+    n = len(onset_env)
+    padded = np.pad(onset_env, win_length // 2, mode="linear_ramp", end_values=[0, 0])
+    total = np.zeros(win_length)
+    for start in range(0, n, chunk):
+        stop = min(n, start + chunk)
+        tg = librosa.feature.tempogram(
+            onset_envelope=padded[start : stop + win_length - 1],
+            sr=sr,
+            hop_length=hop,
+            win_length=win_length,
+            center=False,
+        )
+        total += tg.sum(axis=1)
+    return float(
+        librosa.feature.tempo(tg=(total / n)[:, None], sr=sr, hop_length=hop).item()
+    )
+
+
+def _stream_features(
+    audio_path: str,
+    profile: AnalysisProfile,
+    block_frames: int = STREAM_BLOCK_FRAMES,
+) -> AudioFeatures:
+    """Compute features from fixed-size blocks without loading the whole file.
+
+    Audio stays at its native sample rate; hop and FFT sizes are scaled so
+    frames cover the same time span as the in-memory path for ``profile``. Each block's mel
+    spectrogram is differenced against the previous block's last frame so the
+    onset envelope is continuous across block boundaries. Peak memory depends
+    on ``block_frames``, not on track length; only the envelopes (a few bytes
+    per frame) grow with the song.
+
+    Unlike :func:`librosa.onset.onset_strength`, dB values are not clipped
+    relative to the global maximum (that would need the whole spectrogram), so
+    envelopes can differ slightly in near-silent passages.
+    """
+    sr = int(librosa.get_samplerate(audio_path))
+    scale = sr / profile.sr
+    hop = max(1, int(round(profile.hop_length * scale)))
+    n_fft = int(2 ** round(np.log2(profile.n_fft * scale)))
+
+    mean_parts, median_parts = [], []
+    prev = None
+    for block in librosa.stream(
+        audio_path,
+        block_length=block_frames,
+        frame_length=n_fft,
+        hop_length=hop,
+        mono=True,
+    ):
+        if len(block) < n_fft:
+            block = np.pad(block, (0, n_fft - len(block)))
+        S = librosa.power_to_db(
+            librosa.feature.melspectrogram(
+                y=block,
+                sr=sr,
+                n_fft=n_fft,
+                hop_length=hop,
+                center=False,
+                fmax=profile.sr / 2,
+            ),
+            top_db=None,
+        )
+        if prev is not None:
+            S = np.concatenate([prev, S], axis=1)
+        diff = np.maximum(0.0, S[:, 1:] - S[:, :-1])
+        mean_parts.append(diff.mean(axis=0))
+        median_parts.append(np.median(diff, axis=0))
+        prev = S[:, -1:]
+
+    # Align with onset_strength's output: our uncentered frames start half a
+    # window earlier than librosa's centered ones, and onset_strength then
+    # shifts by lag + another half window on top of that.
+    pad = np.zeros(1 + n_fft // hop, dtype=np.float32)
+    onset_env = np.concatenate([pad, *mean_parts])
+    beat_env = np.concatenate([pad, *median_parts])
+    tempo, beat_frames = librosa.beat.beat_track(
+        onset_envelope=beat_env,
+        sr=sr,
+        hop_length=hop,
+        bpm=_chunked_tempo(beat_env, sr, hop, block_frames),
+        tightness=profile.tightness,
+        trim=True,
+    )
+    return AudioFeatures(
+        sr=sr,
+        hop_length=hop,
+        duration_s=float(librosa.get_duration(path=audio_path)),
+        tempo=float(np.atleast_1d(tempo)[0]),
+        beat_frames=np.asarray(beat_frames, dtype=np.int64),
+        onset_env=onset_env,
+    )
+
+
+def extract_features(
+    audio_path: str,
+    cache: AnalysisCache | None = None,
+    stream: bool | None = None,
+    profile: "str | AnalysisProfile" = DEFAULT_PROFILE,
+    start_s: float | None = None,
+    end_s: float | None = None,
+) -> AudioFeatures:
+    """Decode ``audio_path`` once and derive everything the analyzers need.
+
+    The mel spectrogram is computed a single time; both the mean onset
+    envelope (kept on the result) and the median envelope used for beat
+    tracking are aggregated from it, and the beat tracker runs once.
+
+    ``stream`` selects bounded-memory block processing (see
+    :func:`_stream_features`). The default picks it automatically for files
+    longer than ``STREAM_MIN_DURATION_S``. ``profile`` is a name from
+    ``PROFILES`` or an :class:`AnalysisProfile`.
+
+    ``start_s``/``end_s`` analyze only that window of the track (either may
+    be omitted); times in the result are relative to ``start_s``. Windows
+    are always decoded in memory.
+    """
+    profile = get_profile(profile)
+    offset, duration = check_window(start_s, end_s)
+    windowed = bool(offset) or duration is not None
+    if windowed:
+        stream = False
+    elif stream is None:
+        stream = _should_stream(audio_path)
+
+    key = None
+    if cache is not None:
+        key = cache.key(
+            audio_path,
+            sr=profile.sr,
+            res_type=profile.res_type,
+            hop_length=profile.hop_length,
+            tightness=profile.tightness,
+            mode="stream" if stream else "memory",
+            # only windowed keys carry the window, so full-track entries stay valid
+            **({"start_s": offset, "end_s": end_s} if windowed else {}),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return AudioFeatures.from_dict(cached, cache_hit=True)
+
+    if stream:
+        features = _stream_features(audio_path, profile)
+    else:
+        features = _memory_features(audio_path, profile, offset, duration)
+    if cache is not None:
+        cache.put(key, features.to_dict())
+    return features
+
+
+def _memory_features(
+    audio_path: str,
+    profile: AnalysisProfile,
+    offset: float = 0.0,
+    duration: float | None = None,
+) -> AudioFeatures:
+    y, sr = _load_audio(audio_path, profile, offset, duration)
+    return _features_from_signal(y, sr, profile)
+
+
+def _features_from_signal(y: np.ndarray, sr: int, profile: AnalysisProfile) -> AudioFeatures:
+    hop, n_fft = profile.hop_length, profile.n_fft
+    S = librosa.power_to_db(
+        librosa.feature.melspectrogram(y=y, sr=sr, n_fft=n_fft, hop_length=hop)
+    )
+    onset_env = librosa.onset.onset_strength(S=S, sr=sr, n_fft=n_fft, hop_length=hop)
+    beat_env = librosa.onset.onset_strength(
+        S=S, sr=sr, n_fft=n_fft, hop_length=hop, aggregate=np.median
+    )
+    tempo, beat_frames = librosa.beat.beat_track(
+        onset_envelope=beat_env,
+        sr=sr,
+        hop_length=hop,
+        tightness=profile.tightness,
+        trim=True,
+    )
+    return AudioFeatures(
+        sr=int(sr),
+        hop_length=hop,
+        duration_s=float(librosa.get_duration(y=y, sr=sr)),
+        tempo=float(np.atleast_1d(tempo)[0]),
+        beat_frames=np.asarray(beat_frames, dtype=np.int64),
+        onset_env=np.asarray(onset_env),
+    )
+
+
+def warm_up() -> float:
+    """Load librosa's beat tracker and run each profile on a synthetic signal.
+
+    Importing ``librosa.beat`` JIT-compiles its numba kernels, which takes
+    several seconds; running the pipeline once also fills numba's on-disk
+    cache (``NUMBA_CACHE_DIR``) for kernels that support it. Call this from a
+    background thread or a worker initializer so the first real request does
+    not pay for compilation. Returns the seconds spent.
+    """
+    t0 = time.perf_counter()
+    for profile in PROFILES.values():
+        y = np.zeros(profile.sr * 4, dtype=np.float32)
+        y[:: profile.sr // 2] = 1.0  # 120 BPM clicks
+        _features_from_signal(y, profile.sr, profile)
+    return time.perf_counter() - t0
+
+
+def beats_from_features(features: AudioFeatures) -> dict:
+    """Beat times plus a coarse onset-jump segmentation; see :func:`analyze_beats`."""
+    beat_times = features.beat_times
+    beat_env = features.onset_env[features.beat_frames]
 
     sections = []
     if len(beat_env) > 1:
@@ -80,27 +569,23 @@ def analyze_beats(audio_path: str):
                 })
                 section_no += 1
 
-    duration = float(librosa.get_duration(y=y, sr=sr))
     return {
-        "bpm": float(tempo),
+        "bpm": features.tempo,
         "beat_times": beat_times.tolist(),
         "onset_strength": beat_env.tolist(),
-        "duration_s": duration,
+        "duration_s": features.duration_s,
         "sections": sections,
     }
 
 
-def analyze_beats_plus(audio_path: str):
-    y, sr = librosa.load(audio_path, mono=True)
-    tempo, beats_time = librosa.beat.beat_track(y=y, sr=sr, units="time", trim=True)
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-    _, beats_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, trim=True)
-    beats_time2 = librosa.frames_to_time(beats_frames, sr=sr)
-    downbeats_time = beats_time2[::4] if len(beats_time2) else np.array([])
-    duration = float(librosa.get_duration(y=y, sr=sr))
+def beats_plus_from_features(features: AudioFeatures) -> dict:
+    """Beats, downbeats and a coarse section grid; see :func:`analyze_beats_plus`."""
+    beats_time = features.beat_times
+    downbeats_time = beats_time[::4] if len(beats_time) else np.array([])
+    duration = features.duration_s
     sections_time = np.arange(0.0, duration, 15.0)  # coarse 15s grid MVP
     return {
-        "bpm": float(tempo),
+        "bpm": features.tempo,
         "beat_times": beats_time.tolist(),
         "downbeat_times": downbeats_time.tolist(),
         "section_times": sections_time.tolist(),
@@ -108,62 +593,121 @@ def analyze_beats_plus(audio_path: str):
     }
 
 
-def analyze_intel(audio_path: str, plan: dict):
-    """Analyze an audio file with quantization and optional swing.
+def retime_intel(features: AudioFeatures, plan: dict) -> dict:
+    """Apply the plan's timing choices to already-extracted features.
 
-    This function provides a more robust timing analysis by quantizing
-    beats to a regular grid and optionally applying swing to the off-beats.
-    It also estimates downbeats, bars, and coarse sections which can be
-    overridden by the ``plan`` parameter.
+    This is the cheap half of :func:`analyze_intel`: it never touches the
+    audio, so edits to ``tempo_bpm_estimate``, ``swing_percent`` or section
+    starts only cost a few vectorized NumPy operations. Pair it with
+    :func:`extract_features` (ideally with an :class:`AnalysisCache`) to
+    re-time a song without re-decoding it.
     """
-
-    y, sr = librosa.load(audio_path, mono=True)
-
     # 1) BPM estimate and beats
-    tempo, beats_t = librosa.beat.beat_track(y=y, sr=sr, units="time", trim=True)
+    tempo = features.tempo
+    beats_t = np.asarray(features.beat_times, dtype=np.float64)
 
     # Allow manual override from plan
     if plan.get("meta", {}).get("tempo_bpm_estimate"):
         tempo = float(plan["meta"]["tempo_bpm_estimate"])
 
-    # 2) Downbeats = every 4 beats (fallback)
-    downbeats_t = beats_t[::4] if len(beats_t) else np.array([])
-
-    # 3) Bars (alias of downbeats for UI)
-    bars_t = downbeats_t
+    # 2) Downbeats = every 4 beats (fallback); 3) bars alias them for the UI
+    downbeats_t = beats_t[::4]
 
     # 4) Sections: use plan sections if present else coarse 12–18s grid
     if plan.get("sections"):
-        secs = [float(s.get("start", 0)) for s in plan["sections"] if "start" in s]
-        section_t = np.array(sorted({t for t in secs if t >= 0}))
+        secs = np.array(
+            [float(s.get("start", 0)) for s in plan["sections"] if "start" in s]
+        )
+        section_t = np.unique(secs[secs >= 0])
     else:
-        duration = float(librosa.get_duration(y=y, sr=sr))
-        grid = 15.0
-        section_t = np.arange(0.0, duration, grid)
+        section_t = np.arange(0.0, features.duration_s, 15.0)
 
     # 5) Quantization to a grid (reduce jitter)
     period = 60.0 / tempo if tempo > 0 else 0.5
+    beats_t_q = np.round(beats_t / (period / 2)) * (period / 2)  # eighth-note grid
+    downbeats_t_q = np.round(downbeats_t / period) * period
 
-    def quantize(ts, base=0.0, step=period / 2):
-        if ts is None or len(ts) == 0:
-            return ts
-        return np.round((ts - base) / step) * step + base
-
-    beats_t_q = quantize(beats_t, step=period / 2)  # eighth-note grid
-    downbeats_t_q = quantize(downbeats_t, step=period)
-    bars_t_q = downbeats_t_q
-
-    # 6) Optional swing % from plan (± push/pull off-beats)
+    # 6) Optional swing % from plan: push the odd eighths late
     swing = float(plan.get("global", {}).get("swing_percent", 0)) / 100.0
     if swing:
-        # push odd eighths, pull even (lightest implementation)
-        for i in range(1, len(beats_t_q), 2):
-            beats_t_q[i] += period / 2 * swing
+        beats_t_q[1::2] += period / 2 * swing
 
     return {
         "tempo": float(tempo),
         "beats": beats_t_q.tolist(),
         "downbeats": downbeats_t_q.tolist(),
-        "bars": bars_t_q.tolist(),
+        "bars": downbeats_t_q.tolist(),
         "sections": section_t.tolist(),
     }
+
+
+def analyze_beats(audio_path: str, profile: "str | AnalysisProfile" = DEFAULT_PROFILE):
+    """Analyze an audio file for beat times and musical sections.
+
+    Besides tempo and beat locations this function also computes an
+    onset-strength envelope and performs a very coarse segmentation by
+    looking for large increases in that envelope.  Each detected jump
+    marks the beginning of a new "Section".  The results are suitable for
+    driving a secondary timing track in xLights.
+
+    Returns a dictionary with the following keys:
+
+    ``bpm``
+        Estimated tempo in beats-per-minute.
+    ``beat_times``
+        List of beat locations (seconds).
+    ``onset_strength``
+        Beat-synchronous onset strength values.
+    ``duration_s``
+        Total duration of the audio in seconds.
+    ``sections``
+        List of ``{"time": float, "label": str}`` entries marking when a
+        new section starts.
+    """
+    return beats_from_features(extract_features(audio_path, profile=profile))
+
+
+def analyze_beats_plus(
+    audio_path: str,
+    cache: AnalysisCache | None = None,
+    profile: "str | AnalysisProfile" = DEFAULT_PROFILE,
+    start_s: float | None = None,
+    end_s: float | None = None,
+):
+    """Analyze beats, downbeats and a coarse section grid for ``/generate``.
+
+    When ``cache`` is given, the extracted features are looked up by audio
+    content first and stored after a miss. The returned dictionary then
+    carries a ``cache_hit`` flag.
+
+    ``start_s``/``end_s`` analyze only that window; all times (and
+    ``duration_s``) are then relative to the window start.
+    """
+    features = extract_features(
+        audio_path, cache=cache, profile=profile, start_s=start_s, end_s=end_s
+    )
+    result = beats_plus_from_features(features)
+    if cache is not None:
+        result["cache_hit"] = features.cache_hit
+    return result
+
+
+def analyze_intel(
+    audio_path: str,
+    plan: dict,
+    profile: "str | AnalysisProfile" = DEFAULT_PROFILE,
+    cache: AnalysisCache | None = None,
+):
+    """Analyze an audio file with quantization and optional swing.
+
+    This function provides a more robust timing analysis by quantizing
+    beats to a regular grid and optionally applying swing to the off-beats.
+    It also estimates downbeats, bars, and coarse sections which can be
+    overridden by the ``plan`` parameter.
+
+    The audio-dependent part is :func:`extract_features`, served from
+    ``cache`` when given; the plan is applied by :func:`retime_intel`, so
+    re-running with an edited plan does not re-analyze the audio.
+    """
+    features = extract_features(audio_path, cache=cache, profile=profile)
+    return retime_intel(features, plan)
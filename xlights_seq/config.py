@@ -2,7 +2,8 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "devkey")
-    MAX_CONTENT_LENGTH = 25 * 1024 * 1024  # 25MB
+    # Upload cap; layouts are parsed streaming, so large ones only cost disk
+    MAX_CONTENT_LENGTH = int(os.environ.get("MAX_UPLOAD_MB", "25")) * 1024 * 1024
     UPLOAD_FOLDER = os.path.abspath("uploads")
     OUTPUT_FOLDER = os.path.abspath("generated")
     ALLOWED_XML = {"xml"}
@@ -12,3 +13,21 @@ class Config:
     )
     VERSION = os.environ.get("APP_VERSION", "dev")
     ANALYSIS_TIMEOUT = int(os.environ.get("ANALYSIS_TIMEOUT", "30"))
+    # Worker processes for audio analysis; 0 runs analysis in the request thread
+    ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "2"))
+    # Compile librosa's beat tracker in the background at startup
+    ANALYSIS_WARMUP = os.environ.get("ANALYSIS_WARMUP", "0") == "1"
+    # Analysis cache; defaults to <OUTPUT_FOLDER>/analysis-cache when unset
+    ANALYSIS_CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR")
+    ANALYSIS_CACHE_MAX_MB = int(os.environ.get("ANALYSIS_CACHE_MAX_MB", "256"))
+    # Default audio analysis profile: fast | balanced | accurate
+    ANALYSIS_PROFILE = os.environ.get("ANALYSIS_PROFILE", "balanced")
+    # Write each unique effect once in an effectDB table; 0 keeps the verbose
+    # per-effect type/params format
+    EFFECT_DB = os.environ.get("EFFECT_DB", "1") == "1"
+    # Processes used to render sequence models; 1 renders in the request thread
+    SEQUENCE_WORKERS = int(os.environ.get("SEQUENCE_WORKERS", "1"))
+    # Sequence frame interval (ms) and controller link speed for the
+    # networks load estimate
+    FRAME_MS = int(os.environ.get("FRAME_MS", "50"))
+    NETWORK_LINK_MBPS = float(os.environ.get("NETWORK_LINK_MBPS", "100"))
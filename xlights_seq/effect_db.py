@@ -0,0 +1,129 @@
+from .xml_stream import _escape_attrib
+
+
+def _utf8_len(text: str) -> int:
+    return len(text.encode("utf-8", "xmlcharrefreplace"))
+
+
+class EffectDB:
+    """Shared table of effect definitions, like xLights' own ``EffectDB``.
+
+    Each unique ``(effect type, params)`` pair is stored once as an
+    ``effectDef`` and per-beat ``effect`` elements carry only its ``ref``
+    instead of a ``type`` attribute and ``param`` children. Emit the table
+    with :meth:`emit` once every effect has been referenced; it goes after
+    the models so documents can still be streamed in one pass.
+
+    Byte counts of what each reference replaces are kept as effects are
+    interned, so :meth:`stats` can report the verbose document size without
+    writing it.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._defs = []
+        self._counts = []
+        self._saved = []  # per definition: verbose minus compact effect bytes
+        self._table_bytes = _utf8_len("<effectDB />")
+
+    def ref(self, eff_type: str, params) -> str:
+        """Return the definition id for ``eff_type`` with ``params`` items."""
+        key = (eff_type, tuple(params))
+        ref = self._ids.get(key)
+        if ref is None:
+            ref = self._intern(key)
+        self._counts[int(ref)] += 1
+        return ref
+
+    def _intern(self, key):
+        eff_type, params = key
+        ref = str(len(self._defs))
+        self._ids[key] = ref
+        self._defs.append(key)
+        self._counts.append(0)
+
+        children = "".join(
+            f'<param name="{_escape_attrib(k)}" value="{_escape_attrib(v)}" />'
+            for k, v in params
+        )
+        type_attr = f' type="{_escape_attrib(eff_type)}"'
+        if children:
+            verbose = f"{type_attr}>{children}</effect>"
+            definition = f'<effectDef id="{ref}"{type_attr}>{children}</effectDef>'
+        else:
+            verbose = f"{type_attr} />"
+            definition = f'<effectDef id="{ref}"{type_attr} />'
+        self._saved.append(_utf8_len(verbose) - _utf8_len(f' ref="{ref}" />'))
+        if len(self._defs) == 1:
+            # "<effectDB />" becomes "<effectDB>...</effectDB>"
+            self._table_bytes += _utf8_len("</effectDB>") - 2
+        self._table_bytes += _utf8_len(definition)
+        return ref
+
+    def export(self):
+        """Definitions and use counts in id order, for :meth:`merge`."""
+        return list(zip(self._defs, self._counts))
+
+    def merge(self, exported) -> dict:
+        """Fold another table's :meth:`export` into this one.
+
+        Returns a mapping of the other table's ids to ids here. Merging the
+        tables of consecutive model shards in order assigns the same ids as
+        referencing every effect through a single table.
+        """
+        mapping = {}
+        for local, (key, count) in enumerate(exported):
+            ref = self._ids.get(key)
+            if ref is None:
+                ref = self._intern(key)
+            self._counts[int(ref)] += count
+            mapping[str(local)] = ref
+        return mapping
+
+    @property
+    def effects(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def saved_bytes(self) -> int:
+        return sum(c * s for c, s in zip(self._counts, self._saved))
+
+    def __len__(self):
+        return len(self._defs)
+
+    def emit(self, builder):
+        """Emit the ``effectDB`` table to ``builder``."""
+        builder.start("effectDB", {})
+        for ref, (eff_type, params) in enumerate(self._defs):
+            builder.start("effectDef", {"id": str(ref), "type": eff_type})
+            for k, v in params:
+                builder.start("param", {"name": k, "value": v})
+                builder.end("param")
+            builder.end("effectDef")
+        builder.end("effectDB")
+
+    def stats(self, document_bytes: int) -> dict:
+        """Size comparison for a compact document of ``document_bytes``."""
+        verbose_bytes = document_bytes - self._table_bytes + self.saved_bytes
+        return {
+            "effects": self.effects,
+            "definitions": len(self._defs),
+            "bytes": document_bytes,
+            "verbose_bytes": verbose_bytes,
+            "compression_ratio": round(verbose_bytes / document_bytes, 2)
+            if document_bytes
+            else 1.0,
+        }
+
+
+def emit_effect(builder, start: str, end: str, eff_type: str, params, effect_db=None):
+    """Emit one ``effect``, verbose or as a reference into ``effect_db``."""
+    if effect_db is not None:
+        builder.start("effect", {"startMS": start, "endMS": end, "ref": effect_db.ref(eff_type, params)})
+        builder.end("effect")
+        return
+    builder.start("effect", {"startMS": start, "endMS": end, "type": eff_type})
+    for name, value in params:
+        builder.start("param", {"name": name, "value": value})
+        builder.end("param")
+    builder.end("effect")
@@ -1,5 +1,11 @@
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
+from .effect_db import EffectDB
+from .timeline import EffectTimeline, emit_schedule
+from .xml_stream import XmlStreamWriter
+
 # mapping of preset names to effect configuration
 PRESETS = {
     "solid_pulse": {"type": "On", "params": {"Color1": "#FFFFFF"}},
@@ -41,14 +47,143 @@ def choose_effect_for(name: str):
     return ("On", {"Color1": "#FFFFFF"})
 
 
-def add_timing_track(root, name, times_s):
-    """Create a timing track with a list of marker times in seconds."""
-    track = ET.SubElement(root, "timing", name=name)
+def emit_timing_track(builder, name, times_s):
+    """Emit a timing track with a list of marker times in seconds."""
+    builder.start("timing", {"name": name})
     for tsec in times_s:
-        ET.SubElement(track, "marker", timeMS=str(int(round(tsec * 1000))))
+        builder.start("marker", {"timeMS": str(int(round(tsec * 1000)))})
+        builder.end("marker")
+    builder.end("timing")
+
+
+def beat_schedule(beat_times, duration_ms, palette_size, downbeat_times=None, section_times=None):
+    """Classify every beat once, independent of the models it is applied to.
+
+    Returns ``(starts, ends, color_idx, in_section)`` arrays, one entry per
+    beat. ``color_idx`` indexes the active palette, with ``palette_size``
+    standing for :data:`DOWNBEAT_COLOR`; downbeat effects are also stretched
+    by 50 ms. ``beat_times`` and ``downbeat_times`` must be ascending.
+    """
+    bt = np.asarray(beat_times, dtype=float)
+    n = len(bt)
+    starts = (bt * 1000).astype(np.int64)
+    ends = np.empty(n, dtype=np.int64)
+    ends[:-1] = starts[1:]
+    if n:
+        ends[-1] = duration_ms
+
+    if downbeat_times is not None and len(downbeat_times):
+        downbeat_ms = (np.asarray(downbeat_times, dtype=float) * 1000).astype(np.int64)
+    else:
+        downbeat_ms = starts[::DOWNBEAT_INTERVAL]
+    # a beat is a downbeat if its [start, end) window holds one
+    idx = np.searchsorted(downbeat_ms, starts, side="left")
+    is_downbeat = np.zeros(n, dtype=bool)
+    hit = idx < len(downbeat_ms)
+    is_downbeat[hit] = downbeat_ms[idx[hit]] < ends[hit]
+    ends = np.where(is_downbeat, np.minimum(duration_ms, ends + 50), ends)
+
+    color_idx = np.where(is_downbeat, palette_size, np.arange(n) % palette_size)
+
+    # the first DOWNBEAT_INTERVAL beats from each section boundary
+    in_section = np.zeros(n, dtype=bool)
+    if section_times is not None and len(section_times) and n:
+        first = np.searchsorted(bt + 1e-3, np.asarray(section_times, dtype=float))
+        first = first[first < n]
+        marks = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(marks, first, 1)
+        np.add.at(marks, np.minimum(first + DOWNBEAT_INTERVAL, n), -1)
+        in_section = np.cumsum(marks[:n]) > 0
+
+    return starts, ends, color_idx, in_section
+
+
+def _model_effect(m, preset, preset_cfg, boost, color, in_section):
+    """Resolve the effect type and params for one model at one beat class."""
+    # start with routing defaults
+    eff_type, eff_params = choose_effect_for(m.name)
+
+    # fall back to preset when routing gives default effect
+    if eff_type == "On" and eff_params.get("Color1") == "#FFFFFF":
+        eff_type = preset_cfg["type"]
+        eff_params.update(preset_cfg.get("params", {}))
+
+    if boost and eff_type == "On":
+        if preset_cfg["type"] != "On":
+            eff_type = preset_cfg["type"]
+            eff_params.update(preset_cfg.get("params", {}))
+        else:
+            eff_type = "Bars"
+            eff_params = {"Bars": "8"}
 
+    # adjust for section boundaries
+    if in_section:
+        eff_type = "Shockwave"
+        eff_params = {"Color1": color}
 
-def build_rgbeffects(
+    eff_params["Color1"] = color
+
+    # tiny models get a simple "On" instead of heavy effects
+    if (
+        eff_type == preset_cfg["type"]
+        and preset in HEAVY_PRESETS
+        and m.nodes is not None
+        and m.nodes < SMALL_MODEL_NODES
+        and not boost
+    ):
+        eff_type = PRESETS["solid_pulse"]["type"]
+        eff_params = PRESETS["solid_pulse"]["params"].copy()
+        eff_params["Color1"] = color
+
+    if eff_type == "Bars":
+        bars = max(4, min(24, (m.strings or 8)))
+        eff_params["Bars"] = str(bars)
+    return eff_type, eff_params
+
+
+def _rgb_schedule(
+    models,
+    beat_times,
+    duration_ms,
+    preset,
+    downbeat_times=None,
+    section_times=None,
+    palette=None,
+    preferred_groups=None,
+):
+    """Beat spans, beat classes and the per-model resolver for a timeline."""
+    preferred_groups = {pg.lower() for pg in (preferred_groups or [])}
+    preset_cfg = PRESETS.get(preset, PRESETS["solid_pulse"])
+    active_palette = palette or PALETTE
+    colors = list(active_palette) + [DOWNBEAT_COLOR]
+    starts, ends, color_idx, in_section = beat_schedule(
+        beat_times, duration_ms, len(active_palette), downbeat_times, section_times
+    )
+
+    # the effect depends only on the model and (color, section) pair, so each
+    # model resolves at most a handful of variants that are stamped per beat
+    def resolve(i, beat_class):
+        m = models[i]
+        boost = any(pg in m.name.lower() for pg in preferred_groups)
+        eff_type, eff_params = _model_effect(
+            m, preset, preset_cfg, boost, colors[beat_class // 2], bool(beat_class % 2)
+        )
+        return eff_type, eff_params.items()
+
+    return [m.name for m in models], starts, ends, color_idx * 2 + in_section, resolve
+
+
+def rgbeffects_timeline(*args, **kwargs):
+    """Compute every model's per-beat effects as an :class:`EffectTimeline`.
+
+    Takes the arguments of :func:`emit_rgbeffects` without ``builder``,
+    ``effect_db`` and ``workers``.
+    """
+    return EffectTimeline.from_schedule(*_rgb_schedule(*args, **kwargs))
+
+
+def emit_rgbeffects(
+    builder,
     models,
     beat_times,
     duration_ms,
@@ -57,11 +192,19 @@ def build_rgbeffects(
     section_times=None,
     palette=None,
     preferred_groups=None,
+    effect_db: bool = False,
+    workers: int = 1,
 ):
     """Generate an xLights RGB effects file using a preset.
 
+    Elements are passed to ``builder`` as ``start``/``end`` calls, so the
+    document can be built as a tree (:func:`build_rgbeffects`) or streamed
+    to disk (:func:`stream_rgbeffects`).
+
     Parameters
     ----------
+    builder : xml.etree.ElementTree.TreeBuilder or XmlStreamWriter
+        Receives the document elements in order.
     models : list
         Sequence of ``ModelInfo`` objects describing the layout models.
     beat_times : list[float]
@@ -83,113 +226,65 @@ def build_rgbeffects(
     preferred_groups : list[str], optional
         Names or substrings of model groups that should receive a stronger
         effect. Matching models will favor brighter presets over simple ones.
-    """
+    effect_db : bool, optional
+        Write each unique effect once in a trailing ``effectDB`` table and
+        have per-beat effects reference it (see :class:`EffectDB`) instead
+        of repeating the type and params.
+    workers : int, optional
+        Render models in this many processes (see :func:`emit_schedule`);
+        needs a streaming ``builder``. The output does not change.
 
-    preferred_groups = {pg.lower() for pg in (preferred_groups or [])}
+    Returns
+    -------
+    EffectDB or None
+        The definition table when ``effect_db`` is set.
+    """
 
-    root = ET.Element("xrgb", version="2024.05", showDir=".")
+    builder.start("xrgb", {"version": "2024.05", "showDir": "."})
 
     # timing tracks
-    add_timing_track(root, "Beats", beat_times)
+    emit_timing_track(builder, "Beats", beat_times)
     if downbeat_times:
-        add_timing_track(root, "Downbeats", downbeat_times)
+        emit_timing_track(builder, "Downbeats", downbeat_times)
     if section_times:
-        add_timing_track(root, "Sections", section_times)
+        emit_timing_track(builder, "Sections", section_times)
 
-    preset_cfg = PRESETS.get(preset, PRESETS["solid_pulse"])
-
-    # pre-compute downbeat times and section start indices
-    downbeat_ms = (
-        [int(dt * 1000) for dt in downbeat_times]
-        if downbeat_times
-        else [int(beat_times[i] * 1000) for i in range(len(beat_times)) if i % DOWNBEAT_INTERVAL == 0]
+    schedule = _rgb_schedule(
+        models,
+        beat_times,
+        duration_ms,
+        preset,
+        downbeat_times=downbeat_times,
+        section_times=section_times,
+        palette=palette,
+        preferred_groups=preferred_groups,
     )
-    section_indices = []
-    if section_times:
-        for st in section_times:
-            for idx, bt in enumerate(beat_times):
-                if bt + 1e-3 >= st:  # first beat at or after the section boundary
-                    section_indices.append(idx)
-                    break
+    table = EffectDB() if effect_db else None
+    emit_schedule(builder, *schedule, table=table, workers=workers)
+    if table is not None:
+        table.emit(builder)
+    builder.end("xrgb")
+    return table
 
-    # simple per-beat effect per model
-    active_palette = palette or PALETTE
-    for m in models:
-        boost = any(pg in m.name.lower() for pg in preferred_groups)
-        mdl = ET.SubElement(root, "model", name=m.name)
-        layer = ET.SubElement(mdl, "effectLayer", name="Layer 1")
-        base_type, base_params = choose_effect_for(m.name)
-        for i, bt in enumerate(beat_times):
-            start = int(bt * 1000)
-            if i + 1 < len(beat_times):
-                next_ms = int(beat_times[i + 1] * 1000)
-            else:
-                next_ms = duration_ms
-            end = next_ms
-
-            # start with routing defaults
-            eff_type = base_type
-            eff_params = base_params.copy()
-
-            # fall back to preset when routing gives default effect
-            if eff_type == "On" and eff_params.get("Color1") == "#FFFFFF":
-                eff_type = preset_cfg["type"]
-                eff_params.update(preset_cfg.get("params", {}))
-
-            if boost and eff_type == "On":
-                if preset_cfg["type"] != "On":
-                    eff_type = preset_cfg["type"]
-                    eff_params.update(preset_cfg.get("params", {}))
-                else:
-                    eff_type = "Bars"
-                    eff_params = {"Bars": "8"}
-
-            # rotating color palette
-            color = active_palette[i % len(active_palette)]
-
-            # determine if this effect window contains a downbeat
-            is_downbeat = any(start <= db < end for db in downbeat_ms)
-            if is_downbeat:
-                color = DOWNBEAT_COLOR
-                end = min(duration_ms, end + 50)
-
-            # adjust for section boundaries
-            in_section_measure = any(
-                si <= i < si + DOWNBEAT_INTERVAL for si in section_indices
-            )
-            if in_section_measure:
-                eff_type = "Shockwave"
-                eff_params = {"Color1": color}
-
-            eff_params["Color1"] = color
-
-            # tiny models get a simple "On" instead of heavy effects
-            if (
-                eff_type == preset_cfg["type"]
-                and preset in HEAVY_PRESETS
-                and m.nodes is not None
-                and m.nodes < SMALL_MODEL_NODES
-                and not boost
-            ):
-                eff_type = PRESETS["solid_pulse"]["type"]
-                eff_params = PRESETS["solid_pulse"]["params"].copy()
-                eff_params["Color1"] = color
-
-            if eff_type == "Bars":
-                bars = max(4, min(24, (m.strings or 8)))
-                eff_params["Bars"] = str(bars)
-
-            eff = ET.SubElement(
-                layer,
-                "effect",
-                startMS=str(start),
-                endMS=str(end),
-                type=eff_type,
-            )
-
-            for name, value in eff_params.items():
-                ET.SubElement(eff, "param", name=name, value=value)
-    return ET.ElementTree(root)
+
+def build_rgbeffects(*args, **kwargs):
+    """Build the RGB effects document in memory; see :func:`emit_rgbeffects`."""
+    builder = ET.TreeBuilder()
+    emit_rgbeffects(builder, *args, **kwargs)
+    return ET.ElementTree(builder.close())
+
+
+def stream_rgbeffects(out_path: str, *args, compress: bool = False, **kwargs):
+    """Write the RGB effects document straight to ``out_path``.
+
+    Produces the same bytes as :func:`build_rgbeffects` followed by
+    :func:`write_rgbeffects` without holding the tree in memory. Arguments
+    are those of :func:`emit_rgbeffects`; ``compress=True`` gzips the file.
+    Returns :meth:`EffectDB.stats` with ``effect_db=True``, else ``None``.
+    """
+    with XmlStreamWriter(out_path, compress=compress) as writer:
+        table = emit_rgbeffects(writer, *args, **kwargs)
+    return table.stats(writer.bytes_written) if table is not None else None
 
 def write_rgbeffects(tree, out_path: str):
     tree.write(out_path, encoding="utf-8", xml_declaration=True)
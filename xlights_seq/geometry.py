@@ -0,0 +1,269 @@
+"""Pixel positions of xLights models from their layout attributes.
+
+xLights does not store node coordinates; it derives them from ``DisplayAs``
+and the model's ``parm1``..``parm3``, placement (``WorldPosX``/``WorldPosY``,
+``ScaleX``/``ScaleY``, ``RotateZ``, or ``X2``/``Y2`` for two-point models)
+and, for custom models, the ``CustomModel`` grid. The functions here do the
+same with NumPy, one array operation per model.
+
+Positions are ``(n, 2)`` float32 arrays in node order. Adjacent nodes are
+about one unit apart before scaling, and y grows downwards, like the
+``<node x y>`` coordinates some layouts carry (see ``extract_model_nodes``).
+"""
+import re
+
+import numpy as np
+
+# model attributes the geometry depends on (kept by the layout index)
+GEOMETRY_ATTRS = (
+    "DisplayAs",
+    "parm1",
+    "parm2",
+    "parm3",
+    "WorldPosX",
+    "WorldPosY",
+    "ScaleX",
+    "ScaleY",
+    "RotateZ",
+    "X2",
+    "Y2",
+    "Arc",
+    "CustomModel",
+    "circleSizes",
+    "starSizes",
+    "starRatio",
+)
+
+DEFAULT_STAR_RATIO = 2.618034
+
+# Node counts come straight from uploaded attributes. The largest real
+# xLights models (big matrices, mega trees) have a few hundred thousand
+# nodes; models and layouts past these limits are not drawn.
+MAX_MODEL_NODES = 500_000
+MAX_LAYOUT_NODES = 2_000_000
+# star outlines are traced corner by corner; xLights stars have a handful
+MAX_STAR_POINTS = 360
+# a custom grid cell holds a node number (and maybe some padding)
+MAX_CELL_CHARS = 8
+
+_LONG_CELL = re.compile(r"[^,;|]{%d,}" % (MAX_CELL_CHARS + 1))
+
+
+def _num(attrs, key, default=0.0):
+    try:
+        return float(attrs.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _count(attrs, key, default=1):
+    n = _num(attrs, key, default)
+    return max(1, int(n)) if np.isfinite(n) else default
+
+
+def _sizes(attrs, key):
+    out = []
+    for part in (attrs.get(key) or "").split(","):
+        try:
+            n = int(part)
+        except ValueError:
+            continue
+        if n > 0:
+            out.append(n)
+    return out
+
+
+def matrix(strings, nodes_per_string, strands_per_string=1, vertical=False):
+    """Grid of a Horiz/Vert Matrix; strands zig-zag like xLights wires them."""
+    strands = strings * strands_per_string
+    per_strand = max(1, nodes_per_string // strands_per_string)
+    strand = np.repeat(np.arange(strands), per_strand)
+    along = np.tile(np.arange(per_strand), strands)
+    along = np.where(strand % 2 == 1, per_strand - 1 - along, along)
+    if vertical:
+        x, y = strand, along
+    else:
+        x, y = along, strand
+    xy = np.stack([x, y], axis=1).astype(np.float32)
+    return xy - xy.mean(axis=0) if len(xy) else xy
+
+
+def tree(strings, nodes_per_string, strands_per_string=1, degrees=360.0):
+    """Cone of strands from the top, seen from the front (flat for 0 degrees)."""
+    strands = strings * strands_per_string
+    per_strand = max(1, nodes_per_string // strands_per_string)
+    height = float(per_strand)
+    radius = height / 3.0
+    theta = np.radians(degrees) * (np.arange(strands) + 0.5) / strands
+    if degrees:
+        base_x = radius * np.cos(theta + (np.pi - np.radians(degrees)) / 2)
+    else:
+        base_x = np.linspace(-radius, radius, strands)
+    frac = (np.arange(per_strand) + 1.0) / per_strand  # top to bottom
+    x = np.outer(base_x, frac)
+    y = np.broadcast_to(height * (1.0 - frac), (strands, per_strand))
+    xy = np.stack([x.ravel(), y.ravel()], axis=1).astype(np.float32)
+    xy[:, 1] -= height / 2
+    return xy
+
+
+def circle(sizes):
+    """Concentric rings, outermost first; ``sizes`` are nodes per ring."""
+    total = sum(sizes)
+    outer = total / (2 * np.pi) if len(sizes) == 1 else sizes[0] / (2 * np.pi)
+    parts = []
+    for i, n in enumerate(sizes):
+        r = outer * (len(sizes) - i) / len(sizes)
+        t = 2 * np.pi * np.arange(n) / n
+        parts.append(np.stack([r * np.sin(t), r * np.cos(t)], axis=1))
+    return np.concatenate(parts).astype(np.float32) if parts else np.empty((0, 2), np.float32)
+
+
+def star(sizes, points=5, ratio=DEFAULT_STAR_RATIO):
+    """Star outlines, outermost first, nodes spread along each outline."""
+    parts = []
+    outer = sizes[0] / (2 * np.pi) if sizes else 1.0
+    for i, n in enumerate(sizes):
+        r_out = outer * (len(sizes) - i) / len(sizes)
+        corners = np.arange(2 * points + 1)
+        angle = np.pi * corners / points
+        r = np.where(corners % 2 == 0, r_out, r_out / ratio)
+        cx, cy = r * np.sin(angle), r * np.cos(angle)
+        # distances along the outline, then interpolate n evenly spaced nodes
+        seg = np.hypot(np.diff(cx), np.diff(cy))
+        dist = np.concatenate([[0.0], np.cumsum(seg)])
+        at = dist[-1] * np.arange(n) / n
+        parts.append(np.stack([np.interp(at, dist, cx), np.interp(at, dist, cy)], axis=1))
+    return np.concatenate(parts).astype(np.float32) if parts else np.empty((0, 2), np.float32)
+
+
+def line(n):
+    """``n`` nodes evenly spaced from 0 to 1 (two-point models)."""
+    t = (np.arange(n) + 0.5) / n
+    return np.stack([t, np.zeros(n)], axis=1).astype(np.float32)
+
+
+def arches(count, per_arch, arc_degrees=180.0):
+    """``count`` arcs side by side along 0..1, each ``per_arch`` nodes."""
+    half = np.radians(arc_degrees) / 2
+    t = np.pi / 2 + half - 2 * half * (np.arange(per_arch) + 0.5) / per_arch
+    width = 1.0 / count
+    r = width / 2 / max(np.sin(half), 1e-6)
+    left = np.repeat(np.arange(count) * width, per_arch)
+    x = left + width / 2 + np.tile(r * np.cos(t), count)
+    y = np.tile(r * (np.sin(t) - np.cos(half)), count)
+    return np.stack([x, y], axis=1).astype(np.float32)
+
+
+def grid_cells(grid: str) -> int:
+    """Cells, empty or not, in a ``CustomModel`` grid."""
+    return grid.count(",") + grid.count(";") + grid.count("|") + 1
+
+
+def custom(grid: str):
+    """Cells of a ``CustomModel`` grid ordered by node number.
+
+    Rows are separated by ``;``, columns by ``,`` and depth layers by ``|``
+    (layers are flattened). Cells sharing a node number all get a position.
+    Raises ``ValueError`` for a cell over ``MAX_CELL_CHARS`` characters:
+    the cells become one fixed-width string array, so a single long cell
+    would widen all of them.
+    """
+    if _LONG_CELL.search(grid):
+        raise ValueError(f"a CustomModel cell is over {MAX_CELL_CHARS} characters")
+    layers = [layer.split(";") for layer in grid.split("|")]
+    rows = [row for layer in layers for row in layer]
+    widths = np.array([row.count(",") + 1 for row in rows])
+    cells = np.char.strip(np.array(",".join(rows).split(",")))
+    row = np.repeat(np.concatenate([np.arange(len(layer)) for layer in layers]), widths)
+    col = np.arange(len(cells)) - np.repeat(np.cumsum(widths) - widths, widths)
+    filled = np.char.str_len(cells) > 0
+    try:
+        node = cells[filled].astype(np.int64)
+    except ValueError:  # not a node grid
+        return np.empty((0, 2), np.float32)
+    order = np.argsort(node, kind="stable")
+    xy = np.stack([col[filled][order], row[filled][order]], axis=1).astype(np.float32)
+    xy -= (np.array([widths.max(), max(map(len, layers))], np.float32) - 1) / 2
+    xy[:, 1] *= -1  # grid rows run downwards; local y is up
+    return xy
+
+
+def _boxed(attrs, local):
+    sx, sy = _num(attrs, "ScaleX", 1.0), _num(attrs, "ScaleY", 1.0)
+    a = np.radians(_num(attrs, "RotateZ"))
+    c, s = np.cos(a), np.sin(a)
+    rot = np.array([[c * sx, s * sx], [-s * sy, c * sy]], dtype=np.float32)
+    xy = local @ rot
+    xy += np.array([_num(attrs, "WorldPosX"), _num(attrs, "WorldPosY")], dtype=np.float32)
+    return xy
+
+
+def _two_point(attrs, local):
+    x1, y1 = _num(attrs, "WorldPosX"), _num(attrs, "WorldPosY")
+    dx, dy = _num(attrs, "X2"), _num(attrs, "Y2")
+    # local x runs along the line, local y is perpendicular to it
+    basis = np.array([[dx, dy], [-dy, dx]], dtype=np.float32)
+    return local @ basis + np.array([x1, y1], dtype=np.float32)
+
+
+def node_count(attrs: dict):
+    """Positions :func:`model_geometry` would return, without computing them.
+
+    For custom models this counts every grid cell, empty or not, since
+    those are what gets allocated. ``None`` for types this engine does not
+    draw.
+    """
+    kind = (attrs.get("DisplayAs") or "").strip()
+    p1, p2 = _count(attrs, "parm1"), _count(attrs, "parm2")
+    p3 = _count(attrs, "parm3")
+    if kind in ("Horiz Matrix", "Vert Matrix", "Matrix") or kind.startswith("Tree"):
+        return p1 * p3 * max(1, p2 // p3)
+    if kind in ("Circle", "Star"):
+        return sum(_sizes(attrs, "circleSizes" if kind == "Circle" else "starSizes")) or p1 * p2
+    if kind == "Custom":
+        return grid_cells(attrs.get("CustomModel") or "")
+    if kind in ("Single Line", "Arches"):
+        return p1 * p2
+    return None
+
+
+def model_geometry(attrs: dict, max_nodes: int = MAX_MODEL_NODES):
+    """World positions (y down) for a model's attributes, or ``None``.
+
+    ``None`` means the ``DisplayAs`` type is not one this engine draws.
+    Raises ``ValueError`` rather than allocating for a model of more than
+    ``max_nodes`` nodes (see :func:`node_count`), a star of more than
+    ``MAX_STAR_POINTS`` points, or a custom grid with an oversized cell.
+    """
+    n = node_count(attrs)
+    if n is not None and n > max_nodes:
+        raise ValueError(f"{n} nodes, over the limit of {max_nodes} per model")
+    kind = (attrs.get("DisplayAs") or "").strip()
+    p1, p2 = _count(attrs, "parm1"), _count(attrs, "parm2")
+    p3 = _count(attrs, "parm3")
+    if kind in ("Horiz Matrix", "Vert Matrix", "Matrix"):
+        xy = _boxed(attrs, matrix(p1, p2, p3, vertical=kind == "Vert Matrix"))
+    elif kind.startswith("Tree"):
+        degrees = 0.0 if "Flat" in kind else 180.0 if "180" in kind else 360.0
+        xy = _boxed(attrs, tree(p1, p2, p3, degrees))
+    elif kind == "Circle":
+        xy = _boxed(attrs, circle(_sizes(attrs, "circleSizes") or [p1 * p2]))
+    elif kind == "Star":
+        sizes = _sizes(attrs, "starSizes") or [p1 * p2]
+        points = _count(attrs, "parm3", 5)
+        if points > MAX_STAR_POINTS:
+            raise ValueError(f"{points} star points, over the limit of {MAX_STAR_POINTS}")
+        if len(sizes) * (2 * points + 1) > max_nodes:
+            raise ValueError(f"{len(sizes)} star outlines of {points} points is over the limit")
+        xy = _boxed(attrs, star(sizes, points, _num(attrs, "starRatio", DEFAULT_STAR_RATIO)))
+    elif kind == "Custom":
+        xy = _boxed(attrs, custom(attrs.get("CustomModel") or ""))
+    elif kind == "Single Line":
+        xy = _two_point(attrs, line(p1 * p2))
+    elif kind == "Arches":
+        xy = _two_point(attrs, arches(p1, p2, _num(attrs, "Arc", 180.0)))
+    else:
+        return None
+    xy[:, 1] *= -1
+    return xy
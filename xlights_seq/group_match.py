@@ -0,0 +1,125 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# style group labels can list alternatives: "Garage/Porch", "Arches - Left"
+_CANDIDATE_SPLIT = re.compile(r"[,/•–-]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+GRAM = 3
+# least trigram (Dice) similarity for a match without a substring hit
+MIN_SIMILARITY = 0.6
+
+
+def _norm(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s).lower()
+    return _NON_ALNUM.sub("", s)
+
+
+def _grams(s: str) -> set:
+    return {s[i:i + GRAM] for i in range(len(s) - GRAM + 1)}
+
+
+class GroupMatcher:
+    """Best layout group for a style group label, from a trigram index.
+
+    Layout group names are normalized (lower case, letters and digits
+    only) and every trigram is indexed to the names containing it. A
+    label is split into candidates at ``, / • – -`` and each candidate
+    scored against the names:
+
+    * a name containing the candidate scores ``1 + len(candidate) /
+      len(name)`` (2.0 for an exact match); the names to test are the
+      intersection of the candidate's trigram postings;
+    * otherwise a name sharing enough trigrams scores its Dice
+      similarity, if at least ``MIN_SIMILARITY``. Shared trigrams are
+      counted for all names at once from the postings (``np.bincount``).
+
+    The highest score wins; ties go to the earlier candidate, then to the
+    earlier layout group, so results are deterministic. Names that
+    normalize alike keep the first. Results are memoized per label.
+    """
+
+    def __init__(self, layout_groups):
+        self.names: list = []  # original names, by id
+        keys: list = []  # normalized names, by id
+        ids = {}
+        for g in layout_groups:
+            key = _norm(g)
+            if key and key not in ids:
+                ids[key] = len(keys)
+                keys.append(key)
+                self.names.append(g)
+        postings: dict = {}
+        gram_counts = []
+        for i, key in enumerate(keys):
+            grams = _grams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._keys = np.array(keys, dtype=str)
+        self._lengths = np.array([len(k) for k in keys], dtype=np.int32)
+        self._gram_counts = np.array(gram_counts, dtype=np.int32)
+        self._postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._empty = np.empty(0, dtype=np.int32)
+        self._cache: dict = {}
+
+    def _score(self, n: str):
+        """``(score, id)`` of the best name for normalized candidate ``n``."""
+        if not len(self._keys):
+            return None
+        grams = _grams(n)
+        if grams:
+            postings = sorted((self._postings.get(g, self._empty) for g in grams), key=len)
+            ids = postings[0]
+            for p in postings[1:]:
+                if not len(ids):
+                    break
+                ids = np.intersect1d(ids, p, assume_unique=True)
+            if len(grams) > 1 and len(ids):  # trigrams present, in any order
+                ids = ids[np.char.find(self._keys[ids], n) >= 0]
+        else:  # shorter than a trigram: scan
+            ids = np.flatnonzero(np.char.find(self._keys, n) >= 0)
+        if len(ids):
+            i = int(ids[np.argmin(self._lengths[ids])])  # first of the shortest
+            return 1 + len(n) / int(self._lengths[i]), -i
+        if not grams:
+            return None
+        shared = np.bincount(
+            np.concatenate([self._postings.get(g, self._empty) for g in grams]),
+            minlength=len(self._keys),
+        )
+        dice = 2 * shared / (len(grams) + self._gram_counts)
+        i = int(np.argmax(dice))
+        if dice[i] < MIN_SIMILARITY:
+            return None
+        return float(dice[i]), -i
+
+    def match(self, label: str):
+        """The layout group name for ``label``, or ``None``."""
+        if label in self._cache:
+            return self._cache[label]
+        best = None  # (score, candidate rank, -id)
+        candidates = [p.strip() for p in _CANDIDATE_SPLIT.split(label) if p.strip()]
+        for rank, c in enumerate(candidates):
+            n = _norm(c)
+            if not n:
+                continue
+            scored = self._score(n)
+            if scored is not None:
+                key = (scored[0], -rank, scored[1])
+                if best is None or key > best:
+                    best = key
+        out = None if best is None else self.names[-best[2]]
+        self._cache[label] = out
+        return out
+
+    def map(self, style_group_names) -> dict:
+        """``{label: layout group}`` for the labels that match one."""
+        out = {}
+        for sg in style_group_names:
+            g = self.match(sg)
+            if g is not None:
+                out[sg] = g
+        return out
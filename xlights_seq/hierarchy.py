@@ -0,0 +1,91 @@
+def back_edges(graph: dict) -> set:
+    """Edges ``(a, b)`` of ``graph`` that close a cycle.
+
+    ``graph`` maps each node to its successors (nodes without an entry have
+    none). Nodes are visited in key order and successors in list order
+    with an iterative depth-first search; an edge back to a node still on
+    the stack is a back edge. Dropping them leaves the graph acyclic.
+    """
+    on_stack, done = set(), set()
+    found = set()
+    for root in graph:
+        if root in done:
+            continue
+        on_stack.add(root)
+        stack = [(root, iter(graph.get(root, ())))]
+        while stack:
+            node, succ = stack[-1]
+            nxt = next(succ, None)
+            if nxt is None:
+                stack.pop()
+                on_stack.discard(node)
+                done.add(node)
+            elif nxt in on_stack:
+                found.add((node, nxt))
+            elif nxt not in done:
+                on_stack.add(nxt)
+                stack.append((nxt, iter(graph.get(nxt, ()))))
+    return found
+
+
+class GroupHierarchy:
+    """Transitive membership over ``{group name: [member names]}``.
+
+    A member that is itself a key names a nested group; anything else is a
+    model, as is a member named like its own group (a group "Tree" holding
+    the model "Tree"). :meth:`models_under` expands nested groups to their models and
+    caches the result per group, so repeated lookups (one per intent, say)
+    cost a dict hit. Cycles (a group that contains itself through nesting)
+    are tolerated and reported by :meth:`cycles`.
+    """
+
+    def __init__(self, models_by_group: dict):
+        self.members = models_by_group
+        self._closure = {}
+        self._subgroups = None
+
+    def is_group(self, name: str) -> bool:
+        return name in self.members
+
+    def subgroups(self) -> dict:
+        """``{group: [nested group, ...]}`` for groups that nest others."""
+        if self._subgroups is None:
+            self._subgroups = {
+                g: [m for m in members if m in self.members and m != g]
+                for g, members in self.members.items()
+            }
+        return self._subgroups
+
+    def models_under(self, group: str) -> list:
+        """Every model in ``group`` or its nested groups, first seen first.
+
+        Members are walked depth first in list order; each model and group
+        is taken once, so shared and cyclic nesting terminates. Unknown
+        groups have no models. The cached list must not be modified.
+        """
+        cached = self._closure.get(group)
+        if cached is not None:
+            return cached
+        out, seen = [], set()
+        visited = {group}
+        stack = [(group, iter(self.members.get(group, ())))]
+        while stack:
+            owner, members = stack[-1]
+            name = next(members, None)
+            if name is None:
+                stack.pop()
+            elif name in self.members and name != owner:
+                if name not in visited:
+                    visited.add(name)
+                    stack.append((name, iter(self.members[name])))
+            elif name not in seen:
+                seen.add(name)
+                out.append(name)
+        self._closure[group] = out
+        return out
+
+    def cycles(self) -> list:
+        """Nesting edges ``(group, nested group)`` that close a cycle."""
+        found = back_edges(self.subgroups())
+        order = {g: i for i, g in enumerate(self.members)}
+        return sorted(found, key=lambda e: (order[e[0]], order[e[1]]))
@@ -0,0 +1,48 @@
+import heapq
+
+
+def merge_adjacent(effects):
+    """Join back-to-back identical effects into one longer effect.
+
+    ``effects`` are ``(start_ms, end_ms, type, params)`` tuples sorted by
+    start. An effect is folded into an earlier one with the same type and
+    params that ends exactly where it starts.
+    """
+    merged = []
+    open_runs = {}  # (type, params) -> index in merged of the latest run
+    for start, end, etype, params in effects:
+        key = (etype, params)
+        i = open_runs.get(key)
+        if i is not None and merged[i][1] == start:
+            merged[i] = (merged[i][0], end, etype, params)
+            continue
+        open_runs[key] = len(merged)
+        merged.append((start, end, etype, params))
+    return merged
+
+
+def allocate_layers(effects):
+    """Pack effects into the fewest layers with no overlap inside a layer.
+
+    ``effects`` are tuples starting with ``(start_ms, end_ms, ...)`` sorted
+    by start. Returns a list of layers, each a list of effects in start
+    order. This is greedy interval partitioning: each effect takes the
+    lowest-numbered layer that is free by its start (an effect may start
+    exactly where another ends), which needs as many layers as the deepest
+    overlap. Runs in O(n log n).
+    """
+    layers = []
+    busy = []  # (end_ms, layer) of each layer's last effect
+    free = []  # layer numbers free at the current start
+    for eff in effects:
+        start = eff[0]
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            layer = heapq.heappop(free)
+        else:
+            layer = len(layers)
+            layers.append([])
+        layers[layer].append(eff)
+        heapq.heappush(busy, (eff[1], layer))
+    return layers
@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+
+from .parsers import ModelInfo, parse_layout_groups_and_models
+
+
+@dataclass
+class LayoutDiff:
+    """Model names that differ between two layouts.
+
+    ``added``, ``changed`` and ``unchanged`` follow the new layout's order,
+    ``removed`` the old one's. A model is changed when its strings or nodes
+    differ (or, from :func:`diff_layouts`, the groups it belongs to).
+    """
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+    @property
+    def rebuild(self) -> list[str]:
+        """Models whose effects have to be generated again."""
+        return self.added + self.changed
+
+    def to_dict(self) -> dict:
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+        }
+
+
+def _index(models) -> dict:
+    if isinstance(models, dict):
+        return models
+    index = {}
+    for m in models:
+        if isinstance(m, dict):
+            m = ModelInfo(**m)
+        index.setdefault(m.name, m)
+    return index
+
+
+def diff_models(old, new) -> LayoutDiff:
+    """Compare two model lists (``ModelInfo``, dicts, or a name index)."""
+    old, new = _index(old), _index(new)
+    diff = LayoutDiff(removed=[name for name in old if name not in new])
+    for name, m in new.items():
+        prev = old.get(name)
+        if prev is None:
+            diff.added.append(name)
+        elif (prev.strings, prev.nodes) != (m.strings, m.nodes):
+            diff.changed.append(name)
+        else:
+            diff.unchanged.append(name)
+    return diff
+
+
+def _groups_of(models_by_group) -> dict:
+    groups = {}
+    for gname, members in models_by_group.items():
+        for name in members:
+            groups.setdefault(name, set()).add(gname)
+    return groups
+
+
+def diff_layouts(old_path: str, new_path: str) -> LayoutDiff:
+    """Diff two layout files, counting group membership as part of a model.
+
+    Intent-driven sequences target groups, so a model that joins or leaves
+    a group needs its effects rebuilt even if its own attributes are equal.
+    """
+    _, old_models, old_groups = parse_layout_groups_and_models(old_path)
+    _, new_models, new_groups = parse_layout_groups_and_models(new_path)
+    diff = diff_models(old_models, new_models)
+    old_of, new_of = _groups_of(old_groups), _groups_of(new_groups)
+    same = []
+    for name in diff.unchanged:
+        if old_of.get(name, set()) != new_of.get(name, set()):
+            diff.changed.append(name)
+        else:
+            same.append(name)
+    diff.unchanged = same
+    order = {name: i for i, name in enumerate(new_models)}
+    diff.changed.sort(key=order.__getitem__)
+    return diff
@@ -0,0 +1,107 @@
+from array import array
+from json.encoder import encode_basestring_ascii
+
+MODEL, GROUP = 0, 1
+_TYPES = ("model", "group")
+
+
+class LayoutTree:
+    """Array-backed layout tree, nodes stored in depth-first (pre-)order.
+
+    Node ``i`` is described by parallel arrays: ``kind`` (``MODEL`` or
+    ``GROUP``), ``strings`` and ``nodes`` (``-1`` for unknown), ``parent``
+    (``-1`` for the root) and ``end``, one past the last node of its
+    subtree, so ``i + 1 .. end[i]`` are its descendants. Names are stored
+    once in ``names`` and referenced by ``name_id``; a model listed in
+    several groups appears once per group but shares its name.
+
+    Compared with a :class:`NodeInfo` per node this costs a few machine
+    words per node, and :meth:`iter_json` serializes any depth without
+    recursion.
+    """
+
+    __slots__ = ("names", "name_id", "kind", "strings", "nodes", "parent", "end")
+
+    def __init__(self):
+        self.names: list = []
+        self.name_id = array("i")
+        self.kind = array("b")
+        self.strings = array("q")
+        self.nodes = array("q")
+        self.parent = array("i")
+        self.end = array("i")
+
+    def add(self, name_id: int, kind: int, parent: int, strings=None, nodes=None) -> int:
+        """Append a node (its subtree must follow it) and return its index."""
+        self.name_id.append(name_id)
+        self.kind.append(kind)
+        self.strings.append(-1 if strings is None else strings)
+        self.nodes.append(-1 if nodes is None else nodes)
+        self.parent.append(parent)
+        self.end.append(len(self.end) + 1)
+        return len(self.end) - 1
+
+    def add_models(self, parent: int, name_ids, strings, nodes):
+        """Append leaf models under ``parent``, one per entry of ``name_ids``.
+
+        ``strings`` and ``nodes`` are parallel sequences (``-1`` unknown).
+        """
+        start, k = len(self), len(name_ids)
+        self.name_id.extend(name_ids)
+        self.kind.extend(array("b", [MODEL]) * k)
+        self.strings.extend(strings)
+        self.nodes.extend(nodes)
+        self.parent.extend(array("i", [parent]) * k)
+        self.end.extend(range(start + 1, start + k + 1))
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def name(self, i: int) -> str:
+        return self.names[self.name_id[i]]
+
+    def children(self, i: int) -> list:
+        """Indexes of node ``i``'s children, in order."""
+        out = []
+        c = i + 1
+        while c < self.end[i]:
+            out.append(c)
+            c = self.end[c]
+        return out
+
+    def model_count(self) -> int:
+        """Model entries in the tree (a model in two groups counts twice)."""
+        return len(self) - sum(self.kind)
+
+    def iter_json(self, chunk_size: int = 1 << 16):
+        """Yield the tree as JSON text in chunks of about ``chunk_size``.
+
+        Each node is ``{"name", "type", "strings", "nodes", "children"}``,
+        the shape ``/inspect-layout`` has always returned; the text is what
+        ``json.dumps`` gives for the equivalent nested dicts.
+        """
+        parts, size = [], 0
+        closing = []  # end index of each open node
+        for i in range(len(self)):
+            while closing and closing[-1] == i:
+                closing.pop()
+                parts.append("]}")
+            s, n = self.strings[i], self.nodes[i]
+            part = '%s{"name": %s, "type": "%s", "strings": %s, "nodes": %s, "children": [' % (
+                ", " if i and self.parent[i] != i - 1 else "",
+                encode_basestring_ascii(self.names[self.name_id[i]]),
+                _TYPES[self.kind[i]],
+                "null" if s < 0 else s,
+                "null" if n < 0 else n,
+            )
+            if self.end[i] == i + 1:
+                part += "]}"
+            else:
+                closing.append(self.end[i])
+            parts.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                yield "".join(parts)
+                parts, size = [], 0
+        parts.append("]}" * len(closing))
+        yield "".join(parts)
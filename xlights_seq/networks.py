@@ -0,0 +1,428 @@
+"""Controllers and universes from ``xlights_networks.xml``, and channel load.
+
+xLights numbers channels absolutely: the first universe of the first
+network holds channels ``1..MaxChannels``, the next universe follows, and
+so on through the file. Models place themselves in that space with their
+``StartChannel`` (absolute, ``#universe:channel``, ``#ip:universe:channel``,
+``!controller:channel``, or ``>model:channel`` / ``@model:channel``
+relative to another model's end / start).
+
+:func:`channel_map` resolves every model's channel range and
+:func:`network_load` turns that into per-universe and per-controller load,
+packet rate and bandwidth at a frame rate, with warnings where the show
+will saturate a universe or controller.
+"""
+import math
+import re
+import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# model attributes the channel map needs (kept by the layout index)
+CHANNEL_ATTRS = ("StartChannel", "StringType")
+
+DEFAULT_FRAME_MS = 50
+# per-packet bytes before the channel data, by protocol
+PACKET_HEADER = {"E131": 126, "ARTNET": 18, "DDP": 10}
+DDP_CHANNELS_PER_PACKET = 1440
+# Ethernet + IPv4 + UDP headers on every packet
+UDP_OVERHEAD = 42
+DEFAULT_LINK_MBPS = 100.0
+MAX_MODEL_WARNINGS = 50
+# Bounds on what an uploaded file can declare: channels per <network>
+# (far above any real DDP controller) and universes in the whole file
+# (E1.31 numbers them 1..63999)
+MAX_NETWORK_CHANNELS = 1_000_000
+MAX_UNIVERSES = 64_000
+
+_UNIVERSE_PROTOCOLS = {"E131", "ARTNET", "KINET", "ZCPP", "OPC"}
+_RELATIVE = re.compile(r"^([>@])(.+):(\d+)$")
+
+
+@dataclass
+class Universe:
+    controller: str
+    protocol: str
+    universe: Optional[int]  # None for protocols without universes (DDP, serial)
+    channels: int
+    start: int = 0  # absolute first channel (1-based)
+
+    @property
+    def end(self) -> int:
+        return self.start + self.channels - 1
+
+
+@dataclass
+class Controller:
+    name: str
+    protocol: str
+    ip: Optional[str] = None
+    universes: List[Universe] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)  # values clamped on parsing
+
+    @property
+    def channels(self) -> int:
+        return sum(u.channels for u in self.universes)
+
+
+@dataclass
+class ModelChannels:
+    name: str
+    start: Optional[int]  # None when StartChannel cannot be resolved
+    channels: int
+    spec: Optional[str] = None
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + self.channels - 1
+
+
+def _int(value, default=None):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def _universes(net, c: Controller, protocol: str, room: int) -> List[Universe]:
+    """Universes of one ``<network>``, at most ``room`` of them.
+
+    ``MaxChannels`` above ``MAX_NETWORK_CHANNELS`` and universes past
+    ``room`` are clamped, with a line in ``c.warnings``.
+    """
+    protocol = (net.get("NetworkType") or net.get("Protocol") or protocol or "").upper()
+    channels = max(0, _int(net.get("MaxChannels"), 512))
+    if channels > MAX_NETWORK_CHANNELS:
+        c.warnings.append(
+            f"{c.name}: MaxChannels {channels} is over the limit of {MAX_NETWORK_CHANNELS}; clamped"
+        )
+        channels = MAX_NETWORK_CHANNELS
+    # E1.31/ArtNet store the universe number in BaudRate (older files) or Universe
+    first = _int(net.get("Universe"), _int(net.get("BaudRate")))
+    if protocol not in _UNIVERSE_PROTOCOLS:
+        first = None
+    count = max(1, _int(net.get("NumUniverses"), 1))
+    if count > room:
+        c.warnings.append(
+            f"{c.name}: NumUniverses {count} goes past the limit of {MAX_UNIVERSES} universes; "
+            "the rest are ignored"
+        )
+        count = room
+    return [
+        Universe(c.name, protocol, None if first is None else first + k, channels)
+        for k in range(count)
+    ]
+
+
+def parse_networks(source) -> List[Controller]:
+    """Controllers, in file order, with their universes numbered absolutely.
+
+    Reads both layouts xLights has used: ``<Controller>`` elements holding
+    ``<network>`` children, and bare top-level ``<network>`` elements (each
+    becoming a controller named after its ``Description`` or address).
+    Out-of-range sizes are clamped (see :func:`_universes`). Raises
+    ``ET.ParseError`` on malformed XML.
+    """
+    root = ET.parse(source).getroot()
+    controllers: List[Controller] = []
+    room = MAX_UNIVERSES
+    full = f"networks past the limit of {MAX_UNIVERSES} universes are ignored"
+    for elem in root:
+        if elem.tag not in ("Controller", "network"):
+            continue
+        if room <= 0:
+            controllers[-1].warnings.append(full)
+            break
+        if elem.tag == "Controller":
+            name = elem.get("Name") or elem.get("Id") or f"Controller {len(controllers) + 1}"
+            protocol = (elem.get("Protocol") or elem.get("Type") or "").upper()
+            c = Controller(name, protocol, elem.get("IP"))
+            nets = list(elem.iter("network"))
+        else:
+            name = (
+                elem.get("Description")
+                or elem.get("ComPort")
+                or f"Network {len(controllers) + 1}"
+            )
+            c = Controller(name, (elem.get("NetworkType") or "").upper(), elem.get("ComPort"))
+            protocol, nets = c.protocol, [elem]
+        for net in nets:
+            if room <= 0:
+                c.warnings.append(full)
+                break
+            universes = _universes(net, c, protocol, room)
+            c.universes.extend(universes)
+            room -= len(universes)
+        controllers.append(c)
+        if c.warnings[-1:] == [full]:
+            break
+
+    start = 1
+    for c in controllers:
+        for u in c.universes:
+            u.start = start
+            start += u.channels
+    return controllers
+
+
+def channels_per_node(string_type: Optional[str]) -> int:
+    s = (string_type or "").lower()
+    if "rgbw" in s or s.startswith("4 channel"):
+        return 4
+    if "single color" in s or "strobes" in s or s.startswith("single") or s.startswith("1 channel"):
+        return 1
+    return 3
+
+
+def _node_count(rec, index) -> int:
+    nodes = _int(rec.nodes)
+    if nodes is not None:
+        return nodes
+    pts = index.model_positions().get(rec.name)
+    if pts is not None and len(pts):
+        return len(pts)
+    p1, p2 = _int(rec.attrs.get("parm1")), _int(rec.attrs.get("parm2"))
+    if p1 is not None and p2 is not None:
+        return p1 * p2
+    return 0
+
+
+def channel_map(index, controllers: List[Controller]) -> Dict[str, ModelChannels]:
+    """``{model: ModelChannels}`` for the models of a :class:`LayoutIndex`.
+
+    Channel counts are nodes (``Nodes``, else the computed geometry, else
+    ``parm1 * parm2``) times the channels per node of ``StringType``.
+    Models chained to other models (``>``/``@``) are resolved through the
+    chain; unknown references and chain cycles leave ``start`` as None.
+    """
+    records = {}
+    for rec in index.models:
+        if rec.name and rec.name not in records:
+            records[rec.name] = rec
+    universes = {}
+    by_ip = {}
+    for c in controllers:
+        for u in c.universes:
+            if u.universe is not None:
+                universes.setdefault(u.universe, u)
+                if c.ip:
+                    by_ip.setdefault((c.ip, u.universe), u)
+    by_name = {c.name: c for c in controllers if c.universes}
+
+    out: Dict[str, ModelChannels] = {
+        name: ModelChannels(
+            name,
+            None,
+            _node_count(rec, index) * channels_per_node(rec.attrs.get("StringType")),
+            (rec.attrs.get("StartChannel") or "").strip() or None,
+        )
+        for name, rec in records.items()
+    }
+
+    def absolute(spec):
+        """Channel for a spec that does not refer to another model."""
+        if spec.isdigit():
+            return int(spec)
+        if spec.startswith("#"):
+            parts = spec[1:].split(":")
+            if len(parts) == 2:
+                u = universes.get(_int(parts[0]))
+            elif len(parts) == 3:
+                u = by_ip.get((parts[0], _int(parts[1])))
+            else:
+                u = None
+            ch = _int(parts[-1])
+            return None if u is None or ch is None else u.start + ch - 1
+        if spec.startswith("!") and ":" in spec:
+            name, ch = spec[1:].rsplit(":", 1)
+            c = by_name.get(name.strip())
+            return None if c is None or _int(ch) is None else c.universes[0].start + _int(ch) - 1
+        return None
+
+    resolved = set()
+    for name in out:
+        # walk the >/@ references down to a resolved model or an absolute spec
+        chain, seen = [], set()
+        cur = name
+        while cur is not None and cur not in resolved and cur not in seen:
+            spec = out[cur].spec or ""
+            mo = _RELATIVE.match(spec)
+            if mo is None:
+                out[cur].start = absolute(spec) if spec else None
+                resolved.add(cur)
+                break
+            chain.append(cur)
+            seen.add(cur)
+            cur = mo.group(2).strip()
+            if cur not in out:
+                cur = None
+        # then place the chain back up; a missing reference or a cycle
+        # leaves every model above it unresolved
+        for cur in reversed(chain):
+            mo = _RELATIVE.match(out[cur].spec)
+            ref = out.get(mo.group(2).strip())
+            if ref is None or ref.name not in resolved or ref.start is None:
+                out[cur].start = None
+            elif mo.group(1) == ">":
+                out[cur].start = ref.end + int(mo.group(3))
+            else:
+                out[cur].start = ref.start + int(mo.group(3)) - 1
+            resolved.add(cur)
+    return out
+
+
+def _packets_per_frame(u: Universe) -> int:
+    if u.protocol == "DDP":
+        return max(1, math.ceil(u.channels / DDP_CHANNELS_PER_PACKET))
+    return 1
+
+
+def _frame_bytes(u: Universe) -> int:
+    packets = _packets_per_frame(u)
+    header = PACKET_HEADER.get(u.protocol, 0)
+    return u.channels + packets * (header + UDP_OVERHEAD)
+
+
+def _channels_upto(lo: np.ndarray, hi: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """For each of ``points``, channels of the intervals ``[lo, hi]`` at or below it.
+
+    Overlapping channels count once per interval. ``lo`` and ``hi`` must be
+    sorted (separately); each point costs two binary searches.
+    """
+    sum_lo = np.concatenate([[0], np.cumsum(lo)])
+    sum_hi = np.concatenate([[0], np.cumsum(hi)])
+    started = np.searchsorted(lo, points, side="right")  # lo <= point
+    ended = np.searchsorted(hi, points, side="left")  # hi < point
+    return (started * (points + 1) - sum_lo[started]) - (ended * points - sum_hi[ended])
+
+
+def network_load(
+    controllers: List[Controller],
+    models: Dict[str, ModelChannels],
+    frame_ms: int = DEFAULT_FRAME_MS,
+    link_mbps: float = DEFAULT_LINK_MBPS,
+) -> dict:
+    """Per-universe and per-controller load at one frame every ``frame_ms``.
+
+    Every configured universe is sent once per frame (as xLights does);
+    DDP sends ``DDP_CHANNELS_PER_PACKET`` channels per packet. ``used`` is
+    how many of a universe's channels some model drives and ``demand`` the
+    channels models ask of it, which exceeds ``channels`` when models
+    overlap. Both come from the models' sorted channel intervals, so the
+    cost does not depend on how many channels are configured.
+
+    Returns ``{"fps", "universes", "controllers", "warnings"}``; universe
+    and controller warnings come first, then at most ``MAX_MODEL_WARNINGS``
+    about values clamped on parsing and single models.
+    """
+    fps = 1000.0 / frame_ms
+    all_u = [u for c in controllers for u in c.universes]
+    last = all_u[-1].end if all_u else 0
+    warnings: List[str] = []  # universes and controllers
+    model_warnings: List[str] = [w for c in controllers for w in c.warnings]
+
+    # model channel intervals, clipped to the configured channels
+    los, his = [], []
+    starts = [u.start for u in all_u]
+    for m in models.values():
+        if m.start is None:
+            if m.spec:
+                model_warnings.append(f"{m.name}: cannot resolve StartChannel {m.spec!r}")
+            continue
+        if m.channels <= 0:
+            continue
+        if m.end > last:
+            model_warnings.append(
+                f"{m.name} ends at channel {m.end}, past the last configured channel {last}"
+            )
+        lo, hi = max(1, m.start), min(last, m.end)
+        if lo > hi:
+            continue
+        los.append(lo)
+        his.append(hi)
+        first_u = all_u[bisect_right(starts, lo) - 1]
+        last_u = all_u[bisect_right(starts, hi) - 1]
+        if first_u.controller != last_u.controller:
+            model_warnings.append(
+                f"{m.name} runs past controller {first_u.controller} into {last_u.controller}"
+            )
+
+    # per universe: demand sums every model's overlap with it; used counts
+    # the channels of the merged intervals (each channel once)
+    lo = np.array(los, dtype=np.int64)
+    hi = np.array(his, dtype=np.int64)
+    order = np.argsort(lo, kind="stable")
+    lo, hi = lo[order], hi[order]
+    reach = np.maximum.accumulate(hi) if len(hi) else hi
+    new = np.ones(len(lo), dtype=bool)
+    new[1:] = lo[1:] > reach[:-1]
+    first = np.flatnonzero(new)
+    merged_lo = lo[first]
+    merged_hi = np.maximum.reduceat(hi, first) if len(first) else hi
+    bounds = np.array([u.start - 1 for u in all_u] + [u.end for u in all_u], dtype=np.int64)
+    asked_upto = _channels_upto(lo, np.sort(hi), bounds)
+    used_upto = _channels_upto(merged_lo, merged_hi, bounds)
+    k = len(all_u)
+    asked_per_u = (asked_upto[k:] - asked_upto[:k]).tolist()
+    used_per_u = (used_upto[k:] - used_upto[:k]).tolist()
+
+    universes = []
+    controllers_out = []
+    i = 0
+    for c in controllers:
+        c_used = c_packets = c_bytes = 0
+        for u in c.universes:
+            used, asked = used_per_u[i], asked_per_u[i]
+            i += 1
+            packets = _packets_per_frame(u) * fps
+            universes.append(
+                {
+                    "controller": c.name,
+                    "protocol": u.protocol,
+                    "universe": u.universe,
+                    "startChannel": u.start,
+                    "channels": u.channels,
+                    "used": used,
+                    "demand": asked,
+                    "load": round(used / u.channels, 4) if u.channels else 0.0,
+                    "packetsPerSec": round(packets, 2),
+                }
+            )
+            if asked > u.channels:
+                label = f"universe {u.universe}" if u.universe is not None else u.protocol
+                warnings.append(
+                    f"{c.name} {label}: models ask for {asked} of {u.channels} channels (overlapping start channels)"
+                )
+            c_used += used
+            c_packets += packets
+            c_bytes += _frame_bytes(u) * fps
+        mbps = c_bytes * 8 / 1e6
+        controllers_out.append(
+            {
+                "name": c.name,
+                "protocol": c.protocol,
+                "ip": c.ip,
+                "universes": len(c.universes),
+                "channels": c.channels,
+                "used": c_used,
+                "load": round(c_used / c.channels, 4) if c.channels else 0.0,
+                "packetsPerSec": round(c_packets, 2),
+                "mbps": round(mbps, 3),
+            }
+        )
+        if mbps > link_mbps:
+            warnings.append(
+                f"{c.name} needs {mbps:.1f} Mbit/s at {fps:g} fps, over its {link_mbps:g} Mbit/s link"
+            )
+    more = []
+    if len(model_warnings) > MAX_MODEL_WARNINGS:
+        more = [f"... and {len(model_warnings) - MAX_MODEL_WARNINGS} more model warnings"]
+    return {
+        "fps": round(fps, 3),
+        "universes": universes,
+        "controllers": controllers_out,
+        "warnings": warnings + model_warnings[:MAX_MODEL_WARNINGS] + more,
+    }
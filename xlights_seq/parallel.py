@@ -0,0 +1,97 @@
+import multiprocessing as mp
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+from .effect_db import EffectDB
+from .xml_stream import XmlFragmentWriter
+
+# shards per worker; several smaller shards even out uneven models
+SHARDS_PER_WORKER = 4
+
+_REF = re.compile(rb' ref="(\d+)"')
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Shared spawn pool of ``workers`` processes, created on first use.
+
+    It is kept across calls so a render does not pay interpreter start-up
+    for every worker; asking for a different ``workers`` replaces it.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None and _executor_workers != workers:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _executor is None:
+            _executor = ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"))
+            _executor_workers = workers
+        return _executor
+
+
+def _discard_executor(ex: ProcessPoolExecutor):
+    """Drop ``ex`` (a broken pool) so the next call starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is ex:
+            _executor = None
+    ex.shutdown(wait=False)
+
+
+def _render_shard(emit_model, models, context, effect_db):
+    frag = XmlFragmentWriter()
+    table = EffectDB() if effect_db else None
+    for m in models:
+        emit_model(frag, m, context, table)
+    # encode in the worker so the parent only copies bytes to the file
+    data = frag.getvalue().encode("utf-8", "xmlcharrefreplace")
+    return data, table.export() if table is not None else None
+
+
+def emit_models(builder, emit_model, models, context, table=None, workers=1):
+    """Emit ``emit_model(builder, model, context, table)`` for every model.
+
+    With ``workers > 1`` contiguous shards of models are rendered to XML
+    fragments in a shared process pool (started on first use, reused by
+    later calls) and written back in layout order, so the document is
+    identical to the serial one. Shard effect tables are merged
+    into ``table`` in the same order and their refs renumbered to match.
+    ``emit_model`` must be a module-level function and ``builder`` must
+    accept fragments (:class:`XmlStreamWriter`).
+    """
+    models = list(models)
+    if workers <= 1 or len(models) < 2:
+        for m in models:
+            emit_model(builder, m, context, table)
+        return
+
+    n_shards = min(len(models), workers * SHARDS_PER_WORKER)
+    size = -(-len(models) // n_shards)
+    shards = [models[i : i + size] for i in range(0, len(models), size)]
+    ex = _get_executor(workers)
+    results = ex.map(
+        _render_shard,
+        repeat(emit_model),
+        shards,
+        repeat(context),
+        repeat(table is not None),
+    )
+    try:
+        for data, exported in results:
+            if exported is not None:
+                mapping = table.merge(exported)
+                if any(local != ref for local, ref in mapping.items()):
+                    data = _REF.sub(
+                        lambda mo: b' ref="%s"' % mapping[mo.group(1).decode()].encode(),
+                        data,
+                    )
+            builder.write_fragment(data)
+    except BrokenProcessPool:
+        _discard_executor(ex)
+        raise
@@ -1,14 +1,27 @@
 import xml.etree.ElementTree as ET
+import hashlib
 import re
-import unicodedata
+import threading
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Optional, Dict, Tuple
 
+import numpy as np
 
-def _norm(s: str) -> str:
-    s = unicodedata.normalize("NFKD", s).lower()
-    s = re.sub(r"[^a-z0-9]+", "", s)
-    return s
+from .geometry import (
+    GEOMETRY_ATTRS,
+    MAX_LAYOUT_NODES,
+    MAX_MODEL_NODES,
+    grid_cells,
+    model_geometry,
+    node_count,
+)
+from .group_match import GroupMatcher
+from .hierarchy import GroupHierarchy, back_edges
+from .layout_tree import GROUP, LayoutTree
+from .networks import CHANNEL_ATTRS
 
 
 def _attr(elem, *names) -> Optional[str]:
@@ -21,23 +34,13 @@ def _attr(elem, *names) -> Optional[str]:
 
 
 def map_style_groups_to_layout(style_group_names: list[str], layout_groups: list[str]) -> Dict[str, str]:
-    """Map suggested style groups (e.g., 'Focal_Tree') to best matching layout group names."""
-    norm_layout = { _norm(g): g for g in layout_groups }
-    out = {}
-    for sg in style_group_names:
-        candidates = [p.strip() for p in re.split(r"[,/•–-]", sg) if p.strip()]
-        best = None
-        for c in candidates:
-            n = _norm(c)
-            for k, orig in norm_layout.items():
-                if n and n in k:
-                    best = orig
-                    break
-            if best:
-                break
-        if best:
-            out[sg] = best
-    return out
+    """Map suggested style groups (e.g., 'Focal_Tree') to best matching layout group names.
+
+    See :class:`GroupMatcher`; the matcher for a list of layout groups is
+    built once and reused (``LayoutIndex.group_matcher`` for a layout).
+    """
+    return _matcher_for(tuple(layout_groups)).map(style_group_names)
+
 
 @dataclass
 class ModelInfo:
@@ -55,33 +58,559 @@ class NodeInfo:
     children: List["NodeInfo"] = field(default_factory=list)
     parent: Optional["NodeInfo"] = None
 
+# parsed layouts kept in memory, keyed by file content
+LAYOUT_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _matcher_for(layout_groups: tuple) -> GroupMatcher:
+    return GroupMatcher(layout_groups)
+
+
+# "Tree-Left", "MegaTree:1": a model named after another plus a suffix
+_SUBMODEL_NAME = re.compile(r"(.+?)[\-\:\_ ]\s*(\d+|left|right|top|bottom|inner|outer)$", re.I)
+
+
+# model attributes kept on ModelRecord.attrs; CustomModel grids can be
+# kilobytes per model, so only their size is kept and the grid is read
+# from the file again when positions are computed
+_KEPT_ATTRS = tuple(a for a in GEOMETRY_ATTRS + CHANNEL_ATTRS if a != "CustomModel")
+
+# coordinate-carrying children of a <model>, see extract_model_nodes
+POINT_TAGS = ("node", "pixel", "point", "Point")
+
+
+def _model_name(elem) -> Optional[str]:
+    return elem.get("name") or elem.get("Model") or elem.get("Name")
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _digits(value: Optional[str]) -> Optional[int]:
+    return int(value) if value and value.isdigit() else None
+
+
+@dataclass
+class ModelRecord:
+    """Raw attributes of one ``<model>`` element, as written in the file."""
+    name: Optional[str]
+    strings: Optional[str]
+    nodes: Optional[str]
+    points: Dict[str, List[Tuple[float, float]]] = field(default_factory=dict)
+    # DisplayAs, placement and shape attributes (geometry.GEOMETRY_ATTRS,
+    # except CustomModel) and StartChannel/StringType (networks.CHANNEL_ATTRS)
+    attrs: Dict[str, str] = field(default_factory=dict)
+    grid_cells: Optional[int] = None  # cells of the CustomModel grid, if any
+
+
+@dataclass
+class GroupRecord:
+    """Raw membership of one ``<group>`` element.
+
+    ``members`` holds the ``name`` of every ``<member>`` below the group
+    with whether it is a direct child; ``models`` the ``<model>`` children.
+    """
+    name: Optional[str]
+    members_csv: str
+    members: List[Tuple[Optional[str], bool]] = field(default_factory=list)
+    models: List[ModelRecord] = field(default_factory=list)
+
+
+def _stream_events(source):
+    """``ET.iterparse`` start/end events that drop finished elements.
+
+    Attributes are read at ``start``; once an element ends it is cleared and
+    detached from its parent, so only the open elements (plus what the
+    parser has read ahead) stay in memory, however large the file.
+    """
+    open_elems = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        yield event, elem
+        if event == "start":
+            open_elems.append(elem)
+        else:
+            open_elems.pop()
+            elem.clear()
+            if open_elems:
+                open_elems[-1].remove(elem)
+
+
+class LayoutIndex:
+    """Models, groups and coordinates of a layout, read in one streaming pass.
+
+    The entry points below used to parse the file and rescan it for models
+    each; they now derive their results from one index, cached by content
+    hash (see :func:`load_layout`), so the endpoints the UI calls on the
+    same upload parse it once. Records keep the raw attribute values and
+    each view applies its own name stripping, number parsing and
+    duplicate rules, so results are unchanged.
+
+    The file is read with ``ET.iterparse`` and elements are discarded as
+    they end (see :func:`_stream_events`), so memory grows with the
+    extracted records rather than the document: submodels, faces, states
+    and other children that no view needs cost nothing to keep.
+    """
+
+    def __init__(self, models: List[ModelRecord], groups: List[GroupRecord]):
+        self.models = models
+        self.groups = groups
+        self._positions = None
+        self.geometry_warnings: List[str] = []
+        self.source: Optional[str] = None  # file path, for re-reading grids
+        self._hierarchy = None
+        self._compact = None
+        self._matcher = None
+
+    @classmethod
+    def from_events(cls, events) -> "LayoutIndex":
+        models: List[ModelRecord] = []
+        groups: List[GroupRecord] = []
+        stack: list = []  # record (or None) per open element
+        open_models: List[ModelRecord] = []
+        open_groups: List[GroupRecord] = []
+        for event, elem in events:
+            if event == "end":
+                rec = stack.pop()
+                if isinstance(rec, ModelRecord):
+                    open_models.pop()
+                elif isinstance(rec, GroupRecord):
+                    open_groups.pop()
+                continue
+            rec = None
+            tag = elem.tag
+            if not stack:
+                pass  # the root itself is never a model or group
+            elif tag == "model":
+                rec = ModelRecord(
+                    _model_name(elem),
+                    elem.get("StringCount") or elem.get("strings"),
+                    elem.get("Nodes") or elem.get("nodes"),
+                    attrs={k: elem.get(k) for k in _KEPT_ATTRS if k in elem.attrib},
+                )
+                if "CustomModel" in elem.attrib and rec.attrs.get("DisplayAs", "").strip() == "Custom":
+                    rec.grid_cells = grid_cells(elem.get("CustomModel"))
+                models.append(rec)
+                if isinstance(stack[-1], GroupRecord):
+                    stack[-1].models.append(rec)
+                open_models.append(rec)
+            elif tag == "group":
+                rec = GroupRecord(
+                    elem.get("name") or elem.get("Group") or elem.get("Name"),
+                    elem.get("members") or elem.get("Members") or "",
+                )
+                groups.append(rec)
+                open_groups.append(rec)
+            elif tag == "member":
+                ref = elem.get("name")
+                for g in open_groups:
+                    g.members.append((ref, stack[-1] is g))
+            elif tag in POINT_TAGS and open_models:
+                xs, ys = _attr(elem, "x"), _attr(elem, "y")
+                if xs is not None and ys is not None:
+                    try:
+                        pt = (float(xs), float(ys))
+                    except ValueError:
+                        pt = None
+                    if pt is not None:
+                        for m in open_models:
+                            m.points.setdefault(tag, []).append(pt)
+            stack.append(rec)
+        return cls(models, groups)
+
+    @classmethod
+    def from_file(cls, source) -> "LayoutIndex":
+        """Index a layout file (path or binary file object)."""
+        index = cls.from_events(_stream_events(source))
+        if isinstance(source, str):
+            index.source = source
+        return index
+
+    def _custom_grids(self, wanted):
+        """Yield ``(model number, CustomModel)`` for the ``wanted`` models.
+
+        Model numbers index ``self.models``; the file at ``source`` is
+        streamed again and each grid is yielded as its element is read, so
+        only one grid is in memory at a time.
+        """
+        depth = number = 0
+        for event, elem in _stream_events(self.source):
+            if event == "end":
+                depth -= 1
+                continue
+            depth += 1
+            if depth == 1 or elem.tag != "model":
+                continue
+            if number in wanted and _model_name(elem) == self.models[number].name:
+                yield number, elem.get("CustomModel") or ""
+            number += 1
+
+    def model_infos(self) -> list[ModelInfo]:
+        """See :func:`parse_models`."""
+        seen = set()
+        out: list[ModelInfo] = []
+        for rec in self.models:
+            if rec.name and rec.name not in seen:
+                seen.add(rec.name)
+                out.append(ModelInfo(rec.name, _to_int(rec.strings), _to_int(rec.nodes)))
+        return out
+
+    def groups_and_models(self):
+        """See :func:`parse_layout_groups_and_models`."""
+        layout_groups: list[str] = []
+        models_index: Dict[str, ModelInfo] = {}
+        models_by_group: Dict[str, list[str]] = {}
+        for g in self.groups:
+            gname = (g.name or "").strip()
+            if not gname:
+                continue
+            layout_groups.append(gname)
+            refs = [ref for ref, direct in g.members if direct and ref]
+            refs += [x.strip() for x in g.members_csv.split(",") if x.strip()]
+            refs += [(m.name or "").strip() for m in g.models]
+            # dict keys: unique refs in first-seen order
+            models_by_group[gname] = list(dict.fromkeys(r for r in refs if r))
+        for rec in self.models:
+            name = (rec.name or "").strip()
+            if name:
+                models_index[name] = ModelInfo(name, _to_int(rec.strings), _to_int(rec.nodes))
+        return layout_groups, models_index, models_by_group
+
+    def hierarchy(self) -> GroupHierarchy:
+        """Nested-group view of :meth:`groups_and_models`, built once per index."""
+        if self._hierarchy is None:
+            self._hierarchy = GroupHierarchy(self.groups_and_models()[2])
+        return self._hierarchy
+
+    def group_matcher(self) -> GroupMatcher:
+        """:class:`GroupMatcher` over the layout's groups, built once per index."""
+        if self._matcher is None:
+            self._matcher = GroupMatcher(self.groups_and_models()[0])
+        return self._matcher
+
+    def model_nodes(self) -> Dict[str, List[Tuple[float, float]]]:
+        """See :func:`extract_model_nodes`."""
+        out: Dict[str, List[Tuple[float, float]]] = {}
+        for rec in self.models:
+            if not rec.name:
+                continue
+            pts = list(rec.points.get("node", ()))
+            if not pts:
+                for tag in POINT_TAGS[1:]:
+                    pts.extend(rec.points.get(tag, ()))
+            out[rec.name] = pts
+        return out
+
+    def model_positions(self) -> Dict[str, np.ndarray]:
+        """See :func:`model_positions`; computed once per index (read-only).
+
+        Models that would be over ``MAX_MODEL_NODES`` (or put the layout
+        over ``MAX_LAYOUT_NODES``), or whose shape is out of bounds (see
+        :func:`model_geometry`), get no positions and a line in
+        ``geometry_warnings``. Custom grids are re-read from ``source``.
+        """
+        if self._positions is None:
+            nodes = self.model_nodes()
+            out: Dict[str, np.ndarray] = {}
+            warnings: List[str] = []
+            budget = MAX_LAYOUT_NODES
+            drawn = {}  # model number -> attrs, for models to compute
+            for i, rec in enumerate(self.models):
+                if not rec.name or nodes[rec.name]:
+                    continue
+                if rec.grid_cells is not None:
+                    n = rec.grid_cells
+                else:
+                    n = node_count(rec.attrs)
+                if n is None:
+                    continue
+                if n > MAX_MODEL_NODES:
+                    warnings.append(
+                        f"{rec.name}: {n} nodes is over the limit of {MAX_MODEL_NODES} per model; not drawn"
+                    )
+                elif n > budget:
+                    warnings.append(
+                        f"{rec.name}: layout is over the limit of {MAX_LAYOUT_NODES} nodes; not drawn"
+                    )
+                else:
+                    drawn[i] = rec.attrs
+                    budget -= n
+            wanted = {i for i in drawn if self.models[i].grid_cells is not None}
+            grids = self._custom_grids(wanted) if wanted else iter(())
+            pending = None  # (model number, grid) read ahead of its model
+            for i, rec in enumerate(self.models):
+                if not rec.name:
+                    continue
+                xy = None
+                if nodes[rec.name]:
+                    xy = np.asarray(nodes[rec.name], dtype=np.float32)
+                elif i in drawn:
+                    attrs = drawn[i]
+                    if i in wanted:
+                        try:
+                            while pending is None or pending[0] < i:
+                                pending = next(grids)
+                        except (OSError, TypeError, ET.ParseError, StopIteration):
+                            grids, pending = iter(()), (len(self.models), None)
+                        if pending[0] != i:
+                            warnings.append(f"{rec.name}: custom grid could not be re-read; not drawn")
+                            attrs = None
+                        else:
+                            attrs = {**attrs, "CustomModel": pending[1]}
+                    try:
+                        xy = model_geometry(attrs) if attrs else None
+                    except ValueError as e:
+                        warnings.append(f"{rec.name}: {e}; not drawn")
+                if xy is None:
+                    xy = np.empty((0, 2), dtype=np.float32)
+                xy.flags.writeable = False
+                out[rec.name] = xy
+            self.geometry_warnings = warnings
+            self._positions = out
+        return self._positions
+
+    @staticmethod
+    def _nest_groups(group_names, group_refs, known_models) -> Dict[int, List[int]]:
+        """``{group index: [nested group index, ...]}`` for groups in groups.
+
+        ``group_refs[i]`` are the member refs of group ``i``; a ref that is
+        not a model but names a group (the first with that name) nests that
+        group. A group is nested once, under the first group listing it, so
+        the result stays a tree; nesting that would close a cycle is
+        dropped. Nested groups are listed in group order.
+        """
+        first = {}
+        for i, name in enumerate(group_names):
+            first.setdefault(name, i)
+        parent_of = {}
+        for i, refs in enumerate(group_refs):
+            for ref in refs:
+                j = first.get(ref)
+                if j is not None and j != i and ref not in known_models:
+                    parent_of.setdefault(j, i)
+        graph = {}
+        for j, i in parent_of.items():
+            graph.setdefault(i, []).append(j)
+        cyclic = back_edges(graph)
+        nested: Dict[int, List[int]] = {}
+        for j in sorted(parent_of):
+            i = parent_of[j]
+            if (i, j) not in cyclic:
+                nested.setdefault(i, []).append(j)
+        return nested
+
+    def _tree_shape(self):
+        """Structure shared by :meth:`tree` and :meth:`compact_tree`.
+
+        Returns ``(models, groups, nested, loose, top)``: ``{name: model
+        record}`` (the last with each name), ``[(group name, [model name,
+        ...])]``, the nesting from :meth:`_nest_groups`, then ROOT's
+        children: the models in no group and the indexes of the groups not
+        nested in another.
+        """
+        models: Dict[str, ModelRecord] = {}
+        for rec in self.models:
+            if rec.name:
+                models[rec.name] = rec
+
+        groups = []
+        group_refs = []
+        grouped_names = set()
+        for g in self.groups:
+            if not g.name:
+                continue
+            refs = [ref for ref, _ in g.members if ref]
+            csv = [x.strip() for x in g.members_csv.split(",") if x.strip()]
+            members = [ref for ref in refs if ref in models]
+            children = set(members)
+            for ref in csv:
+                if ref in models and ref not in children:
+                    # keep the record's name, not the CSV copy
+                    members.append(models[ref].name)
+                    children.add(ref)
+            grouped_names |= children
+            groups.append((g.name, members))
+            group_refs.append([ref for ref in refs + csv if ref not in models])
+        nested = self._nest_groups([name for name, _ in groups], group_refs, models)
+
+        loose = [name for name in models if name not in grouped_names]
+        inner = {j for js in nested.values() for j in js}
+        top = [i for i in range(len(groups)) if i not in inner]
+        return models, groups, nested, loose, top
+
+    def tree(self) -> NodeInfo:
+        """See :func:`parse_tree`; a fresh tree on every call."""
+        models, groups, nested, loose, top = self._tree_shape()
+        model_nodes = {
+            name: NodeInfo(
+                name=name, type="model",
+                strings=_digits(rec.strings), nodes=_digits(rec.nodes),
+            )
+            for name, rec in models.items()
+        }
+        group_nodes = [
+            NodeInfo(name=name, type="group", children=[model_nodes[m] for m in members])
+            for name, members in groups
+        ]
+        for i, js in nested.items():
+            group_nodes[i].children.extend(group_nodes[j] for j in js)
+        root = NodeInfo(name="ROOT", type="group")
+        root.children = [model_nodes[m] for m in loose] + [group_nodes[i] for i in top]
+        return root
+
+    def compact_tree(self) -> LayoutTree:
+        """:meth:`tree` as a :class:`LayoutTree`, built once per index (do not modify)."""
+        if self._compact is not None:
+            return self._compact
+        models, groups, nested, loose, top = self._tree_shape()
+        out = LayoutTree()
+        out.names = ["ROOT"] + list(models) + [name for name, _ in groups]
+        model_ids = {name: k for k, name in enumerate(models, 1)}
+        strings = array("q", [-1]) * (len(models) + 1)
+        nodes = array("q", [-1]) * (len(models) + 1)
+        for k, rec in enumerate(models.values(), 1):
+            s, n = _digits(rec.strings), _digits(rec.nodes)
+            if s is not None:
+                strings[k] = s
+            if n is not None:
+                nodes[k] = n
+        group_base = len(models) + 1
+
+        def add_models(parent, names):
+            ids = [model_ids[m] for m in names]
+            out.add_models(parent, ids, [strings[k] for k in ids], [nodes[k] for k in ids])
+
+        root = out.add(0, GROUP, -1)
+        add_models(root, loose)
+        stack = [(root, iter(top))]
+        while stack:
+            idx, subgroups = stack[-1]
+            i = next(subgroups, None)
+            if i is None:
+                stack.pop()
+                out.end[idx] = len(out)
+                continue
+            child = out.add(group_base + i, GROUP, idx)
+            add_models(child, groups[i][1])
+            stack.append((child, iter(nested.get(i, ()))))
+        self._compact = out
+        return out
+
+    def tree_with_index(self):
+        """See :func:`parse_tree_with_index`; a fresh tree on every call."""
+        name_index: Dict[str, NodeInfo] = {}
+        top = NodeInfo(name="ROOT", type="group")
+        for rec in self.models:
+            n = (rec.name or "").strip()
+            if not n:
+                continue
+            name_index[n] = NodeInfo(
+                name=n, type="model",
+                strings=_digits(rec.strings), nodes=_digits(rec.nodes),
+            )
+        model_names = set(name_index)
+
+        # Groups from explicit <group> definitions (member refs)
+        groups: List[NodeInfo] = []
+        group_refs = []
+        for g in self.groups:
+            gname = (g.name or "").strip()
+            if not gname:
+                continue
+            gi = NodeInfo(name=gname, type="group")
+            refs = [(ref or "").strip() for ref, _ in g.members]
+            csv = [x.strip() for x in g.members_csv.split(",") if x.strip()]
+            children = set()
+            for ref in refs:
+                if ref in name_index:
+                    child = name_index[ref]
+                    gi.children.append(child)
+                    child.parent = gi
+                    children.add(ref)
+            for ref in csv:
+                if ref in name_index and ref not in children:
+                    child = name_index[ref]
+                    gi.children.append(child)
+                    child.parent = gi
+                    children.add(ref)
+            groups.append(gi)
+            group_refs.append(refs + csv)
+        nested = self._nest_groups([g.name for g in groups], group_refs, model_names)
+        for i, js in nested.items():
+            for j in js:
+                groups[i].children.append(groups[j])
+                groups[j].parent = groups[i]
+
+        # Heuristic sub-model inference: name nesting like "Tree-Left", "MegaTree:1"
+        for name in list(name_index):
+            m = _SUBMODEL_NAME.match(name)
+            if m:
+                node = name_index[name]
+                parent_name = m.group(1).strip()
+                if parent_name in name_index:
+                    parent = name_index[parent_name]
+                    # create a synthetic group for the parent if not already a group
+                    if parent.type == "model":
+                        gi = NodeInfo(name=f"{parent.name}_GROUP", type="group")
+                        gi.children.append(parent)
+                        parent.parent = gi
+                        groups.append(gi)
+                        name_index[gi.name] = gi
+                        parent = gi
+                    node.parent = parent
+                    if not any(c is node for c in parent.children):
+                        parent.children.append(node)
+
+        # Attach anything unattached to ROOT
+        group_names = {g.name for g in groups}
+        for n in name_index.values():
+            if n.parent is None and n.name not in group_names:
+                top.children.append(n)
+        for g in groups:
+            if g.parent is None:
+                top.children.append(g)
+
+        return top, name_index
+
+
+_layout_cache: "OrderedDict[str, LayoutIndex]" = OrderedDict()
+_layout_lock = threading.Lock()
+
+
+def load_layout(xml_path: str) -> LayoutIndex:
+    """Return the :class:`LayoutIndex` of ``xml_path``, parsing it at most once.
+
+    Indexes are cached by a hash of the file's bytes (the last
+    ``LAYOUT_CACHE_SIZE`` layouts), so re-uploads of the same layout under
+    a new temp name are served from memory. Hashing and parsing both read
+    the file in chunks.
+    """
+    h = hashlib.sha256()
+    with open(xml_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    key = h.hexdigest()
+    with _layout_lock:
+        index = _layout_cache.get(key)
+        if index is not None:
+            _layout_cache.move_to_end(key)
+            index.source = xml_path  # the file it was first read from may be gone
+            return index
+    index = LayoutIndex.from_file(xml_path)
+    with _layout_lock:
+        _layout_cache[key] = index
+        while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+    return index
+
+
 def parse_models(xml_path: str) -> list[ModelInfo]:
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    models: list[ModelInfo] = []
-
-    for m in root.findall(".//model"):
-        name = m.get("name") or m.get("Model") or m.get("Name")
-        if not name:
-            continue
-        strings = m.get("StringCount") or m.get("strings")
-        nodes = m.get("Nodes") or m.get("nodes")
-        try:
-            strings_i = int(strings) if strings is not None else None
-        except ValueError:
-            strings_i = None
-        try:
-            nodes_i = int(nodes) if nodes is not None else None
-        except ValueError:
-            nodes_i = None
-        models.append(ModelInfo(name=name, strings=strings_i, nodes=nodes_i))
-
-    # Deduplicate by name
-    seen=set(); uniq=[]
-    for mi in models:
-        if mi.name not in seen:
-            uniq.append(mi); seen.add(mi.name)
-    return uniq
+    """Models in layout order, deduplicated by name (first one wins)."""
+    return load_layout(xml_path).model_infos()
 
 
 def parse_layout_groups_and_models(
@@ -89,48 +618,7 @@ def parse_layout_groups_and_models(
 ) -> tuple[list[str], Dict[str, ModelInfo], Dict[str, list[str]]]:
     """Return all layout group names, an index of models with strings/nodes,
     and a mapping of group name to member model names."""
-    root = ET.parse(xml_path).getroot()
-    layout_groups: list[str] = []
-    models_index: Dict[str, ModelInfo] = {}
-    models_by_group: Dict[str, list[str]] = {}
-
-    for g in root.findall(".//group"):
-        gname = (g.get("name") or g.get("Group") or g.get("Name") or "").strip()
-        if not gname:
-            continue
-        layout_groups.append(gname)
-        members: list[str] = []
-        for mem in g.findall("member"):
-            ref = mem.get("name")
-            if ref and ref not in members:
-                members.append(ref)
-        members_csv = g.get("members") or g.get("Members") or ""
-        for ref in [x.strip() for x in members_csv.split(",") if x.strip()]:
-            if ref not in members:
-                members.append(ref)
-        for m in g.findall("model"):
-            mname = (m.get("name") or m.get("Model") or m.get("Name") or "").strip()
-            if mname and mname not in members:
-                members.append(mname)
-        models_by_group[gname] = members
-
-    for m in root.findall(".//model"):
-        name = (m.get("name") or m.get("Model") or m.get("Name") or "").strip()
-        if not name:
-            continue
-        strings = m.get("StringCount") or m.get("strings")
-        nodes = m.get("Nodes") or m.get("nodes")
-        try:
-            strings_i = int(strings) if strings is not None else None
-        except ValueError:
-            strings_i = None
-        try:
-            nodes_i = int(nodes) if nodes is not None else None
-        except ValueError:
-            nodes_i = None
-        models_index[name] = ModelInfo(name=name, strings=strings_i, nodes=nodes_i)
-
-    return layout_groups, models_index, models_by_group
+    return load_layout(xml_path).groups_and_models()
 
 
 def extract_model_nodes(xml_path: str) -> Dict[str, List[Tuple[float, float]]]:
@@ -138,158 +626,37 @@ def extract_model_nodes(xml_path: str) -> Dict[str, List[Tuple[float, float]]]:
     Returns { model_name: [(x,y), ...] }.
     Tries common xLights layouts: <model><node x="" y=""/>, or nested variants.
     """
-    root = ET.parse(xml_path).getroot()
-    out: Dict[str, List[Tuple[float, float]]] = {}
-    for m in root.findall(".//model"):
-        name = m.get("name") or m.get("Model") or m.get("Name")
-        if not name:
-            continue
-        pts: List[Tuple[float, float]] = []
-        # 1) Direct nodes
-        for n in m.findall(".//node"):
-            xs, ys = _attr(n, "x"), _attr(n, "y")
-            if xs is not None and ys is not None:
-                try:
-                    pts.append((float(xs), float(ys)))
-                except ValueError:
-                    pass
-        # 2) Some layouts store coordinates on <pixel> or <point> elements
-        if not pts:
-            for tag in ("pixel", "point", "Point"):
-                for n in m.findall(f".//{tag}"):
-                    xs, ys = _attr(n, "x"), _attr(n, "y")
-                    if xs is not None and ys is not None:
-                        try:
-                            pts.append((float(xs), float(ys)))
-                        except ValueError:
-                            pass
-        out[name] = pts
-    return out
+    return load_layout(xml_path).model_nodes()
+
+
+def model_positions(xml_path: str) -> Dict[str, np.ndarray]:
+    """Returns { model_name: float32 array of (x, y) rows } for every model.
+
+    Coordinates a layout spells out (see :func:`extract_model_nodes`) are
+    used as they are; otherwise they are computed from the model's
+    ``DisplayAs`` and placement by :mod:`xlights_seq.geometry`. Models the
+    engine cannot draw, or that are too large to (see
+    ``LayoutIndex.geometry_warnings``), get an empty array.
+    """
+    return load_layout(xml_path).model_positions()
 
 
 def parse_tree(xml_path: str) -> NodeInfo:
-    root = ET.parse(xml_path).getroot()
     # Many xLights layouts have <models> with multiple <model> and <group>.
     # Groups typically include child references by name. Structure varies by version, so we discover both.
-    models_index = {}
-    top = NodeInfo(name="ROOT", type="group")
-
-    # index models
-    for m in root.findall(".//model"):
-        name = m.get("name") or m.get("Model") or m.get("Name")
-        if not name: continue
-        strings = m.get("StringCount") or m.get("strings")
-        nodes = m.get("Nodes") or m.get("nodes")
-        models_index[name] = NodeInfo(
-            name=name, type="model",
-            strings=int(strings) if (strings and strings.isdigit()) else None,
-            nodes=int(nodes) if (nodes and nodes.isdigit()) else None
-        )
-
-    # groups (best-effort: search common structures)
-    groups = []
-    for g in root.findall(".//group"):
-        gname = g.get("name") or g.get("Group") or g.get("Name")
-        if not gname: continue
-        node = NodeInfo(name=gname, type="group")
-        # child refs by <member name="..."> or CSV in attribute
-        for mem in g.findall(".//member"):
-            ref = mem.get("name")
-            if ref and ref in models_index:
-                node.children.append(models_index[ref])
-        members_csv = (g.get("members") or g.get("Members") or "")
-        for ref in [x.strip() for x in members_csv.split(",") if x.strip()]:
-            if ref in models_index and models_index[ref] not in node.children:
-                node.children.append(models_index[ref])
-        groups.append(node)
-
-    # attach loose models (not in groups) under ROOT
-    grouped_names = {c.name for gg in groups for c in gg.children}
-    for m in list(models_index.values()):
-        if m.name not in grouped_names:
-            top.children.append(m)
-    # append groups
-    top.children.extend(groups)
-    return top
+    return load_layout(xml_path).tree()
 
 
 def parse_tree_with_index(xml_path: str):
-    root = ET.parse(xml_path).getroot()
-    name_index: Dict[str, NodeInfo] = {}
-    top = NodeInfo(name="ROOT", type="group")
-
-    # Index all models
-    for m in root.findall(".//model"):
-        n = (m.get("name") or m.get("Model") or m.get("Name") or "").strip()
-        if not n:
-            continue
-        strings = m.get("StringCount") or m.get("strings")
-        nodes = m.get("Nodes") or m.get("nodes")
-        ni = NodeInfo(
-            name=n,
-            type="model",
-            strings=int(strings) if strings and str(strings).isdigit() else None,
-            nodes=int(nodes) if nodes and str(nodes).isdigit() else None,
-        )
-        name_index[n] = ni
-
-    # Groups from explicit <group> definitions (member refs)
-    groups: List[NodeInfo] = []
-    for g in root.findall(".//group"):
-        gname = (g.get("name") or g.get("Group") or g.get("Name") or "").strip()
-        if not gname:
-            continue
-        gi = NodeInfo(name=gname, type="group")
-        # members via <member name="..."/> or CSV attribute
-        for mem in g.findall(".//member"):
-            ref = (mem.get("name") or "").strip()
-            if ref in name_index:
-                child = name_index[ref]
-                gi.children.append(child)
-                child.parent = gi
-        members_csv = (g.get("members") or g.get("Members") or "")
-        for ref in [x.strip() for x in members_csv.split(",") if x.strip()]:
-            if ref in name_index and name_index[ref] not in gi.children:
-                child = name_index[ref]
-                gi.children.append(child)
-                child.parent = gi
-        groups.append(gi)
-
-    # Heuristic sub-model inference: name nesting like "Tree-Left", "MegaTree:1"
-    for name, node in list(name_index.items()):
-        m = re.match(r"(.+?)[\-\:\_ ]\s*(\d+|left|right|top|bottom|inner|outer)$", name, re.I)
-        if m:
-            parent_name = m.group(1).strip()
-            if parent_name in name_index:
-                parent = name_index[parent_name]
-                # create a synthetic group for the parent if not already a group
-                if parent.type == "model":
-                    gi = NodeInfo(name=f"{parent.name}_GROUP", type="group")
-                    gi.children.append(parent)
-                    parent.parent = gi
-                    groups.append(gi)
-                    name_index[gi.name] = gi
-                    parent = gi
-                node.parent = parent
-                if node not in parent.children:
-                    parent.children.append(node)
-
-    # Attach anything unattached to ROOT
-    attached = {c.name for g in groups for c in g.children}
-    for n in name_index.values():
-        if n.parent is None and n.name not in [g.name for g in groups]:
-            top.children.append(n)
-    for g in groups:
-        if g.parent is None:
-            top.children.append(g)
-
-    return top, name_index
+    return load_layout(xml_path).tree_with_index()
 
 
 def flatten_models(tree: NodeInfo) -> list[NodeInfo]:
+    # depth-first, children in order; iterative so deep group nesting is fine
     out = []
-    def walk(n):
+    stack = [tree]
+    while stack:
+        n = stack.pop()
         if n.type == "model": out.append(n)
-        for c in n.children: walk(c)
-    walk(tree)
+        stack.extend(reversed(n.children))
     return out
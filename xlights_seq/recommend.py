@@ -1,5 +1,5 @@
 from typing import Dict, List
-from .parsers import NodeInfo
+from .parsers import NodeInfo, flatten_models
 
 # Heuristics for common props; tune as you see them in real layouts.
 KEYWORDS = {
@@ -15,11 +15,7 @@ KEYWORDS = {
 
 def recommend_groups(tree: NodeInfo):
     # Output: list of {"name": str, "members": [model_name,...], "reason": str}
-    models: List[NodeInfo] = []
-    def rec(n):
-        if n.type=="model": models.append(n)
-        for c in n.children: rec(c)
-    rec(tree)
+    models: List[NodeInfo] = flatten_models(tree)
 
     names = [(m.name.lower(), m) for m in models]
     recs = []
@@ -0,0 +1,76 @@
+import mmap
+import re
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+from .parallel import _REF
+from .xml_stream import _escape_attrib
+
+_MODEL = re.compile(rb'<model name="([^"]*)">.*?</model>', re.DOTALL)
+
+
+class PreviousSequence:
+    """Model sections of an already written (uncompressed) xsq.
+
+    The file is memory-mapped and scanned once for ``<model>`` elements so
+    :meth:`copy_model` can splice a model's serialized effects into a new
+    document without regenerating them. ``compact`` tells whether the file
+    references a trailing ``effectDB`` table.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._data = b""
+        self._sections = {mo.group(1): mo.span() for mo in _MODEL.finditer(self._data)}
+        self._defs = None
+        table_at = self._data.rfind(b"<effectDB")
+        self.compact = table_at >= 0
+        if self.compact:
+            end = self._data.rfind(b"</xseq>")
+            table = ET.fromstring(bytes(self._data[table_at:end]))
+            self._defs = {
+                d.get("id").encode(): (
+                    d.get("type"),
+                    tuple((p.get("name"), p.get("value")) for p in d.findall("param")),
+                )
+                for d in table.findall("effectDef")
+            }
+
+    @staticmethod
+    def _key(name: str) -> bytes:
+        return _escape_attrib(name).encode("utf-8", "xmlcharrefreplace")
+
+    def __contains__(self, name: str) -> bool:
+        return self._key(name) in self._sections
+
+    def copy_model(self, builder, name: str, table=None):
+        """Write the old ``model`` element for ``name`` to ``builder``.
+
+        With ``table`` (an :class:`EffectDB`) the section's definitions are
+        merged in first-use order and its refs renumbered, which assigns the
+        ids a fresh render of the model would have.
+        """
+        lo, hi = self._sections[self._key(name)]
+        data = self._data[lo:hi]
+        if table is not None:
+            counts = Counter(_REF.findall(data))
+            old_ids = list(counts)  # first-use order
+            mapping = table.merge([(self._defs[ref], counts[ref]) for ref in old_ids])
+            new_ids = {ref: mapping[str(i)].encode() for i, ref in enumerate(old_ids)}
+            if any(old != new for old, new in new_ids.items()):
+                data = _REF.sub(lambda mo: b' ref="%s"' % new_ids[mo.group(1)], data)
+        builder.write_fragment(data)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,166 @@
+import numpy as np
+
+from .effect_db import emit_effect
+from .parallel import emit_models
+
+# models per timeline when streaming, so memory stays flat in layout size
+TIMELINE_BLOCK_MODELS = 16
+
+
+class EffectTimeline:
+    """Columnar table of every effect in a sequence.
+
+    One row per effect, grouped by model in layout order and by start time
+    within a model. The columns are NumPy arrays: ``model_idx`` (into
+    ``model_names``), ``start_ms``, ``end_ms``, ``type_id`` (into ``types``)
+    and ``param_id`` (into ``param_sets``, tuples of ``(name, value)``
+    items). Generators fill a timeline; :func:`emit_timeline` turns it into
+    xsq / rgbeffects XML.
+    """
+
+    def __init__(self, model_names, model_idx, start_ms, end_ms, type_id, param_id, types, param_sets):
+        self.model_names = list(model_names)
+        self.model_idx = np.asarray(model_idx, dtype=np.int32)
+        self.start_ms = np.asarray(start_ms, dtype=np.int64)
+        self.end_ms = np.asarray(end_ms, dtype=np.int64)
+        self.type_id = np.asarray(type_id, dtype=np.int32)
+        self.param_id = np.asarray(param_id, dtype=np.int32)
+        self.types = list(types)
+        self.param_sets = list(param_sets)
+
+    @classmethod
+    def from_schedule(cls, model_names, start_ms, end_ms, beat_class, resolve):
+        """Stamp one beat schedule onto every model.
+
+        ``start_ms``/``end_ms``/``beat_class`` hold one entry per beat and are
+        shared by all models. ``resolve(model_index, beat_class)`` returns the
+        ``(effect type, params items)`` a model uses for a class of beat; it
+        is called once per model and distinct class, not once per beat.
+        """
+        model_names = list(model_names)
+        n_models, n_beats = len(model_names), len(start_ms)
+        classes, inverse = np.unique(np.asarray(beat_class), return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        types, type_ids = [], {}
+        param_sets, param_ids = [], {}
+        type_id = np.empty((n_models, n_beats), dtype=np.int32)
+        param_id = np.empty((n_models, n_beats), dtype=np.int32)
+        for i in range(n_models):
+            tids = np.empty(len(classes), dtype=np.int32)
+            pids = np.empty(len(classes), dtype=np.int32)
+            for c, cls_value in enumerate(classes.tolist()):
+                eff_type, params = resolve(i, cls_value)
+                params = tuple(params)
+                if eff_type not in type_ids:
+                    type_ids[eff_type] = len(types)
+                    types.append(eff_type)
+                if params not in param_ids:
+                    param_ids[params] = len(param_sets)
+                    param_sets.append(params)
+                tids[c] = type_ids[eff_type]
+                pids[c] = param_ids[params]
+            type_id[i] = tids[inverse]
+            param_id[i] = pids[inverse]
+
+        return cls(
+            model_names,
+            np.repeat(np.arange(n_models, dtype=np.int32), n_beats),
+            np.tile(np.asarray(start_ms, dtype=np.int64), n_models),
+            np.tile(np.asarray(end_ms, dtype=np.int64), n_models),
+            type_id.reshape(-1),
+            param_id.reshape(-1),
+            types,
+            param_sets,
+        )
+
+    def __len__(self):
+        return len(self.model_idx)
+
+    def model_bounds(self):
+        """Row offsets: model ``i`` owns rows ``bounds[i]:bounds[i + 1]``."""
+        return np.searchsorted(self.model_idx, np.arange(len(self.model_names) + 1))
+
+    def validate(self):
+        """Raise ``ValueError`` if the columns are inconsistent."""
+        n = len(self)
+        for name in ("start_ms", "end_ms", "type_id", "param_id"):
+            if len(getattr(self, name)) != n:
+                raise ValueError(f"{name} has {len(getattr(self, name))} rows, expected {n}")
+        if n == 0:
+            return
+        if np.any(np.diff(self.model_idx) < 0):
+            raise ValueError("rows are not grouped by model")
+        if self.model_idx[0] < 0 or self.model_idx[-1] >= len(self.model_names):
+            raise ValueError("model index out of range")
+        if np.any(self.end_ms < self.start_ms):
+            raise ValueError("effect ends before it starts")
+        if self.type_id.min() < 0 or self.type_id.max() >= len(self.types):
+            raise ValueError("effect type id out of range")
+        if self.param_id.min() < 0 or self.param_id.max() >= len(self.param_sets):
+            raise ValueError("param set id out of range")
+
+    def overlaps(self):
+        """Mask of rows that start before the previous effect on the model ends."""
+        mask = np.zeros(len(self), dtype=bool)
+        same_model = self.model_idx[1:] == self.model_idx[:-1]
+        mask[1:] = same_model & (self.start_ms[1:] < self.end_ms[:-1])
+        return mask
+
+
+def _emit_rows(builder, rows, ctx, table):
+    name, start_ms, end_ms, type_id, param_id = rows
+    ms, types, param_sets = ctx["ms"], ctx["types"], ctx["param_sets"]
+    builder.start("model", {"name": name})
+    builder.start("effectLayer", {"name": "Layer 1"})
+    for s, e, t, p in zip(start_ms.tolist(), end_ms.tolist(), type_id.tolist(), param_id.tolist()):
+        emit_effect(builder, ms[s], ms[e], types[t], param_sets[p], effect_db=table)
+    builder.end("effectLayer")
+    builder.end("model")
+
+
+def emit_timeline(builder, timeline, table=None, workers=1):
+    """Emit a ``model``/``effectLayer`` element per model of ``timeline``.
+
+    Effects reference ``table`` (an :class:`EffectDB`) when given. With
+    ``workers > 1`` models are rendered in a process pool (see
+    :func:`emit_models`).
+    """
+    bounds = timeline.model_bounds().tolist()
+    models = [
+        (
+            name,
+            timeline.start_ms[lo:hi],
+            timeline.end_ms[lo:hi],
+            timeline.type_id[lo:hi],
+            timeline.param_id[lo:hi],
+        )
+        for name, lo, hi in zip(timeline.model_names, bounds, bounds[1:])
+    ]
+    times = np.unique(np.concatenate([timeline.start_ms, timeline.end_ms]))
+    ctx = {
+        "ms": {v: str(v) for v in times.tolist()},
+        "types": timeline.types,
+        "param_sets": timeline.param_sets,
+    }
+    emit_models(builder, _emit_rows, models, ctx, table, workers)
+
+
+def emit_schedule(builder, model_names, start_ms, end_ms, beat_class, resolve, table=None, workers=1):
+    """Build timelines with :meth:`EffectTimeline.from_schedule` and emit them.
+
+    Serially, models are stamped and written ``TIMELINE_BLOCK_MODELS`` at a
+    time so only one block of rows is in memory; with ``workers > 1`` the
+    whole layout is stamped up front and handed to the process pool.
+    """
+    model_names = list(model_names)
+    block = len(model_names) if workers > 1 else TIMELINE_BLOCK_MODELS
+    for lo in range(0, len(model_names), max(block, 1)):
+        timeline = EffectTimeline.from_schedule(
+            model_names[lo : lo + block],
+            start_ms,
+            end_ms,
+            beat_class,
+            lambda i, c: resolve(lo + i, c),
+        )
+        emit_timeline(builder, timeline, table, workers)
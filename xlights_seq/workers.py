@@ -0,0 +1,156 @@
+import multiprocessing as mp
+import queue
+import threading
+
+
+class AnalysisTimeout(Exception):
+    """A job ran past the pool timeout; its worker process was killed."""
+
+
+class WorkerCrashed(Exception):
+    """A worker process died while running a job (e.g. a native decoder crash)."""
+
+
+def _worker_main(conn, initializer):
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        fn, args, kwargs = task
+        try:
+            reply = (True, fn(*args, **kwargs))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # unpicklable result or exception; report something we can send
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class WorkerPool:
+    """Bounded pool of long-lived worker processes with a hard per-job timeout.
+
+    Workers are started lazily and reused across jobs so imported modules and
+    JIT-compiled code stay warm. A job that runs past ``timeout`` seconds gets
+    its worker killed and replaced, and :class:`AnalysisTimeout` is raised;
+    a worker that dies mid-job raises :class:`WorkerCrashed`. At most
+    ``max_workers`` jobs run at once; callers wait up to ``timeout`` seconds
+    for a free worker.
+
+    ``max_workers=0`` runs jobs inline in the calling thread without a
+    timeout, which is handy for tests and debugging.
+    """
+
+    def __init__(self, max_workers: int, timeout: float, initializer=None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.initializer = initializer
+        self._ctx = mp.get_context("spawn")
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._started = 0
+
+    def _spawn(self):
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main, args=(child, self.initializer), daemon=True
+        )
+        proc.start()
+        child.close()
+        return proc, parent
+
+    def _acquire(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._started < self.max_workers:
+                        self._started += 1
+                        return self._spawn()
+                try:
+                    worker = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise AnalysisTimeout(
+                        f"No analysis worker became free within {self.timeout}s"
+                    ) from None
+            if worker[0].is_alive():
+                return worker
+            self._discard(worker)
+
+    def _discard(self, worker):
+        proc, conn = worker
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        conn.close()
+        with self._lock:
+            self._started -= 1
+
+    def _replace(self, worker):
+        """Kill ``worker`` and start a warm-up replacement in its slot."""
+        self._discard(worker)
+        with self._lock:
+            self._started += 1
+        self._idle.put(self._spawn())
+
+    def prestart(self):
+        """Start every worker now so ``initializer`` runs ahead of the first job."""
+        with self._lock:
+            missing = self.max_workers - self._started
+            self._started += max(0, missing)
+        for _ in range(max(0, missing)):
+            self._idle.put(self._spawn())
+
+    def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in a worker and return its result.
+
+        ``fn`` and its arguments must be picklable (module-level callables).
+        Exceptions raised by ``fn`` are re-raised here.
+        """
+        if self.max_workers <= 0:
+            return fn(*args, **kwargs)
+
+        worker = self._acquire()
+        proc, conn = worker
+        try:
+            conn.send((fn, args, kwargs))
+        except (EOFError, OSError):
+            pass  # dead worker; the poll below reports it
+        except Exception:
+            # pickling failed before anything was written
+            self._idle.put(worker)
+            raise
+        try:
+            if not conn.poll(self.timeout):
+                self._replace(worker)
+                raise AnalysisTimeout(f"Analysis exceeded {self.timeout}s")
+            ok, value = conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            raise WorkerCrashed(
+                f"Analysis worker exited unexpectedly (exit code {proc.exitcode})"
+            ) from None
+        self._idle.put(worker)
+        if ok:
+            return value
+        raise value
+
+    def shutdown(self):
+        while True:
+            try:
+                proc, conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            proc.join(timeout=1)
+            self._discard((proc, conn))
@@ -0,0 +1,157 @@
+import gzip
+import os
+
+# same declaration ElementTree.write(encoding="utf-8", xml_declaration=True) emits
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+# buffered string fragments before a write to the file
+FLUSH_PARTS = 8192
+
+
+def _escape_attrib(text: str) -> str:
+    """Escape an attribute value exactly like ElementTree does."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+class XmlFragmentWriter:
+    """Serialize ``start``/``end`` calls to a string, ElementTree-style.
+
+    Takes the same calls as :class:`xml.etree.ElementTree.TreeBuilder` and
+    produces the bytes ``ElementTree.write`` would for those elements. Used
+    on its own to render document fragments (e.g. one model in a worker
+    process) that :meth:`XmlStreamWriter.write_fragment` splices back in.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._chunks = []
+        self._stack = []
+        self._open = False  # last start tag still awaits ">" or " />"
+
+    def start(self, tag: str, attrs=None):
+        parts = self._parts
+        if self._open:
+            parts.append(">")
+        parts.append("<" + tag)
+        if attrs:
+            for k, v in attrs.items():
+                parts.append(f' {k}="{_escape_attrib(v)}"')
+        self._stack.append(tag)
+        self._open = True
+
+    def end(self, tag: str):
+        top = self._stack.pop()
+        if top != tag:
+            raise ValueError(f"end tag mismatch (expected {top}, got {tag})")
+        if self._open:
+            self._parts.append(" />")
+            self._open = False
+        else:
+            self._parts.append(f"</{tag}>")
+        if len(self._parts) >= FLUSH_PARTS:
+            self._flush()
+
+    def write_fragment(self, text: str):
+        """Insert already serialized elements at the current position."""
+        if self._open:
+            self._parts.append(">")
+            self._open = False
+        self._parts.append(text)
+        if len(self._parts) >= FLUSH_PARTS:
+            self._flush()
+
+    def _flush(self):
+        self._chunks.append("".join(self._parts))
+        self._parts.clear()
+
+    def getvalue(self) -> str:
+        self._flush()
+        return "".join(self._chunks)
+
+
+class XmlStreamWriter(XmlFragmentWriter):
+    """Write an XML document element by element straight to ``path``.
+
+    One emitter can either build a tree with a ``TreeBuilder`` or stream to
+    disk with this, and the bytes match
+    ``ElementTree.write(encoding="utf-8", xml_declaration=True)``. Only the
+    open-element stack is kept in memory.
+
+    The document is written to a temporary file and moved into place on
+    :meth:`close`; with ``compress=True`` it is gzipped (with a fixed header
+    timestamp, so identical documents give identical files).
+    ``bytes_written`` counts the uncompressed document.
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        super().__init__()
+        self.path = path
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._out = open(self._tmp, "wb")
+        if compress:
+            self._raw_file = self._out
+            self._out = gzip.GzipFile(filename="", mode="wb", fileobj=self._out, mtime=0)
+        else:
+            self._raw_file = None
+        self.bytes_written = 0
+        self._parts.append(XML_DECLARATION)
+
+    def write_fragment(self, text):
+        """Insert serialized elements; ``bytes`` must already be UTF-8."""
+        if not isinstance(text, bytes):
+            return super().write_fragment(text)
+        if self._open:
+            self._parts.append(">")
+            self._open = False
+        self._flush()
+        self._out.write(text)
+        self.bytes_written += len(text)
+
+    def _flush(self):
+        data = "".join(self._parts).encode("utf-8", "xmlcharrefreplace")
+        self._out.write(data)
+        self.bytes_written += len(data)
+        self._parts.clear()
+
+    def close(self):
+        """Finish the document and move it into place."""
+        if self._stack:
+            raise ValueError(f"unclosed element <{self._stack[-1]}>")
+        self._flush()
+        self._out.close()
+        if self._raw_file is not None:
+            self._raw_file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Discard a partially written document."""
+        try:
+            self._out.close()
+            if self._raw_file is not None:
+                self._raw_file.close()
+        finally:
+            if os.path.exists(self._tmp):
+                os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
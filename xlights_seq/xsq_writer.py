@@ -1,10 +1,23 @@
 import xml.etree.ElementTree as ET
+from itertools import groupby
 
+import numpy as np
 
-def add_timing_track(root, name, times_s):
-    t = ET.SubElement(root, "timing", name=name)
+from .effect_db import EffectDB, emit_effect
+from .generator import DOWNBEAT_COLOR, PRESETS
+from .hierarchy import GroupHierarchy
+from .layers import allocate_layers, merge_adjacent
+from .splice import PreviousSequence
+from .timeline import EffectTimeline, emit_schedule
+from .xml_stream import XmlStreamWriter
+
+
+def emit_timing_track(builder, name, times_s):
+    builder.start("timing", {"name": name})
     for ts in (times_s or []):
-        ET.SubElement(t, "marker", timeMS=str(int(round(ts*1000))))
+        builder.start("marker", {"timeMS": str(int(round(ts*1000)))})
+        builder.end("marker")
+    builder.end("timing")
 
 
 def choose_effect_for(model_name: str, strings: int|None, nodes: int|None, downbeat=False):
@@ -18,58 +31,199 @@ def choose_effect_for(model_name: str, strings: int|None, nodes: int|None, downb
     return et, params
 
 
-def build_xsq(models, beat_times, duration_ms, *, downbeat_times=None, section_times=None, preset="auto"):
+def _xsq_schedule(models, beat_times, duration_ms, preset="auto", palette=None):
+    """Beat spans, beat classes and the per-model resolver for a timeline.
+
+    A known ``preset`` replaces the plain "On" effect of models the name
+    heuristics don't place; a ``palette`` colors beats in turn, with
+    downbeats in DOWNBEAT_COLOR (as the rgbeffects generator does).
+    """
+    preset_cfg = PRESETS.get(preset)
+    n = len(beat_times)
+    starts = [int(bt*1000) for bt in beat_times]
+    ends = [
+        int(min(duration_ms, (beat_times[i+1]*1000)) if i+1 < n else duration_ms)
+        for i in range(n)
+    ]
+    downbeat = np.arange(n) % 4 == 0
+    beat_class = downbeat
+    if palette:
+        colors = list(palette) + [DOWNBEAT_COLOR]
+        beat_class = np.where(downbeat, len(palette), np.arange(n) % len(palette)) * 2 + downbeat
+
+    def resolve(i, beat_class):
+        m = models[i]
+        is_downbeat = bool(beat_class % 2)
+        etype, params = choose_effect_for(m.name, m.strings, m.nodes, is_downbeat)
+        if preset_cfg and etype == "On" and params.get("Color1") == "#FFFFFF":
+            etype = preset_cfg["type"]
+            params.update(preset_cfg.get("params", {}))
+        if palette:
+            params["Color1"] = colors[beat_class // 2]
+        return etype, ((k, str(v)) for k,v in (params or {}).items())
+
+    return [m.name for m in models], starts, ends, beat_class, resolve
+
+
+def xsq_timeline(models, beat_times, duration_ms, preset="auto", palette=None):
+    """Per-beat effects for every model as an EffectTimeline (spans are shared)."""
+    return EffectTimeline.from_schedule(*_xsq_schedule(models, beat_times, duration_ms, preset, palette))
+
+
+def emit_xsq(builder, models, beat_times, duration_ms, *, downbeat_times=None, section_times=None, preset="auto", palette=None, effect_db=False, workers=1, previous=None, reuse=()):
     """
     models: list of ModelInfo(name, strings, nodes) parsed from xlights_rgbeffects.xml
-    Timing & effects are written into the XSQ doc. Layout stays in rgbeffects.
+    Timing & effects are passed to builder (TreeBuilder or XmlStreamWriter)
+    as start/end calls. Layout stays in rgbeffects.
+    preset/palette pick effects and beat colors as in _xsq_schedule.
+    effect_db=True references a trailing effectDB table instead of repeating
+    type/params on every effect; the EffectDB is returned.
+    workers>1 renders models in a process pool (streaming builders only);
+    the output is unchanged.
+    previous (a PreviousSequence) with reuse (model names) copies those
+    models' sections from an earlier xsq instead of generating them; only
+    valid when that xsq was written from the same beats, preset, palette
+    and effect_db mode.
     """
-    root = ET.Element("xseq", version="2024.05")  # neutral root name that xLights accepts
+    table = EffectDB() if effect_db else None
+    builder.start("xseq", {"version": "2024.05"})  # neutral root name that xLights accepts
     # Timing tracks
-    add_timing_track(root, "Beats", beat_times)
-    add_timing_track(root, "Downbeats", downbeat_times or [])
-    add_timing_track(root, "Sections", section_times or [])
+    emit_timing_track(builder, "Beats", beat_times)
+    emit_timing_track(builder, "Downbeats", downbeat_times or [])
+    emit_timing_track(builder, "Sections", section_times or [])
 
     # Per-model effects (simple MVP aligned to beats)
-    for m in models:
-        mdl = ET.SubElement(root, "model", name=m.name)
-        layer = ET.SubElement(mdl, "effectLayer", name="Layer 1")
-        for i, bt in enumerate(beat_times):
-            start = int(bt*1000)
-            end = int(min(duration_ms, (beat_times[i+1]*1000)) if i+1 < len(beat_times) else duration_ms)
-            downbeat = (i % 4 == 0)
-            etype, params = choose_effect_for(m.name, m.strings, m.nodes, downbeat)
-            eff = ET.SubElement(layer, "effect", startMS=str(start), endMS=str(end), type=etype)
-            for k,v in (params or {}).items():
-                ET.SubElement(eff, "param", name=k, value=str(v))
-    return ET.ElementTree(root)
+    if previous is None:
+        emit_schedule(builder, *_xsq_schedule(models, beat_times, duration_ms, preset, palette), table=table, workers=workers)
+    else:
+        copied = lambda m: m.name in reuse and m.name in previous
+        for is_copied, run in groupby(models, key=copied):
+            run = list(run)
+            if is_copied:
+                for m in run:
+                    previous.copy_model(builder, m.name, table)
+            else:
+                emit_schedule(builder, *_xsq_schedule(run, beat_times, duration_ms, preset, palette), table=table, workers=workers)
+    if table is not None:
+        table.emit(builder)
+    builder.end("xseq")
+    return table
+
+
+def build_xsq(models, beat_times, duration_ms, **kwargs):
+    builder = ET.TreeBuilder()
+    emit_xsq(builder, models, beat_times, duration_ms, **kwargs)
+    return ET.ElementTree(builder.close())
 
 
 def write_xsq(tree: ET.ElementTree, out_path: str):
     tree.write(out_path, encoding="utf-8", xml_declaration=True)
 
 
-def write_timing_tracks(root, timing):
+def stream_xsq(out_path: str, models, beat_times, duration_ms, *, compress=False, **kwargs):
+    """Same bytes as write_xsq(build_xsq(...)) without building the tree.
+
+    Returns EffectDB.stats() for effect_db=True, else None.
+    """
+    with XmlStreamWriter(out_path, compress=compress) as writer:
+        table = emit_xsq(writer, models, beat_times, duration_ms, **kwargs)
+    return table.stats(writer.bytes_written) if table is not None else None
+
+
+def splice_xsq(out_path: str, previous_path: str, models, beat_times, duration_ms, *, reuse=(), compress=False, **kwargs):
+    """Like stream_xsq, but copy the ``reuse`` models from ``previous_path``.
+
+    ``previous_path`` must be an xsq written by stream_xsq from the same
+    beats, preset and palette, so unchanged models can be spliced in instead of regenerated;
+    the result is byte-identical to a full stream_xsq. Models missing from
+    the old file, and every model if its effect_db mode differs, are
+    rebuilt. Returns ``(stats, reused, rebuilt)`` with model names in
+    layout order.
+    """
+    with PreviousSequence(previous_path) as previous:
+        reuse = set(reuse) if previous.compact == bool(kwargs.get("effect_db")) else set()
+        reused = [m.name for m in models if m.name in reuse and m.name in previous]
+        stats = stream_xsq(
+            out_path, models, beat_times, duration_ms,
+            compress=compress, previous=previous, reuse=set(reused), **kwargs
+        )
+    reused_set = set(reused)
+    rebuilt = [m.name for m in models if m.name not in reused_set]
+    return stats, reused, rebuilt
+
+
+def emit_timing_tracks(builder, timing):
     for name, arr in [
         ("Beats", timing.get("beats", [])),
         ("Downbeats", timing.get("downbeats", [])),
         ("Bars", timing.get("bars", [])),
         ("Sections", timing.get("sections", [])),
     ]:
-        t = ET.SubElement(root, "timing", name=name)
-        for s in arr:
-            ET.SubElement(t, "marker", timeMS=str(int(round(s * 1000))))
+        emit_timing_track(builder, name, arr)
+
+
+def compile_intents(models_by_group: dict[str, list[str]], intents: list):
+    """Index intents by the member models they expand to.
 
+    Returns ``{model name: [(start_ms, end_ms, type, params items)]}`` with
+    models in the order they are first targeted and each model's effects
+    sorted by start time (ties keep intent order). Every intent is
+    converted once, however many models its group holds. Groups nested in
+    the target group are expanded to their models (see
+    :class:`GroupHierarchy`); each group's expansion is computed once.
+    """
+    hierarchy = GroupHierarchy(models_by_group)
+    by_model = {}
+    for intent in intents:
+        members = hierarchy.models_under(intent.layout_group)
+        if not members:
+            continue
+        effect = (
+            int(intent.start_s * 1000),
+            int(intent.end_s * 1000),
+            intent.effect,
+            tuple((str(k), str(v)) for k, v in (intent.params or {}).items()),
+        )
+        for model_name in members:
+            by_model.setdefault(model_name, []).append(effect)
+    for effects in by_model.values():
+        effects.sort(key=lambda e: e[0])
+    return by_model
+
+
+def emit_xsq_from_intents(
+    builder,
+    models_by_group: dict[str, list[str]],
+    timing: dict,
+    intents: list,
+    duration_s: float,
+    effect_db: bool = False,
+    merge: bool = False,
+):
+    """Expand intents per group to each member model and emit the xsq.
 
-def write_effect(layer, eff_type, start_s, end_s, params: dict):
-    e = ET.SubElement(
-        layer,
-        "effect",
-        startMS=str(int(start_s * 1000)),
-        endMS=str(int(end_s * 1000)),
-        type=eff_type,
-    )
-    for k, v in (params or {}).items():
-        ET.SubElement(e, "param", name=str(k), value=str(v))
+    Each model's effects come from :func:`compile_intents` and are packed
+    into as few "Layer N" effect layers as keep overlapping intents apart
+    (see layers.allocate_layers). merge=True first joins back-to-back
+    identical effects. Returns the EffectDB when ``effect_db`` is set.
+    """
+    table = EffectDB() if effect_db else None
+    builder.start("xseq", {"version": "2024.05"})
+    emit_timing_tracks(builder, timing)
+    for model_name, effects in compile_intents(models_by_group, intents).items():
+        if merge:
+            effects = merge_adjacent(effects)
+        builder.start("model", {"name": model_name})
+        for n, layer in enumerate(allocate_layers(effects), start=1):
+            builder.start("effectLayer", {"name": f"Layer {n}"})
+            for start, end, etype, params in layer:
+                emit_effect(builder, str(start), str(end), etype, params, effect_db=table)
+            builder.end("effectLayer")
+        builder.end("model")
+    if table is not None:
+        table.emit(builder)
+    builder.end("xseq")
+    return table
 
 
 def build_xsq_from_intents(
@@ -77,18 +231,15 @@ def build_xsq_from_intents(
     timing: dict,
     intents: list,
     duration_s: float,
+    **kwargs,
 ):
-    root = ET.Element("xseq", version="2024.05")
-    write_timing_tracks(root, timing)
-    # Expand intents per group to each member model
-    for intent in intents:
-        members = models_by_group.get(intent.layout_group, [])
-        for model_name in members:
-            mdl = root.find(f".//model[@name='{model_name}']")
-            if mdl is None:
-                mdl = ET.SubElement(root, "model", name=model_name)
-            layer = mdl.find(".//effectLayer[@name='Layer 1']")
-            if layer is None:
-                layer = ET.SubElement(mdl, "effectLayer", name="Layer 1")
-            write_effect(layer, intent.effect, intent.start_s, intent.end_s, intent.params)
-    return ET.ElementTree(root)
+    builder = ET.TreeBuilder()
+    emit_xsq_from_intents(builder, models_by_group, timing, intents, duration_s, **kwargs)
+    return ET.ElementTree(builder.close())
+
+
+def stream_xsq_from_intents(out_path: str, models_by_group, timing, intents, duration_s, *, compress=False, **kwargs):
+    """Same bytes as write_xsq(build_xsq_from_intents(...)) without the tree."""
+    with XmlStreamWriter(out_path, compress=compress) as writer:
+        table = emit_xsq_from_intents(writer, models_by_group, timing, intents, duration_s, **kwargs)
+    return table.stats(writer.bytes_written) if table is not None else None